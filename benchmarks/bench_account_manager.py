@@ -0,0 +1,99 @@
+"""Benchmark AccountManager throughput under contention.
+
+Runs a fixed mix of buy/sell/transfer operations through ``submit_many`` with
+1, 2, 4, ... worker threads, on a few hot accounts (high lock contention) and
+on many accounts (low contention):
+
+    python benchmarks/bench_account_manager.py --ops 50000
+    python benchmarks/bench_account_manager.py --threads 1 2 4 8 16 --json
+
+On a standard (GIL) CPython build the account operations are pure Python, so
+throughput stays roughly flat as threads are added; the numbers show the cost
+of locking and scheduling rather than parallel speed-up. On a free-threaded
+build (python3.13t and later) the low-contention case scales with cores.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import sysconfig
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_manager():
+    sys.path.insert(0, str(ROOT / "output_gpt_4o"))
+    return importlib.import_module("accounts").AccountManager
+
+
+def operations(users, count):
+    ops = []
+    for i in range(count):
+        user = users[i % len(users)]
+        kind = i % 3
+        if kind == 0:
+            ops.append(("buy", user, "AAPL", 1))
+        elif kind == 1:
+            ops.append(("sell", user, "AAPL", 1))
+        else:
+            ops.append(("transfer", user, users[(i + 7) % len(users)], 1.0))
+    return ops
+
+
+def run_case(AccountManager, accounts, threads, count):
+    manager = AccountManager(shards=64, max_workers=threads)
+    users = [f"user{i:05d}" for i in range(accounts)]
+    for user in users:
+        manager.open_account(user, 1_000_000.0)
+    ops = [op for op in operations(users, count) if not (op[0] == "transfer" and op[1] == op[2])]
+    manager.submit_many(ops[:threads])  # start the pool outside the timing
+    start = time.perf_counter()
+    results = manager.submit_many(ops)
+    elapsed = time.perf_counter() - start
+    manager.shutdown()
+    errors = sum(isinstance(result, Exception) for result in results)
+    return {"ops_per_s": len(ops) / elapsed, "seconds": elapsed, "errors": errors}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=30_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--hot-accounts", type=int, default=4)
+    parser.add_argument("--accounts", type=int, default=10_000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    AccountManager = load_manager()
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    results = {
+        "cpus": os.cpu_count(),
+        "gil_enabled": gil,
+        "free_threaded_build": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "cases": {},
+    }
+    for label, accounts in (("hot", args.hot_accounts), ("spread", args.accounts)):
+        results["cases"][label] = {
+            str(threads): run_case(AccountManager, accounts, threads, args.ops) for threads in args.threads
+        }
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{args.ops} operations, {results['cpus']} CPUs, GIL {'enabled' if gil else 'disabled'}")
+    for label, accounts in (("hot", args.hot_accounts), ("spread", args.accounts)):
+        print(f"{label} ({accounts} accounts):")
+        base = results["cases"][label][str(args.threads[0])]["ops_per_s"]
+        for threads in args.threads:
+            stats = results["cases"][label][str(threads)]
+            print(f"  {threads:>3} threads {stats['ops_per_s']:12.0f} ops/s  x{stats['ops_per_s'] / base:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
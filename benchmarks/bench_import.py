@@ -0,0 +1,71 @@
+"""Benchmark CLI startup: import time of the entry points and the dry-run path.
+
+Each case runs in a fresh interpreter so nothing is already imported:
+
+    python benchmarks/bench_import.py --runs 10
+
+``import main`` and ``run_crew --dry-run`` must stay in the tens of
+milliseconds; ``import crew`` shows what a real run pays for crewai, litellm
+and pydantic.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+CASES = {
+    "import main": "import ai_engineering_team.main",
+    "run_crew --dry-run": (
+        "import sys; sys.argv = ['run_crew', '--dry-run']\n"
+        "from ai_engineering_team.main import run\n"
+        "try:\n    run()\nexcept SystemExit:\n    pass"
+    ),
+    "import crew": "import ai_engineering_team.crew",
+}
+
+
+def time_case(code, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        samples.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            return None, completed.stderr.strip().splitlines()[-1]
+    return samples, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline, _ = time_case("pass", args.runs)
+    results = {"interpreter_ms": statistics.median(baseline) * 1000}
+    for label, code in CASES.items():
+        samples, error = time_case(code, args.runs)
+        results[label] = {"error": error} if error else {
+            "median_ms": statistics.median(samples) * 1000,
+            "min_ms": min(samples) * 1000,
+        }
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{'bare interpreter':<22} {results['interpreter_ms']:9.1f} ms")
+    for label in CASES:
+        result = results[label]
+        if "error" in result:
+            print(f"{label:<22} failed: {result['error']}")
+        else:
+            print(f"{label:<22} {result['median_ms']:9.1f} ms  (min {result['min_ms']:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Benchmark the ledger's secondary indexes against scanning the whole history.
+
+Fills a TransactionLedger with --trades trades spread over --symbols symbols
+and a year of timestamps. It then measures three things:
+
+* building the indexes once;
+* transactions_for-style lookups (one symbol, one week), from the index and
+  from a NumPy mask over the full columns;
+* per-symbol cost basis / realized P&L, folded incrementally after each burst
+  of new trades or recomputed from the symbol's full history each time.
+
+    python benchmarks/bench_indexes.py --trades 1000000
+    python benchmarks/bench_indexes.py --symbols 50 --queries 500 --json
+
+Both ways must return the same positions and aggregates; the script exits
+with an error if they differ.
+"""
+import argparse
+import importlib
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+START = 1_700_000_000.0
+WEEK = 7 * 86_400.0
+
+
+def load_accounts():
+    sys.path.insert(0, str(ROOT / "output_gpt_4o"))
+    return importlib.import_module("accounts")
+
+
+def random_trades(rng, n, symbols, first_time, span):
+    # Encoded columns: type codes, symbol ids, quantities, prices, sorted timestamps
+    return (rng.choice(np.array([0, 0, 1], dtype=np.int8), n), rng.integers(0, symbols, n),
+            rng.integers(1, 100, n), np.round(rng.uniform(10.0, 500.0, n), 2),
+            np.sort(rng.uniform(first_time, first_time + span, n)))
+
+
+def scan_positions(ledger, symbol, start, end):
+    # The symbol's positions in [start, end) from masks over the full symbol and timestamp columns
+    symbol_ids = np.array(ledger.column("symbol_id"), dtype=np.int32)
+    timestamps = np.array(ledger.column("timestamp"), dtype=np.float64)
+    mask = (symbol_ids == ledger.intern(symbol)) & (timestamps >= start) & (timestamps < end)
+    return np.flatnonzero(mask)
+
+
+def scan_cost_basis(ledger, symbol):
+    # Average-cost aggregates from the symbol's full history, as LedgerIndex.cost_basis defines them
+    columns = {name: np.array(ledger.column(name)) for name in ("symbol_id", "type", "quantity", "price")}
+    shares, cost, realized = 0, 0.0, 0.0
+    positions = np.flatnonzero(columns["symbol_id"] == ledger.intern(symbol))
+    for kind, quantity, price in zip(columns["type"][positions].tolist(), columns["quantity"][positions].tolist(),
+                                     columns["price"][positions].tolist()):
+        if kind == 0:
+            shares += quantity
+            cost += quantity * price
+            continue
+        sold_cost = (cost if shares > 0 else 0.0) if quantity >= shares else cost * quantity / shares
+        realized += quantity * price - sold_cost
+        cost -= sold_cost
+        shares -= quantity
+    return shares, cost, realized
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200, help="symbol / week lookups to time")
+    parser.add_argument("--bursts", type=int, default=20, help="rounds of new trades before each cost-basis read")
+    parser.add_argument("--burst-size", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    accounts = load_accounts()
+    rng = np.random.default_rng(args.seed)
+    ledger = accounts.TransactionLedger()
+    names = [f"S{i:04d}" for i in range(args.symbols)]
+    for name in names:
+        ledger.intern(name)
+    ledger.extend(*random_trades(rng, args.trades, args.symbols, START, 52 * WEEK))
+
+    start = time.perf_counter()
+    ledger.index.positions()
+    build_seconds = time.perf_counter() - start
+
+    lookups = [(names[rng.integers(args.symbols)], START + rng.uniform(0, 51 * WEEK)) for _ in range(args.queries)]
+    indexed, index_seconds = best_of(lambda: [ledger.index.positions(symbol, begin, begin + WEEK)
+                                              for symbol, begin in lookups])
+    sample = lookups[:max(1, args.queries // 20)]
+    scanned, scan_seconds = best_of(lambda: [scan_positions(ledger, symbol, begin, begin + WEEK)
+                                             for symbol, begin in sample], repeat=1)
+    if any(list(a) != b.tolist() for a, b in zip(indexed, scanned)):
+        print("index and scan disagree on a lookup", file=sys.stderr)
+        return 1
+    rows = sum(len(positions) for positions in indexed)
+
+    # Cost basis after each burst of new trades: fold just the new rows vs recompute from scratch
+    tracked = names[:10]
+    for symbol in tracked:
+        ledger.index.cost_basis(symbol)
+    last = ledger._timestamps[-1]
+    fold_seconds = 0.0
+    for _ in range(args.bursts):
+        ledger.extend(*random_trades(rng, args.burst_size, args.symbols, last, 3600.0))
+        last = ledger._timestamps[-1]
+        start = time.perf_counter()
+        folded = [ledger.index.cost_basis(symbol) for symbol in tracked]
+        fold_seconds += time.perf_counter() - start
+    start = time.perf_counter()
+    recomputed = [scan_cost_basis(ledger, symbol) for symbol in tracked]
+    recompute_seconds = time.perf_counter() - start
+    for (shares, cost, realized), (scan_shares, scan_cost, scan_realized) in zip(folded, recomputed):
+        if shares != scan_shares or not np.isclose([cost, realized], [scan_cost, scan_realized]).all():
+            print("incremental and recomputed cost basis disagree", file=sys.stderr)
+            return 1
+
+    per_scan = scan_seconds / len(sample)
+    per_lookup = index_seconds / len(lookups)
+    results = {
+        "trades": len(ledger),
+        "symbols": args.symbols,
+        "index_build_s": build_seconds,
+        "lookup": {"queries": len(lookups), "rows_per_query": rows / len(lookups),
+                   "index_ms": per_lookup * 1000, "scan_ms": per_scan * 1000, "speedup": per_scan / per_lookup},
+        "cost_basis": {"symbols": len(tracked), "bursts": args.bursts, "burst_size": args.burst_size,
+                       "incremental_ms_per_read": fold_seconds / args.bursts * 1000,
+                       "recompute_ms_per_read": recompute_seconds * 1000,
+                       "speedup": recompute_seconds * args.bursts / fold_seconds},
+    }
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    lookup, basis = results["lookup"], results["cost_basis"]
+    print(f"{results['trades']} trades, {args.symbols} symbols; indexes built in {build_seconds:.2f} s")
+    print(f"  symbol + week lookup ({lookup['rows_per_query']:.0f} rows): index {lookup['index_ms']:8.3f} ms"
+          f"  scan {lookup['scan_ms']:8.2f} ms  x{lookup['speedup']:.0f}")
+    print(f"  cost basis of {len(tracked)} symbols after {args.burst_size} new trades: incremental "
+          f"{basis['incremental_ms_per_read']:8.3f} ms  recompute {basis['recompute_ms_per_read']:8.2f} ms"
+          f"  x{basis['speedup']:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Benchmark the columnar transaction ledger against a list of dicts.
+
+Appends N trades to each backend, then measures memory per trade, the cost of
+handing the history out (``list.copy()`` vs. a ``LedgerView``) and of reading
+it back row by row:
+
+    python benchmarks/bench_ledger.py --trades 1000000
+    python benchmarks/bench_ledger.py --variant output_gpt_4o_mini --json
+"""
+import argparse
+import gc
+import importlib
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SYMBOLS = ("AAPL", "TSLA", "GOOGL", "MSFT", "AMZN")
+
+
+def load_ledger(variant):
+    sys.path.insert(0, str(ROOT / variant))
+    return importlib.import_module("accounts").TransactionLedger
+
+
+def trades(n):
+    kinds = ("buy", "sell")
+    for i in range(n):
+        yield kinds[i % 2], SYMBOLS[i % len(SYMBOLS)], 1 + i % 100, 100.0 + i % 50, 1_700_000_000.0 + i
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, elapsed, size
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=200_000)
+    parser.add_argument("--variant", default="output_gpt_4o", help="output directory whose accounts.py to load")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    TransactionLedger = load_ledger(args.variant)
+    # gpt_4o names the column "type" ('buy'/'sell'), gpt_4o_mini "action" ('BUY'/'SELL')
+    kind_key = "type" if hasattr(TransactionLedger, "TYPES") else "action"
+    kinds = getattr(TransactionLedger, "TYPES", None) or TransactionLedger.ACTIONS
+
+    def build_dicts():
+        # The per-trade dict the Account kept before the ledger (timestamps as floats)
+        rows = []
+        for kind, symbol, quantity, price, timestamp in trades(args.trades):
+            rows.append({kind_key: kinds[kind == "sell"], "symbol": symbol, "quantity": quantity,
+                         "price": price, "timestamp": timestamp})
+        return rows
+
+    def build_ledger():
+        ledger = TransactionLedger()
+        append = ledger.append
+        for kind, symbol, quantity, price, timestamp in trades(args.trades):
+            append(kinds[kind == "sell"], symbol, quantity, price, timestamp)
+        return ledger
+
+    rows, dict_append, dict_bytes = measure(build_dicts)
+    ledger, ledger_append, ledger_bytes = measure(build_ledger)
+
+    results = {
+        "variant": args.variant,
+        "trades": args.trades,
+        "dict_list": {
+            "append_s": dict_append,
+            "bytes_per_trade": dict_bytes / args.trades,
+            "history_copy_s": timed(rows.copy),
+            "iterate_s": timed(lambda: sum(row["quantity"] for row in rows), repeat=1),
+        },
+        "ledger": {
+            "append_s": ledger_append,
+            "bytes_per_trade": ledger_bytes / args.trades,
+            "history_view_s": timed(ledger.view),
+            "iterate_s": timed(lambda: sum(row["quantity"] for row in ledger), repeat=1),
+            "column_sum_s": timed(lambda: sum(ledger.column("quantity"))),
+        },
+    }
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{args.trades} trades ({args.variant})")
+    for name, stats in (("list of dicts", results["dict_list"]), ("ledger", results["ledger"])):
+        print(f"{name}:")
+        for key, value in stats.items():
+            unit = "B" if key.startswith("bytes") else "ms"
+            shown = value if unit == "B" else value * 1000
+            print(f"  {key:<18} {shown:12.3f} {unit}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Benchmark float, Decimal and fixed-point money on a long trade replay.
+
+Replays the same synthetic history (cent-priced buys and sells that keep the
+cash balance close to the cost of the next trade) three ways in one plain
+loop: float amounts, decimal.Decimal amounts and int64 minor units (cents).
+It reports the time for each, how far the float balance drifted from the
+exact result, and how many trades the float loop accepted or refused
+differently. It then runs the gpt-4o Account with float money and with
+money_scale=100, through buy_shares/sell_shares and through apply_columns:
+
+    python benchmarks/bench_money.py --trades 1000000
+    python benchmarks/bench_money.py --account-trades 50000 --json
+
+Account does not take Decimal amounts, so Decimal is only measured in the
+plain loop.
+"""
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_accounts():
+    sys.path.insert(0, str(ROOT / "output_gpt_4o"))
+    return importlib.import_module("accounts")
+
+
+def make_trades(count, seed):
+    # (buy?, quantity, price in cents); buys spend most of the cash so the funds check is often close
+    rng = random.Random(seed)
+    trades = []
+    for _ in range(count):
+        trades.append((rng.random() < 0.55, rng.randint(1, 40), rng.randint(1, 25_000)))
+    return trades
+
+
+def replay(buys, quantities, prices, balance):
+    holdings = refused = 0
+    for buy, quantity, price in zip(buys, quantities, prices):
+        cost = price * quantity
+        if buy:
+            if cost <= balance:
+                balance -= cost
+                holdings += quantity
+            else:
+                refused += 1
+        elif quantity <= holdings:
+            balance += cost
+            holdings -= quantity
+        else:
+            refused += 1
+    return balance, refused
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def kernel_cases(trades, deposit_cents):
+    buys = [trade[0] for trade in trades]
+    quantities = [trade[1] for trade in trades]
+    cents = [trade[2] for trade in trades]
+    representations = {
+        "float": ([price / 100 for price in cents], deposit_cents / 100, float),
+        "decimal": ([Decimal(price).scaleb(-2) for price in cents], Decimal(deposit_cents).scaleb(-2), Decimal),
+        "fixed_point": (cents, deposit_cents, lambda units: Decimal(units).scaleb(-2)),
+    }
+    results = {}
+    for label, (prices, deposit, to_decimal) in representations.items():
+        seconds, (balance, refused) = timed(lambda: replay(buys, quantities, prices, deposit))
+        results[label] = {"seconds": seconds, "balance": to_decimal(balance), "refused": refused}
+    exact = results["fixed_point"]["balance"]
+    for stats in results.values():
+        stats["drift"] = float(abs(Decimal(stats["balance"]) - exact))
+        stats["balance"] = str(stats["balance"])
+    return results
+
+
+def account_cases(accounts, trades, deposit_cents, per_call_trades):
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    results = {}
+    for label, scale in (("float", None), ("fixed_point", 100)):
+        current = {}
+        account = accounts.Account("bench", deposit_cents / 100, clock=lambda: 0.0, money_scale=scale,
+                                   price_provider=accounts.StaticPriceProvider(current.get))
+
+        def loop():
+            for buy, quantity, price in trades[:per_call_trades]:
+                current["X"] = price / 100
+                (account.buy_shares if buy else account.sell_shares)("X", quantity)
+
+        seconds, _ = timed(loop)
+        results[f"{label}_per_call"] = {"seconds": seconds, "trades": per_call_trades,
+                                        "ns_per_trade": seconds / per_call_trades * 1e9, "balance": account.balance}
+        if np is None:
+            continue
+        batch = accounts.Account("bench", deposit_cents / 100, clock=lambda: 0.0, money_scale=scale)
+        types = np.where(np.array([trade[0] for trade in trades]), "buy", "sell")
+        symbols = np.full(len(trades), "X")
+        quantities = np.array([trade[1] for trade in trades], dtype=np.int64)
+        prices = np.array([trade[2] for trade in trades], dtype=np.int64) / 100
+        seconds, _ = timed(lambda: batch.apply_columns(types, symbols, quantities, prices, np.zeros(len(trades))))
+        results[f"{label}_apply_columns"] = {"seconds": seconds, "trades": len(trades),
+                                             "ns_per_trade": seconds / len(trades) * 1e9, "balance": batch.balance}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--account-trades", type=int, default=200_000,
+                        help="trades for the per-call Account runs (the slowest part)")
+    parser.add_argument("--deposit", type=float, default=10_000.0)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    trades = make_trades(args.trades, args.seed)
+    deposit_cents = round(args.deposit * 100)
+    results = {
+        "trades": args.trades,
+        "replay": kernel_cases(trades, deposit_cents),
+        "account": account_cases(load_accounts(), trades, deposit_cents, min(args.account_trades, args.trades)),
+    }
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    replay_results = results["replay"]
+    base = replay_results["float"]["seconds"]
+    print(f"replay of {args.trades} trades:")
+    for label, stats in replay_results.items():
+        decisions = stats["refused"] - replay_results["fixed_point"]["refused"]
+        print(f"  {label:<12} {stats['seconds']:7.3f} s  x{stats['seconds'] / base:5.2f}  balance {stats['balance']:>22}"
+              f"  drift {stats['drift']:.2e}  refusals {decisions:+d} vs exact")
+    print("Account:")
+    for label, stats in results["account"].items():
+        print(f"  {label:<26} {stats['trades']:>8} trades {stats['ns_per_trade']:8.0f} ns/trade  balance {stats['balance']:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Benchmark heap-indexed order triggering against scanning every open order.
+
+Rests the same limit and stop orders (up to 20% away from each symbol's
+starting price, over many accounts) in orders.OrderBook and in a plain list, then
+replays a random-walk price feed through both. The book pops only the orders
+each tick crosses. The baseline checks every open order on every tick, as
+an order list without an index would. Both fill through buy_shares/sell_shares:
+
+    python benchmarks/bench_orders.py --orders 100000
+    python benchmarks/bench_orders.py --ticks 500 --symbols 20 --json
+
+Both must trigger the same orders and leave the accounts in the same state;
+the script exits with an error if they differ.
+"""
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_modules():
+    sys.path.insert(0, str(ROOT / "output_gpt_4o"))
+    return importlib.import_module("accounts"), importlib.import_module("orders")
+
+
+def make_market(orders, symbols, accounts, ticks, seed):
+    rng = random.Random(seed)
+    names = [f"SYM{i:04d}" for i in range(symbols)]
+    start = {name: rng.uniform(20.0, 500.0) for name in names}
+    placed = []
+    for _ in range(orders):
+        symbol = names[rng.randrange(symbols)]
+        side, kind = rng.choice(("buy", "sell")), rng.choice(("limit", "stop"))
+        # Resting orders wait on the far side of the price: buy limits and sell stops below it
+        gap = rng.uniform(0.005, 0.2)
+        trigger = start[symbol] * (1 - gap if (side == "buy") == (kind == "limit") else 1 + gap)
+        placed.append((rng.randrange(accounts), side, symbol, rng.randint(1, 50), kind, round(trigger, 2)))
+    prices, feed = dict(start), []
+    for _ in range(ticks):
+        symbol = names[rng.randrange(symbols)]
+        prices[symbol] = round(prices[symbol] * rng.gauss(1.0, 0.01), 2)
+        feed.append((symbol, prices[symbol]))
+    return start, placed, feed
+
+
+def open_accounts(accounts_module, count, start):
+    # Every account starts with cash and 200 shares of each symbol, so most triggered orders can fill
+    router = accounts_module.TickRouter()
+    opened = []
+    for i in range(count):
+        account = accounts_module.Account(f"user{i}", 10_000_000.0, clock=lambda: 0.0, tick_router=router)
+        for symbol, price in start.items():
+            account.buy_shares(symbol, 200, price)
+        opened.append(account)
+    return router, opened
+
+
+def fill(order, price):
+    account, side, symbol, quantity = order[0], order[1], order[2], order[3]
+    trade = account.buy_shares if side == "buy" else account.sell_shares
+    return trade(symbol, quantity, price)
+
+
+def scan(router, resting, feed):
+    # Baseline: every tick checks every open order
+    triggered = 0
+    for symbol, price in feed:
+        router.tick(symbol, price)
+        still_open = []
+        for order in resting:
+            _, side, order_symbol, _, kind, trigger = order
+            falls = (side == "buy") == (kind == "limit")
+            if order_symbol == symbol and (trigger >= price if falls else trigger <= price):
+                fill(order, price)
+                triggered += 1
+            else:
+                still_open.append(order)
+        resting = still_open
+    return triggered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    accounts_module, orders = load_modules()
+    start, placed, feed = make_market(args.orders, args.symbols, args.accounts, args.ticks, args.seed)
+
+    router, book_accounts = open_accounts(accounts_module, args.accounts, start)
+    book = orders.OrderBook(router)
+    begin = time.perf_counter()
+    for owner, side, symbol, quantity, kind, price in placed:
+        book.place(book_accounts[owner], side, symbol, quantity, kind, price)
+    place_seconds = time.perf_counter() - begin
+    begin = time.perf_counter()
+    triggered = sum(len(book.tick(symbol, price)) for symbol, price in feed)
+    book_seconds = time.perf_counter() - begin
+
+    scan_router, scan_accounts = open_accounts(accounts_module, args.accounts, start)
+    resting = [(scan_accounts[owner],) + tuple(order) for owner, *order in placed]
+    begin = time.perf_counter()
+    scanned = scan(scan_router, resting, feed)
+    scan_seconds = time.perf_counter() - begin
+
+    for ours, theirs in zip(book_accounts, scan_accounts):
+        if ours.get_holdings() != theirs.get_holdings() or ours.balance != theirs.balance or triggered != scanned:
+            print("the order book and the scan disagree", file=sys.stderr)
+            return 1
+
+    results = {
+        "orders": args.orders,
+        "ticks": args.ticks,
+        "triggered": triggered,
+        "place_us_per_order": place_seconds / args.orders * 1e6,
+        "book_us_per_tick": book_seconds / args.ticks * 1e6,
+        "scan_us_per_tick": scan_seconds / args.ticks * 1e6,
+        "speedup": scan_seconds / book_seconds,
+    }
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{args.orders} open orders over {args.symbols} symbols and {args.accounts} accounts, "
+          f"{args.ticks} ticks, {triggered} triggered")
+    print(f"  place        {results['place_us_per_order']:10.1f} us/order")
+    print(f"  order book   {results['book_us_per_tick']:10.1f} us/tick")
+    print(f"  full scan    {results['scan_us_per_tick']:10.1f} us/tick  (book x{results['speedup']:.0f} faster)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Benchmark the write-ahead log: trade throughput and recovery time.
+
+Measures trades per second for an in-memory account, a journaled account
+(group commit in the background) and a synchronous journal where every call
+waits for its fsync, with one and with several threads. Then it measures how
+long a restart takes as the history grows, with snapshots keeping the replayed
+tail short:
+
+    python benchmarks/bench_persistence.py --trades 50000
+    python benchmarks/bench_persistence.py --threads 16 --json
+"""
+import argparse
+import importlib
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_modules():
+    sys.path.insert(0, str(ROOT / "output_gpt_4o"))
+    return importlib.import_module("accounts"), importlib.import_module("persistence")
+
+
+def run_trades(accounts, trades):
+    # Spread `trades` buy/sell pairs over the accounts, one thread per account
+    def work(account, count):
+        for _ in range(count):
+            account.buy_shares("AAPL", 2)
+            account.sell_shares("AAPL", 1)
+
+    per_thread = trades // (2 * len(accounts))
+    threads = [threading.Thread(target=work, args=(account, per_thread)) for account in accounts]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return 2 * per_thread * len(accounts) / (time.perf_counter() - start)
+
+
+def throughput(accounts_module, persistence, trades, threads):
+    results = {}
+    for label in ("memory", "journal", "synchronous"):
+        for count in sorted({1, threads}):
+            if label == "memory":
+                accounts = [accounts_module.Account(f"user{i}", 1e12) for i in range(count)]
+                results[f"{label}/{count}"] = run_trades(accounts, trades)
+                continue
+            with tempfile.TemporaryDirectory() as directory:
+                store = persistence.AccountStore(directory, synchronous=label == "synchronous")
+                accounts = [store.open_account(f"user{i}", 1e12) for i in range(count)]
+                ops = run_trades(accounts, trades)
+                store.sync()
+                results[f"{label}/{count}"] = ops
+                results[f"{label}/{count} fsyncs"] = store.stats["commits"]
+                store.close(snapshot=False)
+    return results
+
+
+def recovery(persistence, sizes, snapshot_every):
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            store = persistence.AccountStore(directory, snapshot_every=snapshot_every)
+            account = store.open_account("user", 1e12)
+            for _ in range(size // 2):
+                account.buy_shares("AAPL", 2)
+                account.sell_shares("AAPL", 1)
+            # Stop without the final snapshot, so the restart sees what a crash would leave
+            store.close(snapshot=False)
+            recovered = persistence.AccountStore(directory)
+            results[str(size)] = recovered.recovery
+            recovered.close(snapshot=False)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=40_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--history", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--snapshot-every", type=int, default=10_000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    accounts_module, persistence = load_modules()
+    results = {
+        "throughput": throughput(accounts_module, persistence, args.trades, args.threads),
+        "recovery": recovery(persistence, args.history, args.snapshot_every),
+    }
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print("trades/s:")
+    for key, value in results["throughput"].items():
+        print(f"  {key:<28} {value:12.0f}")
+    print(f"recovery (snapshot every {args.snapshot_every} records):")
+    for size, stats in results["recovery"].items():
+        print(f"  {size:>8} trades  {stats['seconds'] * 1000:8.1f} ms  replayed {stats['replayed']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Benchmark crew orchestration overhead with no network.
+
+Runs the full AiEngineeringTeam pipeline against the offline LLM stand-in,
+so the numbers cover YAML loading, agent/task construction, interpolation,
+scheduling and file writing, but not model latency. Use it to catch startup
+and per-task overhead regressions:
+
+    python benchmarks/bench_pipeline.py --runs 10
+    python benchmarks/bench_pipeline.py --latency-ms 200   # check task overlap
+    python benchmarks/bench_pipeline.py --json > pipeline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def summarize(samples):
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated latency per LLM call")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    os.environ["CREW_LLM_BACKEND"] = "offline"
+    os.environ["CREW_OFFLINE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ.setdefault("CREW_OFFLINE_DIR", str(ROOT / "output_gpt_4o"))
+    os.environ["CREW_CACHE"] = "off"
+    os.environ["CREW_TRACE"] = "off"
+
+    start = time.perf_counter()
+    from ai_engineering_team.crew import AiEngineeringTeam
+    from ai_engineering_team.main import requirements
+    from ai_engineering_team.scheduler import DagScheduler
+    import_time = time.perf_counter() - start
+
+    construct, run, tasks = [], [], {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        inputs = {
+            "requirements": requirements,
+            "module_name": "accounts.py",
+            "class_name": "Account",
+            "output_dir": output_dir,
+        }
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            crew = AiEngineeringTeam().crew()
+            construct.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = DagScheduler().run(crew, inputs=dict(inputs))
+            run.append(time.perf_counter() - start)
+            for name, timing in result.timings.items():
+                tasks.setdefault(name, []).append(timing.duration)
+
+    results = {
+        "runs": args.runs,
+        "latency_ms": args.latency_ms,
+        "import_s": import_time,
+        "construct_s": summarize(construct),
+        "run_s": summarize(run),
+        "tasks_s": {name: summarize(samples) for name, samples in tasks.items()},
+    }
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"import ai_engineering_team.crew   {import_time * 1000:9.1f} ms")
+    for label, key in (("construct crew", "construct_s"), ("run pipeline", "run_s")):
+        stats = results[key]
+        print(f"{label:<32} {stats['median'] * 1000:9.1f} ms  (min {stats['min'] * 1000:.1f}, max {stats['max'] * 1000:.1f})")
+    for name, stats in results["tasks_s"].items():
+        print(f"  {name:<30} {stats['median'] * 1000:9.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
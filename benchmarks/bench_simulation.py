@@ -0,0 +1,88 @@
+"""Benchmark Monte Carlo simulation throughput against the number of worker processes.
+
+Runs the same seeded simulation.run_simulation workload in this process
+(workers=1) and then on process pools of growing size (2, 4, ... up to the
+CPU count, or the --workers list). It reports simulations per second, the
+speedup over one worker and the scaling efficiency (speedup / workers):
+
+    python benchmarks/bench_simulation.py --simulations 4000
+    python benchmarks/bench_simulation.py --workers 1 2 8 16 --json
+
+Every run must produce the same P&L distribution; the script exits with an
+error if they differ. Scaling is only meaningful up to the physical core
+count of the machine.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_simulation():
+    sys.path.insert(0, str(ROOT / "output_gpt_4o"))
+    return importlib.import_module("simulation")
+
+
+def default_workers():
+    cpus = os.cpu_count() or 1
+    counts, workers = [1], 2
+    while workers < cpus:
+        counts.append(workers)
+        workers *= 2
+    return counts + [cpus] if cpus > 1 else counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--simulations", type=int, default=2_000)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=252)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    simulation = load_simulation()
+    symbols = [f"SYM{i:02d}" for i in range(args.symbols)]
+    start_prices = [20.0 + 30.0 * i for i in range(args.symbols)]
+    weights = [0.9 / args.symbols] * args.symbols
+    runs, reference = [], None
+    for workers in args.workers or default_workers():
+        result = simulation.run_simulation(symbols, start_prices, weights, simulations=args.simulations,
+                                           steps=args.steps, volatility=0.3, workers=workers,
+                                           chunk_size=args.chunk_size, seed=args.seed)
+        if reference is None:
+            reference = result
+        elif result["summary"] != reference["summary"]:
+            print(f"{workers} workers disagree with the first run", file=sys.stderr)
+            return 1
+        busy = [worker["seconds"] for worker in result["workers"]]
+        runs.append({"workers": workers, "processes_used": len(busy), "seconds": result["seconds"],
+                     "simulations_per_s": args.simulations / result["seconds"],
+                     "worker_seconds_min": min(busy), "worker_seconds_max": max(busy)})
+    base = runs[0]["seconds"] * runs[0]["workers"]
+    for run in runs:
+        run["speedup"] = base / run["seconds"]
+        run["efficiency"] = run["speedup"] / run["workers"]
+
+    results = {"simulations": args.simulations, "symbols": args.symbols, "steps": args.steps,
+               "cpus": os.cpu_count(), "summary": reference["summary"], "runs": runs}
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{args.simulations} simulations x {args.steps} steps x {args.symbols} symbols on {os.cpu_count()} CPU(s)")
+    for run in runs:
+        print(f"  {run['workers']:>3} workers {run['seconds']:8.2f} s {run['simulations_per_s']:9.0f} sims/s"
+              f"  x{run['speedup']:.2f}  efficiency {run['efficiency']:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Benchmark bulk trade application against the per-call loop.
+
+Applies the same synthetic trade history (mostly buys and sells that pass the
+funds/shares checks, plus a share of refused sells) four ways: one
+buy_shares/sell_shares call per trade, Account.apply_batch on row tuples,
+Account.apply_columns on NumPy arrays, and trade_import.import_trades on CSV
+and .npy files written to a temporary directory:
+
+    python benchmarks/bench_trade_import.py --trades 200000
+    python benchmarks/bench_trade_import.py --symbols 500 --json
+
+Every variant must end with the same balance and holdings; the script exits
+with an error if they differ.
+"""
+import argparse
+import importlib
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_modules():
+    sys.path.insert(0, str(ROOT / "output_gpt_4o"))
+    return importlib.import_module("accounts"), importlib.import_module("trade_import")
+
+
+def make_trades(count, symbols, seed):
+    rng = random.Random(seed)
+    names = [f"SYM{i:04d}" for i in range(symbols)]
+    prices = {name: rng.uniform(5.0, 500.0) for name in names}
+    trades = []
+    for i in range(count):
+        symbol = names[rng.randrange(symbols)]
+        kind = "sell" if rng.random() < 0.45 else "buy"
+        trades.append((kind, symbol, rng.randint(1, 20), round(prices[symbol] * rng.uniform(0.9, 1.1), 2), float(i)))
+    return trades
+
+
+def new_account(accounts):
+    return accounts.Account("bench", 1e12, clock=lambda: 0.0)
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(accounts, trade_import, trades, directory):
+    results = {}
+
+    per_call = new_account(accounts)
+    per_call.price_provider = None  # replaced per trade below
+
+    def loop():
+        # buy_shares/sell_shares take the price from the provider, so feed it each trade's price
+        current = {}
+        per_call.price_provider = accounts.StaticPriceProvider(current.get)
+        for kind, symbol, quantity, price, timestamp in trades:
+            current[symbol] = price
+            per_call.clock = lambda timestamp=timestamp: timestamp
+            (per_call.buy_shares if kind == "buy" else per_call.sell_shares)(symbol, quantity)
+
+    results["per_call"] = (timed(loop), per_call)
+
+    batch = new_account(accounts)
+    results["apply_batch"] = (timed(lambda: batch.apply_batch(trades)), batch)
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        types, symbols, quantities, prices, timestamps = (np.array(column) for column in zip(*trades))
+        arrays = new_account(accounts)
+        results["apply_columns_numpy"] = (
+            timed(lambda: arrays.apply_columns(types, symbols, quantities, prices, timestamps)), arrays)
+
+    csv_path = Path(directory) / "trades.csv"
+    with open(csv_path, "w") as f:
+        f.write("type,symbol,quantity,price,timestamp\n")
+        f.writelines(f"{kind},{symbol},{quantity},{price},{timestamp}\n" for kind, symbol, quantity, price, timestamp in trades)
+    from_csv = new_account(accounts)
+    results["import_csv"] = (timed(lambda: trade_import.import_trades(from_csv, str(csv_path))), from_csv)
+
+    if np is not None:
+        npy_path = Path(directory) / "trades.npy"
+        width = max(len(symbol) for _, symbol, _, _, _ in trades)
+        table = np.zeros(len(trades), dtype=[("type", "U4"), ("symbol", f"U{width}"), ("quantity", "i8"),
+                                              ("price", "f8"), ("timestamp", "f8")])
+        for field, column in zip(table.dtype.names, zip(*trades)):
+            table[field] = column
+        np.save(npy_path, table)
+        from_npy = new_account(accounts)
+        results["import_npy"] = (timed(lambda: trade_import.import_trades(from_npy, str(npy_path))), from_npy)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    accounts, trade_import = load_modules()
+    trades = make_trades(args.trades, args.symbols, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        runs = run(accounts, trade_import, trades, directory)
+
+    reference = runs["per_call"][1]
+    for label, (_, account) in runs.items():
+        if account.get_holdings() != reference.get_holdings() or abs(account.balance - reference.balance) > 1e-3:
+            print(f"{label} disagrees with the per-call loop", file=sys.stderr)
+            return 1
+
+    base = runs["per_call"][0]
+    results = {
+        "trades": args.trades,
+        "accepted": len(reference.transactions),
+        "cases": {
+            label: {"seconds": seconds, "trades_per_s": args.trades / seconds, "speedup": base / seconds}
+            for label, (seconds, _) in runs.items()
+        },
+    }
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{args.trades} trades over {args.symbols} symbols, {results['accepted']} accepted")
+    for label, stats in results["cases"].items():
+        print(f"  {label:<20} {stats['seconds']:8.3f} s {stats['trades_per_s']:12.0f} trades/s  x{stats['speedup']:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
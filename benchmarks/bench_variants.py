@@ -0,0 +1,178 @@
+"""Benchmark the generated accounts.py variants against each other at growing scales.
+
+Loads every output_*/accounts.py (or the --variants given) side by side. The
+variants name the same operations differently, e.g. deposit /
+get_transactions in gpt-4o and deposit_funds / report_transactions in
+gpt-4o-mini, so each is driven through an adapter that finds its method
+names. At each --scales trade count it runs the same buy/sell sequence on a
+fresh account of every variant and measures:
+
+* trade throughput (trades per second);
+* valuation latency (get_portfolio_value and get_account_summary);
+* memory per transaction held by the account (tracemalloc, separate run);
+* history hand-out cost (the public history call, then every row read back).
+
+    python benchmarks/bench_variants.py --scales 1000 10000 100000
+    python benchmarks/bench_variants.py --variants output_gpt_4o --json
+
+Every variant must end with the balance, holdings and portfolio value that
+its own price function implies; the script exits with an error otherwise.
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SYMBOLS = ("AAPL", "TSLA", "GOOGL")
+# Method names per operation, first match wins: gpt-4o's name, then gpt-4o-mini's
+OPERATIONS = {
+    "deposit": ("deposit", "deposit_funds"),
+    "withdraw": ("withdraw", "withdraw_funds"),
+    "history": ("get_transactions", "report_transactions"),
+    "holdings": ("get_holdings", "report_holdings"),
+}
+
+
+class Variant:
+    # One generated accounts.py behind a common interface
+    def __init__(self, name):
+        path = ROOT / name / "accounts.py"
+        spec = importlib.util.spec_from_file_location(f"accounts_{name}", path)
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+        self.name = name
+        self.account_class = self.module.Account
+        self.methods = {}
+        for operation, candidates in OPERATIONS.items():
+            found = [method for method in candidates if hasattr(self.account_class, method)]
+            if not found:
+                raise SystemExit(f"{name}: Account has none of {', '.join(candidates)}")
+            self.methods[operation] = found[0]
+        # gpt-4o keeps its price table on the class, gpt-4o-mini at module level
+        self.price = getattr(self.account_class, "get_share_price", None) or self.module.get_share_price
+
+    def open(self, initial_deposit):
+        return self.account_class(f"bench-{self.name}", initial_deposit)
+
+    def call(self, account, operation, *args):
+        return getattr(account, self.methods[operation])(*args)
+
+
+def trade_plan(n):
+    # Buy 2 then sell 1 of a rotating symbol, so holdings grow and every sale is covered
+    for i in range(n):
+        yield ("buy", SYMBOLS[i // 2 % 3], 2) if i % 2 == 0 else ("sell", SYMBOLS[i // 2 % 3], 1)
+
+
+def run_trades(variant, n):
+    # Fresh account funded through the variant's deposit method, then the trade plan; returns (account, seconds)
+    account = variant.open(1000.0)
+    variant.call(account, "deposit", 3000.0 * n)
+    buy, sell = account.buy_shares, account.sell_shares
+    start = time.perf_counter()
+    for kind, symbol, quantity in trade_plan(n):
+        if not (buy if kind == "buy" else sell)(symbol, quantity):
+            raise SystemExit(f"{variant.name}: {kind} {quantity} {symbol} was refused")
+    return account, time.perf_counter() - start
+
+
+def expected_state(variant, n):
+    # Balance, holdings and value the trade plan implies under the variant's own prices
+    balance, holdings = 1000.0 + 3000.0 * n, {}
+    for kind, symbol, quantity in trade_plan(n):
+        signed = quantity if kind == "buy" else -quantity
+        holdings[symbol] = holdings.get(symbol, 0) + signed
+        balance -= signed * variant.price(symbol)
+    value = balance + sum(quantity * variant.price(symbol) for symbol, quantity in holdings.items())
+    return balance, holdings, value
+
+
+def latency(fn, repeat):
+    # Median seconds per call
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bytes_per_trade(variant, n):
+    # Memory the account holds after n trades, per trade
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    account, _ = run_trades(variant, n)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del account
+    return (after - before) / n
+
+
+def measure(variant, n, repeat):
+    account, seconds = run_trades(variant, n)
+    balance, holdings, value = expected_state(variant, n)
+    history = variant.call(account, "history")
+    if (len(history) != n or variant.call(account, "holdings") != holdings
+            or abs(account.balance - balance) > 1e-6 * balance
+            or abs(account.get_portfolio_value() - value) > 1e-6 * value):
+        raise ValueError(f"{variant.name} ends in the wrong state after {n} trades")
+    if not variant.call(account, "withdraw", 1.0):
+        raise ValueError(f"{variant.name} refused a covered withdrawal")
+    return {
+        "trades_per_s": n / seconds,
+        "trade_us": seconds / n * 1e6,
+        "portfolio_value_us": latency(account.get_portfolio_value, repeat) * 1e6,
+        "account_summary_us": latency(account.get_account_summary, repeat) * 1e6,
+        "bytes_per_trade": bytes_per_trade(variant, n),
+        # A history call may copy every row, so the history figures take fewer samples
+        "history_call_us": latency(lambda: variant.call(account, "history"), max(1, repeat // 10)) * 1e6,
+        "history_read_ms": latency(lambda: sum(row["quantity"] for row in variant.call(account, "history")),
+                                   max(1, repeat // 10)) * 1e3,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--variants", nargs="+", default=None,
+                        help="output directories to compare (default: every output_*/accounts.py)")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=50, help="timed calls per latency figure")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    names = args.variants or sorted(path.parent.name for path in ROOT.glob("output_*/accounts.py"))
+    variants = [Variant(name) for name in names]
+    results = {"scales": args.scales, "variants": {}}
+    try:
+        for variant in variants:
+            results["variants"][variant.name] = {
+                "methods": variant.methods,
+                "runs": {str(n): measure(variant, n, args.repeat) for n in args.scales},
+            }
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    width = max(16, *(len(name) for name in names))
+    for n in args.scales:
+        print(f"{n} trades")
+        print(f"  {'':<20}" + "".join(f"{name:>{width + 2}}" for name in names))
+        runs = [results["variants"][name]["runs"][str(n)] for name in names]
+        for metric in runs[0]:
+            print(f"  {metric:<20}" + "".join(f"{run[metric]:>{width + 2}.2f}" for run in runs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
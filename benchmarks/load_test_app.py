@@ -0,0 +1,190 @@
+"""Load-test a generated Gradio accounts app with hundreds of simultaneous users.
+
+Starts the app (or targets one already running with --url). It then runs
+--users simulated browser sessions at once. Each is its own gradio_client
+session with its own account: it creates an account, runs --rounds of
+deposit / buy / sell / summary, then loads one page of its history
+(gpt-4o). Every --export-every-th user also exports its history. The
+script records the latency of every call and reports percentiles per
+endpoint:
+
+    python benchmarks/load_test_app.py --app output_gpt_4o --users 300
+    python benchmarks/load_test_app.py --url http://127.0.0.1:7860 --max-p95 0.5 --json
+
+The run fails (exit status 1) if any call errors, if any session ends with
+a balance other than its own deposits imply (state leaking between
+sessions), or if the 95th-percentile latency exceeds --max-p95 seconds.
+Needs gradio and gradio_client installed.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BALANCE = re.compile(r"balance'?:\s*\$?([\d.]+)", re.IGNORECASE)
+# Inputs of each app's /export endpoint: the gpt-4o app exports the transactions matching its
+# history filters (symbol, type, from, until)
+EXPORT_ARGS = {"output_gpt_4o": ("", "all", "", ""), "output_gpt_4o_mini": ()}
+# Inputs of the first-page /history call (filters, sort, descending, rows per page); gpt-4o only
+HISTORY_ARGS = {"output_gpt_4o": ("", "all", "", "", "timestamp", True, 50)}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch(app, timeout=120.0):
+    # Start app.py from its directory; returns (process, url)
+    port = free_port()
+    env = dict(os.environ, GRADIO_SERVER_PORT=str(port), GRADIO_SERVER_NAME="127.0.0.1",
+               GRADIO_ANALYTICS_ENABLED="False")
+    process = subprocess.Popen([sys.executable, "app.py"], cwd=ROOT / app, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{app}/app.py exited:\n{process.stderr.read().decode(errors='replace')}")
+        try:
+            urllib.request.urlopen(url, timeout=1.0).close()
+            return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{app}/app.py did not start within {timeout:.0f} s")
+
+
+def text(result):
+    # Endpoints return one value or a tuple of output values
+    return " ".join(map(str, result)) if isinstance(result, (list, tuple)) else str(result)
+
+
+def user_session(url, rounds, history_args, export_args, start, latencies, lock):
+    # One simulated user; returns (final balance, expected balance, error or None)
+    from gradio_client import Client
+
+    client = Client(url, verbose=False)
+    timings = []
+
+    def call(endpoint, *args):
+        begin = time.perf_counter()
+        result = client.predict(*args, api_name=f"/{endpoint}")
+        timings.append((endpoint, time.perf_counter() - begin))
+        return result
+
+    start.wait()
+    try:
+        call("create_account", 1000.0)
+        for _ in range(rounds):
+            call("deposit", 100.0)
+            call("buy", "AAPL", 1)
+            call("sell", "AAPL", 1)
+            summary = call("summary")
+        if history_args is not None:
+            call("history", *history_args)
+        if export_args is not None:
+            call("export", *export_args)
+        match = BALANCE.search(text(summary)) if rounds else None
+        balance = float(match.group(1)) if match else None
+        return balance, 1000.0 + 100.0 * rounds, None
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+    finally:
+        with lock:
+            for endpoint, seconds in timings:
+                latencies[endpoint].append(seconds)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="output_gpt_4o", choices=sorted(EXPORT_ARGS),
+                        help="app to start, or the app running at --url")
+    parser.add_argument("--url", help="test an app that is already running instead of starting one")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--export-every", type=int, default=10, help="every n-th user also exports its history")
+    parser.add_argument("--max-p95", type=float, default=1.0, help="fail if the p95 latency (seconds) is higher")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        import gradio_client  # noqa: F401
+    except ImportError:
+        print("the load test needs gradio_client (installed with gradio)", file=sys.stderr)
+        return 2
+
+    process, url = (None, args.url) if args.url else launch(args.app)
+    try:
+        latencies, lock, start = defaultdict(list), threading.Lock(), threading.Event()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            exports = args.export_every > 0
+            futures = [pool.submit(user_session, url, args.rounds, HISTORY_ARGS.get(args.app),
+                                   EXPORT_ARGS[args.app] if exports and i % args.export_every == 0 else None,
+                                   start, latencies, lock)
+                       for i in range(args.users)]
+            # Let every session connect first, then start them all at once
+            time.sleep(1.0)
+            began = time.perf_counter()
+            start.set()
+            outcomes = [future.result() for future in futures]
+            seconds = time.perf_counter() - began
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    errors = [error for _, _, error in outcomes if error]
+    mismatched = sum(1 for balance, expected, error in outcomes if not error and balance != expected)
+    every_call = [value for values in latencies.values() for value in values]
+    results = {
+        "users": args.users,
+        "calls": len(every_call),
+        "seconds": seconds,
+        "calls_per_s": len(every_call) / seconds,
+        "errors": len(errors),
+        "sample_errors": errors[:5],
+        "mismatched_balances": mismatched,
+        "latency": {
+            endpoint: {"calls": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+                       "p99": percentile(values, 0.99), "max": max(values)}
+            for endpoint, values in sorted(latencies.items()) + ([("all", every_call)] if every_call else [])
+        },
+    }
+    p95 = results["latency"].get("all", {}).get("p95", float("inf"))
+    passed = not errors and not mismatched and p95 <= args.max_p95
+    results["passed"] = passed
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0 if passed else 1
+
+    print(f"{args.users} simultaneous users, {results['calls']} calls in {seconds:.1f} s "
+          f"({results['calls_per_s']:.0f} calls/s), {len(errors)} errors, {mismatched} wrong balances")
+    for endpoint, stats in results["latency"].items():
+        print(f"  {endpoint:<15} {stats['calls']:>6} calls  p50 {stats['p50'] * 1000:7.1f} ms  "
+              f"p95 {stats['p95'] * 1000:7.1f} ms  p99 {stats['p99'] * 1000:7.1f} ms  max {stats['max'] * 1000:7.1f} ms")
+    for error in errors[:5]:
+        print(f"  error: {error}")
+    print("PASS" if passed else f"FAIL (p95 limit {args.max_p95 * 1000:.0f} ms)")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,70 +1,1187 @@
 # Account Management System Module
+import csv
+import io
+import sys
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, compress, islice, repeat
+from math import isnan
+from operator import is_, le, mul
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Below this many holdings a plain Python sum beats the cost of building NumPy arrays
+VECTORIZE_MIN_HOLDINGS = 64
+
+# Trade type codes as stored in TransactionLedger
+TRADE_CODES = {'buy': 0, 'sell': 1}
+
+# Account.apply_batch checks blocks of this many trades at once; with NumPy, blocks of at least
+# VECTORIZE_MIN_TRADES use prefix sums instead of the per-trade loop
+BATCH_BLOCK = 8192
+VECTORIZE_MIN_TRADES = 512
+
+
+class TransactionLedger:
+    # Append-only, columnar store of transactions: one typed array per field instead of a dict per trade
+    TYPES = ('buy', 'sell')
+    # Orders query() can sort by; ties keep ledger order
+    SORT_KEYS = ('timestamp', 'symbol', 'type', 'quantity', 'price')
+    CSV_FIELDS = ('timestamp', 'type', 'symbol', 'quantity', 'price')
+
+    def __init__(self, money_scale: int = None) -> None:
+        # Typed columns; symbols are interned to small integer ids. With a money scale, prices are
+        # stored as integer minor units (price x money_scale) and converted back when rows are read
+        self.money_scale = money_scale
+        self._types = array('b')
+        self._symbol_ids = array('i')
+        self._quantities = array('q')
+        self._prices = array('q' if money_scale else 'd')
+        self._timestamps = array('d')
+        self._symbols = []
+        self._symbol_index = {}
+        self.index = LedgerIndex(self)
+
+    def append(self, transaction_type: str, symbol: str, quantity: int, price: float, timestamp: float) -> None:
+        # Add one transaction in amortized O(1); arrays over-allocate like lists
+        symbol_id = self._symbol_index.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.intern(symbol)
+        self._types.append(self.TYPES.index(transaction_type))
+        self._symbol_ids.append(symbol_id)
+        self._quantities.append(quantity)
+        self._prices.append(price)
+        self._timestamps.append(timestamp)
+
+    def extend(self, types, symbol_ids, quantities, prices, timestamps) -> None:
+        # Add many already-encoded transactions (type codes, interned symbol ids) from lists or NumPy
+        # arrays, one bulk copy per column; a bad value leaves the ledger unchanged
+        columns = (self._types, self._symbol_ids, self._quantities, self._prices, self._timestamps)
+        lengths = [len(column) for column in columns]
+        try:
+            for column, values in zip(columns, (types, symbol_ids, quantities, prices, timestamps)):
+                if isinstance(values, list):
+                    column.fromlist(values)
+                else:
+                    # NumPy array: copy its raw bytes in the column's item type
+                    column.frombytes(values.astype(column.typecode, copy=False).tobytes())
+        except (TypeError, OverflowError):
+            for column, length in zip(columns, lengths):
+                del column[length:]
+            raise
+
+    def intern(self, symbol: str) -> int:
+        # Id of a symbol, registering it on first use
+        symbol_id = self._symbol_index.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_index[symbol] = len(self._symbols)
+            self._symbols.append(sys.intern(symbol))
+        return symbol_id
+
+    def row(self, index: int) -> dict:
+        # Materialize one transaction as the dict the rest of the module and the UI expect
+        return {
+            'type': self.TYPES[self._types[index]],
+            'symbol': self._symbols[self._symbol_ids[index]],
+            'quantity': self._quantities[index],
+            'price': self._prices[index] / self.money_scale if self.money_scale else self._prices[index],
+            'timestamp': self._timestamps[index]
+        }
+
+    def view(self, start: int = 0, stop=None) -> 'LedgerView':
+        # Zero-copy, read-only window over the rows that exist now
+        return LedgerView(self, *slice(start, stop).indices(len(self))[:2])
+
+    def column(self, name: str, start: int = 0, stop=None) -> array:
+        # Copy of one typed column ('type', 'symbol_id', 'quantity', 'price' or 'timestamp'); prices
+        # are minor units when the ledger has a money scale
+        columns = {'type': self._types, 'symbol_id': self._symbol_ids, 'quantity': self._quantities,
+                   'price': self._prices, 'timestamp': self._timestamps}
+        return columns[name][start:stop]
+
+    def to_numpy(self, start: int = 0, stop=None) -> dict:
+        # Export the columns as NumPy arrays; they are copies, because a live buffer export
+        # would stop the arrays from growing on the next append. Prices are int64 minor units when
+        # the ledger has a money scale
+        import numpy as np
+        symbols = np.array(self._symbols if self._symbols else [''])
+        symbol_ids = np.array(self._symbol_ids[start:stop], dtype=np.int32)
+        return {
+            'type': np.array(self._types[start:stop], dtype=np.int8),
+            'symbol_id': symbol_ids,
+            'symbol': symbols[symbol_ids],
+            'quantity': np.array(self._quantities[start:stop], dtype=np.int64),
+            'price': np.array(self._prices[start:stop], dtype=np.int64 if self.money_scale else np.float64),
+            'timestamp': np.array(self._timestamps[start:stop], dtype=np.float64)
+        }
+
+    def select(self, symbol: str = None, transaction_type: str = None, start: float = None, end: float = None):
+        # Ledger positions of the transactions matching every given filter (timestamps in [start, end)),
+        # in ledger order: a NumPy array with NumPy, a list without. Symbol and time range come from the
+        # secondary indexes, so only the type filter looks at the candidates; rows appended meanwhile
+        # are left out. Timestamps are appended last, so every column holds the indexed rows
+        if transaction_type is not None and transaction_type not in self.TYPES:
+            raise ValueError(f'Unknown transaction type {transaction_type!r}')
+        positions = self.index.positions(symbol, start, end)
+        type_code = None if transaction_type is None else self.TYPES.index(transaction_type)
+        if np is not None:
+            if isinstance(positions, range):
+                indices = np.arange(positions.start, positions.stop, dtype=np.int64)
+            else:
+                indices = np.frombuffer(positions, dtype=np.int64) if len(positions) else np.empty(0, np.int64)
+            if type_code is not None and len(indices):
+                types = np.array(self._types[:int(indices[-1]) + 1], dtype=np.int8)
+                indices = indices[types[indices] == type_code]
+            return indices
+        if type_code is not None:
+            return [i for i in positions if self._types[i] == type_code]
+        return list(positions)
+
+    def query(self, symbol: str = None, transaction_type: str = None, start: float = None, end: float = None,
+              sort: str = 'timestamp', descending: bool = False, limit: int = 50, offset: int = 0,
+              cursor: int = None) -> dict:
+        # One page of the transactions matching the filters (see select), ordered by `sort`, largest
+        # first if `descending`, and then by position, so ties keep ledger order either way. Page with `offset`, or with `cursor` = the previous page's `next_cursor`, which
+        # stays correct while transactions are added. Only the page's rows are materialized. Returns
+        # {'rows': [row dicts], 'total': rows matching the filters, 'next_cursor': int, None on the last page}
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f'Unknown sort key {sort!r}; expected one of {self.SORT_KEYS}')
+        if limit < 1 or offset < 0:
+            raise ValueError('limit must be at least 1 and offset must not be negative')
+        if cursor is not None and offset:
+            raise ValueError('Pass either offset or cursor, not both')
+        indices = self.select(symbol, transaction_type, start, end)
+        total = len(indices)
+        if cursor is not None and not 0 <= cursor < len(self._timestamps):
+            raise ValueError(f'cursor {cursor} is not a transaction position')
+        order = self._order_numpy if np is not None else self._order_python
+        ordered, remaining = order(indices, sort, descending, cursor, offset + limit)
+        page = ordered[offset:offset + limit]
+        more = remaining > offset + limit
+        return {'rows': [self.row(int(index)) for index in page], 'total': total,
+                'next_cursor': int(page[-1]) if more else None}
+
+    def _order_numpy(self, indices, sort: str, descending: bool, cursor, needed: int):
+        # Positions in (value, position) order, or (-value, position) when descending, starting after the
+        # cursor row; returns (at least the first `needed` of them, how many there are in all)
+        name = 'symbol_id' if sort == 'symbol' else sort
+        column = self.index.sort_column(name, len(self._timestamps))
+        keys = column[indices]
+        key = None if cursor is None else column[cursor]
+        if sort == 'symbol':
+            # Order symbol ids by name
+            ranks = np.empty(max(len(self._symbols), 1), dtype=np.int64)
+            ranks[np.argsort(np.array(self._symbols or ['']), kind='stable')] = np.arange(len(ranks))
+            keys = ranks[keys]
+            key = None if cursor is None else ranks[key]
+        if descending:
+            # Negated keys sort largest first while equal values stay in ledger order
+            keys = -keys.astype(np.int64 if keys.dtype.kind in 'iu' else keys.dtype)
+            key = None if cursor is None else -key
+        if cursor is not None:
+            after = (keys > key) | ((keys == key) & (indices > cursor))
+            indices, keys = indices[after], keys[after]
+        remaining = len(indices)
+        if remaining > 1 and not (keys[1:] >= keys[:-1]).all():
+            if remaining > 4 * needed:
+                # Only rows up to the needed-th key (and its ties) can reach the page: sort just those
+                keep = keys <= np.partition(keys, needed - 1)[needed - 1]
+                indices, keys = indices[keep], keys[keep]
+            indices = indices[np.lexsort((indices, keys))]
+        return indices, remaining
+
+    def _order_python(self, indices: list, sort: str, descending: bool, cursor, needed: int):
+        if sort == 'symbol':
+            # Rank of each symbol id by name
+            ranks = [0] * len(self._symbols)
+            for rank, symbol_id in enumerate(sorted(range(len(self._symbols)), key=self._symbols.__getitem__)):
+                ranks[symbol_id] = rank
+            column, values = self._symbol_ids, ranks.__getitem__
+        else:
+            column = {'timestamp': self._timestamps, 'type': self._types, 'quantity': self._quantities,
+                      'price': self._prices}[sort]
+            values = None
+        sign = -1 if descending else 1
+        if values is None:
+            key = lambda i: (sign * column[i], i)
+        else:
+            key = lambda i: (sign * values(column[i]), i)
+        if cursor is not None:
+            after = key(cursor)
+            indices = [i for i in indices if key(i) > after]
+        return sorted(indices, key=key), len(indices)
+
+    def iter_csv(self, symbol: str = None, transaction_type: str = None, start: float = None, end: float = None,
+                 chunk_size: int = 10000):
+        # Stream the matching transactions, in ledger order, as CSV text: a header, then one string
+        # per `chunk_size` rows, so exporting any history needs memory for one chunk only
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.CSV_FIELDS)
+        types, symbols, scale = self.TYPES, self._symbols, self.money_scale
+        indices = self.select(symbol, transaction_type, start, end)
+        for begin in range(0, len(indices), chunk_size):
+            writer.writerows(
+                (self._timestamps[i], types[self._types[i]], symbols[self._symbol_ids[i]], self._quantities[i],
+                 self._prices[i] / scale if scale else self._prices[i])
+                for i in indices[begin:begin + chunk_size])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if not len(indices):
+            yield buffer.getvalue()
+
+    def nbytes(self) -> int:
+        # Memory held by the columns (excluding over-allocation)
+        return sum(column.itemsize * len(column) for column in
+                   (self._types, self._symbol_ids, self._quantities, self._prices, self._timestamps))
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __getitem__(self, index):
+        # Integer index gives a row dict, a slice gives a LedgerView
+        if isinstance(index, slice):
+            return self.view()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('transaction index out of range')
+        return self.row(index)
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __eq__(self, other) -> bool:
+        # Compares equal to a list of the same transaction dicts, so it can stand in for one
+        return self.view() == other
+
+    def __repr__(self) -> str:
+        return repr(self.view())
+
+
+class LedgerView:
+    # Read-only range of a TransactionLedger; rows are materialized only when accessed
+    def __init__(self, ledger: TransactionLedger, start: int, stop: int) -> None:
+        self._ledger = ledger
+        self._start = start
+        self._stop = max(start, stop)
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        # Slicing returns another view; step slices are materialized as a list
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self._ledger.row(self._start + i) for i in range(start, stop, step)]
+            return LedgerView(self._ledger, self._start + start, self._start + stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('transaction index out of range')
+        return self._ledger.row(self._start + index)
+
+    def __iter__(self):
+        # Walk the column slices together rather than indexing every column per row
+        ledger, start, stop = self._ledger, self._start, self._stop
+        types, symbols, scale = ledger.TYPES, ledger._symbols, ledger.money_scale
+        for kind, symbol_id, quantity, price, timestamp in zip(
+                ledger._types[start:stop], ledger._symbol_ids[start:stop], ledger._quantities[start:stop],
+                ledger._prices[start:stop], ledger._timestamps[start:stop]):
+            yield {'type': types[kind], 'symbol': symbols[symbol_id], 'quantity': quantity,
+                   'price': price / scale if scale else price, 'timestamp': timestamp}
+
+    def column(self, name: str) -> array:
+        # Copy of one typed column for this range
+        return self._ledger.column(name, self._start, self._stop)
+
+    def to_numpy(self) -> dict:
+        return self._ledger.to_numpy(self._start, self._stop)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (TransactionLedger, LedgerView)):
+            other = list(other)
+        if not isinstance(other, list):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class LedgerIndex:
+    # Secondary indexes over a TransactionLedger: per-symbol position lists, the time order of the rows
+    # and per-symbol average-cost aggregates. They are brought up to date on read, each row once, so
+    # appends cost nothing extra and a read pays O(rows added since the last one)
+    def __init__(self, ledger: TransactionLedger) -> None:
+        self._ledger = ledger
+        self._indexed = 0
+        self._positions = []  # symbol id -> ascending ledger positions, array('q')
+        self._costs = []  # symbol id -> [positions folded, shares, cost basis, realized P&L]
+        self._last_time = float('-inf')
+        # Accounts never let timestamps go backwards, so time ranges are found by binary search; a
+        # ledger written out of time order falls back to filtering the candidates
+        self.time_ordered = True
+        self._sort_columns = {}  # ledger column name -> (NumPy buffer, rows filled), for query() sorting
+        self._lock = threading.Lock()
+
+    def _update(self) -> int:
+        # Index the rows appended since the last read; returns how many rows are indexed. Caller holds the lock
+        ledger = self._ledger
+        count, begin = len(ledger._timestamps), self._indexed
+        if count == begin:
+            return count
+        while len(self._positions) < len(ledger._symbols):
+            self._positions.append(array('q'))
+        times = ledger._timestamps[begin:count]
+        if np is not None and count - begin >= VECTORIZE_MIN_TRADES:
+            symbol_ids = np.array(ledger._symbol_ids[begin:count], dtype=np.int64)
+            order = np.argsort(symbol_ids, kind='stable')
+            present, firsts = np.unique(symbol_ids[order], return_index=True)
+            positions = order + begin
+            for symbol_id, first, stop in zip(present.tolist(), firsts.tolist(), firsts[1:].tolist() + [len(order)]):
+                self._positions[symbol_id].frombytes(positions[first:stop].tobytes())
+            stamps = np.array(times, dtype=np.float64)
+            ordered = stamps[0] >= self._last_time and bool((stamps[1:] >= stamps[:-1]).all())
+        else:
+            for position, symbol_id in enumerate(ledger._symbol_ids[begin:count], begin):
+                self._positions[symbol_id].append(position)
+            ordered = times[0] >= self._last_time and all(map(le, times, islice(times, 1, None)))
+        self.time_ordered = self.time_ordered and ordered
+        self._last_time = max(self._last_time, max(times))
+        self._indexed = count
+        return count
+
+    def positions(self, symbol: str = None, start: float = None, end: float = None):
+        # Ledger positions of one symbol's transactions (every symbol's if None) with timestamps in
+        # [start, end), ascending: O(log n + k) on a time-ordered ledger. Returns a range or an array('q')
+        # the caller owns
+        ledger = self._ledger
+        with self._lock:
+            count = self._update()
+            if symbol is None:
+                candidates = range(count)
+            else:
+                symbol_id = ledger._symbol_index.get(symbol)
+                if symbol_id is None or symbol_id >= len(self._positions):
+                    return array('q')
+                candidates = self._positions[symbol_id]
+            if start is None and end is None:
+                return candidates if symbol is None else candidates[:]
+            timestamps = ledger._timestamps
+            if self.time_ordered:
+                key = None if symbol is None else timestamps.__getitem__
+                keys = timestamps if symbol is None else candidates
+                lo = 0 if start is None else bisect_left(keys, start, 0, len(candidates), key=key)
+                hi = len(candidates) if end is None else bisect_left(keys, end, lo, len(candidates), key=key)
+                return candidates[lo:hi]
+            return array('q', [i for i in candidates if (start is None or timestamps[i] >= start)
+                               and (end is None or timestamps[i] < end)])
+
+    def sort_column(self, name: str, count: int):
+        # NumPy copy of the first `count` rows of a ledger column, for sorting query pages. It is kept
+        # between reads and only the rows added since are copied in, into a buffer that doubles like a
+        # list, so paging does not copy the whole column every time. The rows returned never change
+        with self._lock:
+            buffer, filled = self._sort_columns.get(name, (None, 0))
+            if buffer is None or filled < count:
+                column = self._ledger.column(name, filled, count)
+                values = np.array(column, dtype=column.typecode)
+                if buffer is None or len(buffer) < count:
+                    grown = np.empty(max(count, 2 * filled), dtype=values.dtype)
+                    if buffer is not None:
+                        grown[:filled] = buffer[:filled]
+                    buffer = grown
+                buffer[filled:count] = values
+                self._sort_columns[name] = buffer, count
+            return buffer[:count]
+
+    def cost_basis(self, symbol: str):
+        # (shares held, cost basis, realized P&L) of a symbol under average-cost accounting, in ledger
+        # units: a sale realizes its proceeds less the average cost of the shares sold. Folds only
+        # the symbol's transactions added since the last call. With a money scale the cost of the
+        # shares sold is rounded down to a minor unit; selling the last share clears any remainder
+        ledger = self._ledger
+        zero = 0 if ledger.money_scale else 0.0
+        with self._lock:
+            self._update()
+            symbol_id = ledger._symbol_index.get(symbol)
+            if symbol_id is None or symbol_id >= len(self._positions):
+                return 0, zero, zero
+            while len(self._costs) < len(self._positions):
+                self._costs.append([0, 0, zero, zero])
+            state = self._costs[symbol_id]
+            folded, shares, cost, realized = state
+            positions = self._positions[symbol_id]
+            if folded == len(positions):
+                return shares, cost, realized
+            types, quantities, prices = ledger._types, ledger._quantities, ledger._prices
+            for position in positions[folded:]:
+                quantity, price = quantities[position], prices[position]
+                if types[position] == 0:
+                    shares += quantity
+                    cost += quantity * price
+                    continue
+                if quantity >= shares:
+                    sold_cost = cost if shares > 0 else zero
+                elif ledger.money_scale:
+                    sold_cost = cost * quantity // shares
+                else:
+                    sold_cost = cost * quantity / shares
+                realized += quantity * price - sold_cost
+                cost -= sold_cost
+                shares -= quantity
+            state[:] = [len(positions), shares, cost, realized]
+            return shares, cost, realized
+
+
+class HoldingsHistory:
+    # Point-in-time index over a ledger: holdings/cash checkpoints every `interval` trades,
+    # plus a prefix-summed log of deposits and withdrawals. Cash is in the ledger's units
+    # (integer minor units when it has a money scale)
+    def __init__(self, ledger: TransactionLedger, interval: int = 1000) -> None:
+        if interval < 1:
+            raise ValueError('checkpoint interval must be at least 1')
+        self.ledger = ledger
+        self.interval = interval
+        zero = 0 if ledger.money_scale else 0.0
+        self._checkpoints = [({}, zero)]  # (holdings, cash from trades) after k * interval trades
+        self._holdings = {}
+        self._trade_cash = zero
+        self._flow_times = array('d')
+        self._flow_totals = array('q' if ledger.money_scale else 'd')
+
+    def record_trade(self, transaction_type: str, symbol: str, quantity: int, price: float) -> None:
+        # Advance the running state after a trade was appended to the ledger; checkpoint on the boundary
+        signed = quantity if transaction_type == 'buy' else -quantity
+        remaining = self._holdings.get(symbol, 0) + signed
+        if remaining:
+            self._holdings[symbol] = remaining
+        else:
+            self._holdings.pop(symbol, None)
+        self._trade_cash -= signed * price
+        if len(self.ledger) % self.interval == 0:
+            self._checkpoints.append((dict(self._holdings), self._trade_cash))
+
+    def record_batch(self, checkpoints: list, holdings: dict, trade_cash: float) -> None:
+        # Advance the running state after a batch of trades; the caller computed the checkpoints
+        # that fell inside the batch while applying it
+        self._checkpoints.extend(checkpoints)
+        self._holdings = dict(holdings)
+        self._trade_cash = trade_cash
+
+    def record_cash_flow(self, amount: float, timestamp: float) -> None:
+        # Log a deposit (positive) or withdrawal (negative) with a running total
+        total = self._flow_totals[-1] if self._flow_totals else 0
+        self._flow_times.append(timestamp)
+        self._flow_totals.append(total + amount)
+
+    def state_at(self, timestamp: float):
+        # Holdings and net cash change up to and including `timestamp`: O(log n + interval)
+        ledger = self.ledger
+        count = bisect_right(ledger._timestamps, timestamp)
+        checkpoint = count // self.interval
+        holdings, cash = self._checkpoints[checkpoint]
+        holdings = dict(holdings)
+        for index in range(checkpoint * self.interval, count):
+            symbol = ledger._symbols[ledger._symbol_ids[index]]
+            signed = ledger._quantities[index] if ledger._types[index] == 0 else -ledger._quantities[index]
+            remaining = holdings.get(symbol, 0) + signed
+            if remaining:
+                holdings[symbol] = remaining
+            else:
+                holdings.pop(symbol, None)
+            cash -= signed * ledger._prices[index]
+        flows = bisect_right(self._flow_times, timestamp)
+        if flows:
+            cash += self._flow_totals[flows - 1]
+        return holdings, cash
+
+
+class PriceProvider:
+    # Source of share prices; implementations answer many symbols in one get_prices call
+    def get_prices(self, symbols) -> dict:
+        raise NotImplementedError
+
+    def get_price(self, symbol: str) -> float:
+        prices = self.get_prices([symbol])
+        if symbol not in prices:
+            raise ValueError(f'No price for {symbol}')
+        return prices[symbol]
+
+
+class StaticPriceProvider(PriceProvider):
+    # Adapts a single-symbol price function (e.g. Account.get_share_price) to the bulk interface
+    def __init__(self, price_function) -> None:
+        self.price_function = price_function
+
+    def get_prices(self, symbols) -> dict:
+        return {symbol: self.price_function(symbol) for symbol in symbols}
+
+
+class CachedPriceProvider(PriceProvider):
+    # TTL + LRU cache in front of another provider. Misses are fetched in one bulk call, and
+    # concurrent requests for a symbol that is already being fetched wait for that fetch
+    def __init__(self, source: PriceProvider, ttl: float = 1.0, max_size: int = 1024, clock=time.monotonic) -> None:
+        self.source = source
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.fetches = 0
+        self._cache = OrderedDict()  # symbol -> (price, expires_at)
+        self._inflight = {}  # symbol -> threading.Event set when its fetch finishes
+        self._lock = threading.Lock()
+
+    def get_prices(self, symbols) -> dict:
+        prices, missing, pending = {}, [], {}
+        with self._lock:
+            now = self.clock()
+            for symbol in dict.fromkeys(symbols):
+                entry = self._cache.get(symbol)
+                if entry is not None and entry[1] > now:
+                    self._cache.move_to_end(symbol)
+                    prices[symbol] = entry[0]
+                elif symbol in self._inflight:
+                    pending[symbol] = self._inflight[symbol]
+                else:
+                    self._inflight[symbol] = threading.Event()
+                    missing.append(symbol)
+
+        if missing:
+            fetched = {}
+            try:
+                fetched = self.source.get_prices(missing)
+            finally:
+                with self._lock:
+                    self.fetches += 1
+                    expires_at = self.clock() + self.ttl
+                    for symbol in missing:
+                        if symbol in fetched:
+                            self._cache[symbol] = (fetched[symbol], expires_at)
+                            self._cache.move_to_end(symbol)
+                        self._inflight.pop(symbol).set()
+                    while len(self._cache) > self.max_size:
+                        self._cache.popitem(last=False)
+            # The source must answer every symbol: name the ones it left out rather than fail later on a KeyError
+            absent = [symbol for symbol in missing if symbol not in fetched]
+            if absent:
+                raise ValueError(f"No price for {', '.join(absent)}")
+            prices.update(fetched)
+
+        for symbol, done in pending.items():
+            done.wait()
+            with self._lock:
+                entry = self._cache.get(symbol)
+            # The fetch we waited on failed: ask the source directly
+            prices[symbol] = entry[0] if entry is not None else self.source.get_price(symbol)
+        return prices
+
+
+def holdings_value(holdings: dict, prices: dict) -> float:
+    # Sum of quantity x price over the holdings as one vectorized dot product
+    quantities = list(holdings.values())
+    symbol_prices = [prices[symbol] for symbol in holdings]
+    if np is not None and len(quantities) >= VECTORIZE_MIN_HOLDINGS:
+        return float(np.dot(np.asarray(quantities, dtype=np.float64), np.asarray(symbol_prices, dtype=np.float64)))
+    return float(sum(map(mul, quantities, symbol_prices)))
+
+
+def factorize(values):
+    # np.unique(values, return_inverse=True) for arrays with few distinct values (such as symbols):
+    # the distinct values of a sample are usually nearly all of them, and a binary search into those
+    # (plus whatever the sample missed) beats sorting the whole array
+    if not len(values):
+        return np.unique(values, return_inverse=True)
+    sample = np.unique(values[::max(1, len(values) // 1024)])
+    while True:
+        inverse = np.searchsorted(sample, values)
+        np.minimum(inverse, len(sample) - 1, out=inverse)
+        missed = sample[inverse] != values
+        if not missed.any():
+            return sample, inverse
+        sample = np.union1d(sample, values[missed])
+
+
+def vector_block(codes: list, symbol_ids: list, quantities: list, prices: list, names: list, holdings: dict,
+                 balance: float, trade_cash: float, count: int, interval: int, fixed_point: bool = False):
+    # NumPy version of the funds/shares loop in Account.apply_batch for one block of trades. Running
+    # cash and per-symbol holdings are prefix sums (cumsum adds left to right, so the floats match the
+    # loop exactly). Sells refused for lack of shares are found per symbol when the cash cannot run
+    # out; otherwise only the trades before the first one the loop would refuse are applied. With
+    # fixed_point, prices and cash are integer minor units and stay int64 throughout.
+    # Returns (trades consumed, refused positions, balance, trade_cash, holdings, checkpoints)
+    sells = np.array(codes, dtype=np.bool_)
+    quantity = np.array(quantities, dtype=np.int64)
+    cost = np.array(prices, dtype=np.int64 if fixed_point else np.float64) * quantity
+    delta = np.where(sells, cost, -cost)
+    balances = np.cumsum(np.concatenate(([balance], delta)))
+    short_of_funds = np.flatnonzero(~sells & (cost > balances[:-1]))[:1]
+    # Small ids sort with a radix sort
+    ids = np.array(symbol_ids, dtype=np.int16 if len(names) < 2 ** 15 else np.int64)
+    signed = np.where(sells, -quantity, quantity)
+    # Holdings of each symbol after each of its trades: group the trades by symbol (stable, so each
+    # group stays in time order) and take a cumulative sum that restarts at every group
+    order = np.argsort(ids, kind='stable')
+    grouped_ids, grouped = ids[order], signed[order]
+    starts = np.flatnonzero(np.concatenate(([True], grouped_ids[1:] != grouped_ids[:-1])))
+    lengths = np.diff(np.append(starts, len(grouped)))
+    running = np.cumsum(grouped)
+    initial = np.array([holdings.get(names[symbol_id], 0) for symbol_id in grouped_ids[starts].tolist()], dtype=np.int64)
+    offsets = np.repeat(initial - (running[starts] - grouped[starts]), lengths)
+    short_of_shares = running + offsets < 0
+
+    consumed, refused = len(codes), []
+    if short_of_shares.any():
+        # Refusing a sell leaves less cash for later buys, so the groups can only be settled on their
+        # own if no buy could fail even with no sale proceeds at all
+        outflows = np.cumsum(np.concatenate(([balance], np.where(sells, 0, -cost))))
+        if not len(short_of_funds) and not np.any(~sells & (cost > outflows[:-1])):
+            group_starts = starts.tolist()
+            for group in np.unique(np.searchsorted(starts, np.flatnonzero(short_of_shares), side='right') - 1).tolist():
+                held = int(initial[group])
+                begin = group_starts[group]
+                for position, change in zip(order[begin:begin + lengths[group]].tolist(),
+                                            grouped[begin:begin + lengths[group]].tolist()):
+                    if held + change < 0:
+                        refused.append(position)
+                    else:
+                        held += change
+            refused.sort()
+            # A refused trade becomes a no-op; adding zero keeps every other running sum exact
+            delta[refused] = 0
+            signed[refused] = 0
+            balances = np.cumsum(np.concatenate(([balance], delta)))
+        else:
+            short_of_funds = np.append(short_of_funds, order[short_of_shares].min())
+    if len(short_of_funds):
+        # Everything before the first refusal saw exactly the state the loop would have seen
+        consumed = int(short_of_funds.min())
+
+    trade_cashes = np.cumsum(np.concatenate(([trade_cash], delta[:consumed])))
+    accepted = consumed - len(refused)
+    kept = np.delete(np.arange(consumed), refused) if refused else None
+    current = dict(holdings)
+    checkpoints = []
+    done = 0
+    ends = list(range(interval - count % interval, accepted + 1, interval))
+    for end in ends if ends and ends[-1] == accepted else ends + [accepted]:
+        # Holdings after the end-th accepted trade, from the net change per symbol since the previous
+        # checkpoint
+        cut = end if kept is None else int(kept[end - 1]) + 1 if end else 0
+        if end == accepted:
+            cut = consumed
+        changes = np.bincount(ids[done:cut], weights=signed[done:cut])
+        for symbol_id in np.flatnonzero(changes).tolist():
+            symbol = names[symbol_id]
+            held = current.get(symbol, 0) + int(changes[symbol_id])
+            if held:
+                current[symbol] = held
+            else:
+                current.pop(symbol, None)
+        done = cut
+        if end in ends:
+            checkpoints.append((dict(current), trade_cashes[cut].item()))
+    return consumed, refused, balances[consumed].item(), trade_cashes[-1].item(), current, checkpoints
+
+
+class TickRouter:
+    # Last price per symbol plus a symbol -> accounts reverse index, so a price tick only
+    # reaches the accounts that hold the symbol. Accounts are held weakly.
+    def __init__(self) -> None:
+        self.prices = {}
+        self._holders = {}
+        self._lock = threading.Lock()
+
+    def price(self, symbol: str, default: float) -> float:
+        # Last ticked price of a symbol; the first trade in a symbol seeds it
+        with self._lock:
+            return self.prices.setdefault(symbol, default)
+
+    def subscribe(self, symbol: str, account: 'Account') -> None:
+        with self._lock:
+            self._holders.setdefault(symbol, weakref.WeakSet()).add(account)
+
+    def unsubscribe(self, symbol: str, account: 'Account') -> None:
+        with self._lock:
+            holders = self._holders.get(symbol)
+            if holders is not None:
+                holders.discard(account)
+                if not holders:
+                    del self._holders[symbol]
+
+    def holders(self, symbol: str) -> int:
+        with self._lock:
+            return len(self._holders.get(symbol, ()))
+
+    def tick(self, symbol: str, price: float) -> int:
+        # Apply a new price: O(1) per holding account, under that account's lock; returns how many were updated
+        with self._lock:
+            self.prices[symbol] = price
+            holders = list(self._holders.get(symbol, ()))
+        updated = 0
+        for account in holders:
+            with account.lock:
+                # The account may have sold out between the snapshot and taking its lock
+                if symbol in account._marks:
+                    account._reprice(symbol, price)
+                    updated += 1
+        return updated
+
+    def tick_many(self, prices: dict) -> int:
+        return sum(self.tick(symbol, price) for symbol, price in prices.items())
+
 
 class Account:
-    def __init__(self, user_id: str, initial_deposit: float) -> None:
+    def __init__(self, user_id: str, initial_deposit: float, clock=time.time, checkpoint_interval: int = 1000,
+                 price_provider: PriceProvider = None, tick_router: TickRouter = None, journal=None,
+                 money_scale: int = None) -> None:
         # Initialize account with user ID, initial deposit, and set balance
+        if money_scale is not None and (type(money_scale) is not int or money_scale < 1):
+            raise ValueError('money_scale must be a positive integer')
         self.user_id = user_id
-        self.balance = initial_deposit
+        # Optional fixed-point money: with money_scale (e.g. 100 for cents) cash, prices and values are
+        # kept as integer minor units, so every check and sum is exact; the public methods still take
+        # and return currency amounts
+        self.money_scale = money_scale
+        self._balance = self.to_units(initial_deposit)
         self.holdings = {}
-        self.transactions = []
+        self.transactions = TransactionLedger(money_scale)
         self.initial_deposit = initial_deposit
+        self._initial_units = self.to_units(initial_deposit)
+        # Clock used to timestamp transactions (injectable for tests) and the point-in-time index
+        self.clock = clock
+        self.history = HoldingsHistory(self.transactions, checkpoint_interval)
+        self._last_timestamp = float('-inf')
+        # Where share prices come from; defaults to the fixed test prices of get_share_price
+        self.price_provider = price_provider or StaticPriceProvider(self.get_share_price)
+        # Running market value of the holdings at the last ticked prices (`_marks`), kept up to date
+        # by trade deltas and price ticks so valuation is O(1); share a router across accounts
+        self.tick_router = tick_router or TickRouter()
+        self._marks = {}
+        self._market_value = self.to_units(0.0)
+        # Held by AccountManager operations, price ticks and while a change is applied; check-then-act
+        # sequences (enough funds, enough shares) are only atomic when the caller holds it
+        self.lock = threading.RLock()
+        # Optional write-ahead log (see persistence.AccountStore): every change is recorded with
+        # journal.record(account, operation, symbol, quantity, amount, timestamp)
+        self.journal = journal
+        self.journal_seq = 0
+
+    @property
+    def balance(self) -> float:
+        # Cash balance in currency units
+        return self._balance / self.money_scale if self.money_scale else self._balance
+
+    @balance.setter
+    def balance(self, amount: float) -> None:
+        self._balance = self.to_units(amount)
+
+    def to_units(self, amount):
+        # Currency amount in the account's internal units: integer minor units with a money scale
+        # (rounded half to even, like numpy.rint), unchanged otherwise
+        return round(amount * self.money_scale) if self.money_scale else amount
+
+    def from_units(self, units):
+        # Internal units back to currency units
+        return units / self.money_scale if self.money_scale else units
 
     def deposit(self, amount: float) -> None:
         # Deposit funds into the account
-        self.balance += amount
+        self._commit('deposit', '', 0, amount)
 
     def withdraw(self, amount: float) -> bool:
-        # Attempt to withdraw funds from the account
-        if amount <= self.balance:
-            self.balance -= amount
-            return True
-        return False
-
-    def buy_shares(self, symbol: str, quantity: int) -> bool:
-        # Buy shares if funds are sufficient
-        price = self.get_share_price(symbol)
-        cost = price * quantity
-        if cost <= self.balance:
-            self.balance -= cost
-            self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
-            self.record_transaction('buy', symbol, quantity, price)
-            return True
-        return False
+        # Attempt to withdraw funds from the account; the check and the change happen under the lock,
+        # so two threads cannot both pass the check and overdraw
+        with self.lock:
+            if self.to_units(amount) <= self._balance:
+                self._commit('withdraw', '', 0, amount)
+                return True
+            return False
 
-    def sell_shares(self, symbol: str, quantity: int) -> bool:
-        # Sell shares if quantity owned is sufficient
-        if symbol in self.holdings and self.holdings[symbol] >= quantity:
-            price = self.get_share_price(symbol)
-            revenue = price * quantity
-            self.holdings[symbol] -= quantity
-            self.balance += revenue
-            self.record_transaction('sell', symbol, quantity, price)
-            if self.holdings[symbol] == 0:
-                del self.holdings[symbol]
-            return True
-        return False
+    def buy_shares(self, symbol: str, quantity: int, price: float = None) -> bool:
+        # Buy shares if funds are sufficient, at `price` if given (e.g. an order fill) or the current price
+        if price is None:
+            price = self.price_provider.get_price(symbol)
+        cost = self.to_units(price) * quantity
+        with self.lock:
+            if cost <= self._balance:
+                self._commit('buy', symbol, quantity, price)
+                return True
+            return False
+
+    def sell_shares(self, symbol: str, quantity: int, price: float = None) -> bool:
+        # Sell shares if quantity owned is sufficient, at `price` if given or the current price
+        with self.lock:
+            if symbol in self.holdings and self.holdings[symbol] >= quantity:
+                if price is None:
+                    price = self.price_provider.get_price(symbol)
+                self._commit('sell', symbol, quantity, price)
+                return True
+            return False
+
+    def apply_batch(self, trades) -> dict:
+        # Apply many (type, symbol, quantity, price, timestamp) rows in order; see apply_columns
+        trades = trades if isinstance(trades, list) else list(trades)
+        try:
+            if set(map(len, trades)) - {5}:
+                raise ValueError('malformed row')
+            columns = [[row[field] for row in trades] for field in range(5)]
+        except (TypeError, ValueError):
+            with self.lock:
+                return self._apply_validated(*self._validate_rows(trades))
+        return self.apply_columns(*columns)
+
+    def apply_columns(self, types, symbols, quantities, prices=None, timestamps=None) -> dict:
+        # Apply many trades given as parallel columns, in order, with the rules of buy_shares/sell_shares:
+        # a buy needs the funds, a sell needs the shares. Missing prices (None) are looked up in one bulk
+        # call, missing timestamps mean now. Rejected rows are skipped and reported. Whole columns are
+        # validated with map/set/min (or NumPy for array columns); only a batch with bad rows is
+        # validated row by row. NumPy arrays go through without becoming Python objects.
+        # Returns {'accepted': count, 'rejected': [(row index, reason), ...]}
+        if len({len(column) for column in (types, symbols, quantities, prices, timestamps) if column is not None}) > 1:
+            raise ValueError('columns must have the same length')
+        if np is not None and isinstance(quantities, np.ndarray):
+            with self.lock:
+                validated = self._validate_arrays(types, symbols, quantities, prices, timestamps)
+                if validated is not None:
+                    return self._apply_validated(*validated)
+            types, symbols, quantities, prices, timestamps = (
+                column.tolist() if isinstance(column, np.ndarray) else column
+                for column in (types, symbols, quantities, prices, timestamps))
+        count = len(types)
+        prices = [None] * count if prices is None else list(prices)
+        timestamps = [None] * count if timestamps is None else list(timestamps)
+        columns = (list(types), list(symbols), list(quantities), prices, timestamps)
+        with self.lock:
+            try:
+                validated = self._validate_columns(*columns)
+            except (TypeError, ValueError, OverflowError):
+                validated = self._validate_rows(list(zip(*columns)))
+            return self._apply_validated(*validated)
+
+    def _validate_columns(self, types, symbols, quantities, prices, timestamps):
+        # Column-wide checks for the common all-valid batch; raises ValueError/TypeError on any bad row.
+        # Returns (row indices, type codes, symbols, quantities, prices, timestamps, rejected)
+        codes = list(map(TRADE_CODES.get, types))
+        if (None in codes or set(map(type, symbols)) - {str} or set(map(type, quantities)) - {int}
+                or min(quantities, default=1) <= 0):
+            raise ValueError('invalid row')
+        if any(map(is_, prices, repeat(None))):
+            looked_up = self.price_provider.get_prices(set(compress(symbols, map(is_, prices, repeat(None)))))
+            prices = [looked_up.get(symbol) if price is None else price for symbol, price in zip(symbols, prices)]
+        if (any(map(is_, prices, repeat(None))) or set(map(type, prices)) - {float, int} or any(map(isnan, prices))
+                or min(prices, default=0) < 0):
+            raise ValueError('invalid price')
+        if any(map(is_, timestamps, repeat(None))):
+            now = self.clock()
+            timestamps = [now if timestamp is None else timestamp for timestamp in timestamps]
+        if set(map(type, timestamps)) - {float, int} or any(map(isnan, timestamps)):
+            raise ValueError('invalid timestamp')
+        last = self._last_timestamp
+        if timestamps and not (timestamps[0] >= last and all(map(le, timestamps, islice(timestamps, 1, None)))):
+            # Timestamps never go backwards (see _now)
+            timestamps = list(accumulate(timestamps, max, initial=last))[1:]
+        return range(len(codes)), codes, symbols, quantities, prices, timestamps, []
+
+    def _validate_arrays(self, types, symbols, quantities, prices, timestamps):
+        # NumPy version of _validate_columns; returns None when some row needs the row-by-row check
+        types, symbols = np.asarray(types), np.asarray(symbols)
+        count = len(quantities)
+        codes = np.full(count, -1, dtype=np.int8)
+        codes[types == 'buy'] = 0
+        codes[types == 'sell'] = 1
+        if (codes < 0).any() or symbols.dtype.kind != 'U' or quantities.dtype.kind not in 'iu':
+            return None
+        if count and quantities.min() <= 0:
+            return None
+        if prices is None:
+            unique, inverse = factorize(symbols)
+            looked_up = self.price_provider.get_prices(unique.tolist())
+            table = [looked_up.get(symbol) for symbol in unique.tolist()]
+            if None in table:
+                return None
+            prices = np.array(table, dtype=np.float64)[inverse]
+        prices = np.asarray(prices)
+        if prices.dtype.kind not in 'iuf':
+            return None
+        prices = prices.astype(np.float64, copy=False)
+        if np.isnan(prices).any() or (prices < 0).any():
+            return None
+        if timestamps is None:
+            timestamps = np.full(count, self.clock())
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype.kind not in 'iuf':
+            return None
+        timestamps = timestamps.astype(np.float64, copy=False)
+        if np.isnan(timestamps).any():
+            return None
+        last = self._last_timestamp
+        if count and (timestamps[0] < last or (timestamps[1:] < timestamps[:-1]).any()):
+            # Timestamps never go backwards (see _now)
+            timestamps = np.maximum.accumulate(np.maximum(timestamps, last))
+        return range(count), codes, symbols, quantities.astype(np.int64, copy=False), prices, timestamps, []
+
+    def _validate_rows(self, trades: list):
+        # Row-by-row version of _validate_columns that names the problem with each rejected row
+        missing = {row[1] for row in trades
+                   if isinstance(row, (tuple, list)) and len(row) == 5 and row[3] is None and type(row[1]) is str}
+        looked_up = self.price_provider.get_prices(missing) if missing else {}
+        now, last = self.clock(), self._last_timestamp
+        rows, codes, symbols, quantities, prices, timestamps, rejected = [], [], [], [], [], [], []
+        for index, row in enumerate(trades):
+            try:
+                kind, symbol, quantity, price, timestamp = row
+                code = TRADE_CODES.get(kind)
+            except (TypeError, ValueError):
+                rejected.append((index, 'malformed row'))
+                continue
+            if code is None:
+                rejected.append((index, f'unknown type {kind!r}'))
+                continue
+            if type(symbol) is not str:
+                rejected.append((index, 'symbol must be a string'))
+                continue
+            if type(quantity) is not int or quantity <= 0:
+                rejected.append((index, 'quantity must be a positive integer'))
+                continue
+            if price is None:
+                price = looked_up.get(symbol)
+                if price is None:
+                    rejected.append((index, f'no price for {symbol}'))
+                    continue
+            if type(price) not in (float, int) or not price >= 0:
+                rejected.append((index, 'price must be a non-negative number'))
+                continue
+            if timestamp is None:
+                timestamp = now
+            if type(timestamp) not in (float, int) or timestamp != timestamp:
+                rejected.append((index, 'timestamp must be a number'))
+                continue
+            last = max(timestamp, last)
+            rows.append(index)
+            codes.append(code)
+            symbols.append(symbol)
+            quantities.append(quantity)
+            prices.append(price)
+            timestamps.append(last)
+        return rows, codes, symbols, quantities, prices, timestamps, rejected
+
+    def _apply_validated(self, rows, codes, symbols, quantities, prices, timestamps, rejected) -> dict:
+        # Apply validated columns (lists, or NumPy arrays from _validate_arrays) under the funds/shares
+        # rules; the caller holds self.lock. Blocks are checked with NumPy prefix sums when available,
+        # restarting after each refused row; blocks with many refusals (and every block without NumPy)
+        # go through one tight sequential loop. The ledger is extended column by column.
+        ledger, history, holdings = self.transactions, self.history, self.holdings
+        arrays = np is not None and isinstance(codes, np.ndarray)
+        fixed_point = self.money_scale is not None
+        if fixed_point:
+            prices = (np.rint(prices * self.money_scale).astype(np.int64) if arrays
+                      else list(map(self.to_units, prices)))
+        if arrays:
+            unique, inverse = factorize(symbols)
+            table = np.array([ledger.intern(symbol) for symbol in unique.tolist()], dtype=np.int32)
+            symbol_ids = table[inverse.reshape(-1)]
+        else:
+            for symbol in set(symbols):
+                ledger.intern(symbol)
+            symbol_ids = list(map(ledger._symbol_index.__getitem__, symbols))
+        names = ledger._symbols
+        before = dict(holdings)
+        balance, trade_cash = self._balance, history._trade_cash
+        count, interval = len(ledger), history.interval
+        checkpoints, refused = [], []
+        # Rows to run through the loop after a refusal close to the previous one; doubles while
+        # refusals stay dense so a batch that is mostly refused does not retry NumPy every few rows
+        position, total, dense, stretch = 0, len(codes), False, VECTORIZE_MIN_TRADES
+        while position < total:
+            stop = min(position + BATCH_BLOCK, total)
+            if np is not None and not dense and stop - position >= VECTORIZE_MIN_TRADES:
+                block = (codes[position:stop], symbol_ids[position:stop], quantities[position:stop], prices[position:stop])
+                consumed, block_refused, balance, trade_cash, block_holdings, block_checkpoints = vector_block(
+                    *block, names, holdings, balance, trade_cash, count, interval, fixed_point)
+                holdings.clear()
+                holdings.update(block_holdings)
+                checkpoints += block_checkpoints
+                refused += [(position + offset, 'insufficient shares') for offset in block_refused]
+                applied = consumed - len(block_refused)
+                count += applied
+                position += consumed
+                if position < stop:
+                    # The trade that ended the prefix is refused
+                    refused.append((position, 'insufficient shares' if codes[position] else 'insufficient funds'))
+                    position += 1
+                    dense = applied < VECTORIZE_MIN_TRADES
+                if not dense:
+                    stretch = VECTORIZE_MIN_TRADES
+                continue
+            if dense:
+                stop = min(position + stretch, total)
+                stretch = min(stretch * 2, BATCH_BLOCK)
+                dense = False
+            block = (codes[position:stop], symbol_ids[position:stop], quantities[position:stop], prices[position:stop])
+            if arrays:
+                block = [column.tolist() for column in block]
+            boundary = count - count % interval + interval
+            for position, (code, symbol_id, quantity, price) in enumerate(zip(*block), position):
+                symbol = names[symbol_id]
+                cost = price * quantity
+                if code:
+                    held = holdings.get(symbol, 0) - quantity
+                    if held < 0:
+                        refused.append((position, 'insufficient shares'))
+                        continue
+                    balance += cost
+                    trade_cash += cost
+                    if held:
+                        holdings[symbol] = held
+                    else:
+                        del holdings[symbol]
+                else:
+                    if cost > balance:
+                        refused.append((position, 'insufficient funds'))
+                        continue
+                    balance -= cost
+                    trade_cash -= cost
+                    holdings[symbol] = holdings.get(symbol, 0) + quantity
+                count += 1
+                if count == boundary:
+                    checkpoints.append((dict(holdings), trade_cash))
+                    boundary += interval
+            position = stop
+
+        columns = (codes, symbol_ids, quantities, prices, timestamps)
+        if refused:
+            dropped = [position for position, _ in refused]
+            if arrays:
+                keep = np.ones(len(codes), dtype=np.bool_)
+                keep[dropped] = False
+                columns = tuple(column[keep] for column in columns)
+            else:
+                dropped = set(dropped)
+                keep = [position not in dropped for position in range(len(codes))]
+                columns = tuple(list(compress(column, keep)) for column in columns)
+            rejected = sorted(rejected + [(rows[position], reason) for position, reason in refused])
+        ledger.extend(*columns)
+        history.record_batch(checkpoints, holdings, trade_cash)
+        self._balance = balance
+        codes, symbol_ids, quantities, prices, timestamps = columns
+        if len(codes):
+            self._last_timestamp = float(timestamps[-1])
+        # Net change per symbol moves the running market value (and router subscriptions) once;
+        # a newly held symbol is marked at its first price in the batch, as buy_shares would have
+        changed = {symbol: holdings.get(symbol, 0) - before.get(symbol, 0) for symbol in set(holdings) | set(before)}
+        changed = {symbol: change for symbol, change in changed.items() if change}
+        if changed:
+            if arrays:
+                unique, first = np.unique(symbol_ids, return_index=True)
+                first_prices = dict(zip(map(names.__getitem__, unique.tolist()), prices[first].tolist()))
+            else:
+                first_prices = dict(zip(map(names.__getitem__, reversed(symbol_ids)), reversed(prices)))
+            for symbol, change in changed.items():
+                self._mark_trade('buy' if change > 0 else 'sell', symbol, abs(change), self.from_units(first_prices[symbol]))
+        if self.journal is not None and len(codes):
+            if arrays:
+                codes, symbol_ids, quantities, prices, timestamps = (column.tolist() for column in columns)
+            if fixed_point:
+                prices = list(map(self.from_units, prices))
+            self.journal.record_many(self, list(zip(map(ledger.TYPES.__getitem__, codes), map(names.__getitem__, symbol_ids),
+                                                    quantities, prices, timestamps)))
+        return {'accepted': len(codes), 'rejected': rejected}
 
-    def get_portfolio_value(self) -> float:
-        # Calculate total portfolio value based on current share prices
-        total_value = self.balance
-        for symbol, quantity in self.holdings.items():
-            total_value += self.get_share_price(symbol) * quantity
-        return total_value
+    def get_portfolio_value(self, prices: dict = None) -> float:
+        # Calculate total portfolio value from the running market value (or the given symbol -> price mapping)
+        return self.from_units(self._value_units(prices))
 
-    def get_profit_or_loss(self) -> float:
+    def get_profit_or_loss(self, prices: dict = None) -> float:
         # Calculate profit or loss based on initial deposit
-        return self.get_portfolio_value() - self.initial_deposit
+        return self.from_units(self._value_units(prices) - self._initial_units)
+
+    def _value_units(self, prices: dict = None):
+        # Portfolio value in internal units
+        if prices is None:
+            return self._balance + self._market_value
+        return self._balance + self._holdings_units(self.holdings, prices)
+
+    def _holdings_units(self, holdings: dict, prices: dict):
+        # Value of holdings at currency prices, in internal units
+        if self.money_scale:
+            return sum(quantity * self.to_units(prices[symbol]) for symbol, quantity in holdings.items())
+        return holdings_value(holdings, prices)
 
     def get_holdings(self) -> dict:
         # Return current holdings of the user
         return self.holdings.copy()
 
-    def get_transactions(self) -> list:
-        # Return a list of all transactions made by the user
-        return self.transactions.copy()
+    def holdings_at(self, timestamp: float) -> dict:
+        # Holdings as they were at `timestamp`, from the nearest checkpoint instead of a full replay
+        return self.history.state_at(timestamp)[0]
+
+    def cash_at(self, timestamp: float) -> float:
+        # Cash balance as it was at `timestamp`
+        return self.from_units(self._initial_units + self.history.state_at(timestamp)[1])
+
+    def profit_or_loss_at(self, timestamp: float, prices=None) -> float:
+        # Profit or loss at `timestamp`, valuing the holdings then at `prices`
+        # (a symbol -> price mapping; symbols not in it use the current share price)
+        holdings, cash = self.history.state_at(timestamp)
+        prices = dict(prices or {})
+        missing = [symbol for symbol in holdings if symbol not in prices]
+        if missing:
+            prices.update(self.price_provider.get_prices(missing))
+        return self.from_units(cash + self._holdings_units(holdings, prices))
+
+    def get_transactions(self) -> LedgerView:
+        # Return a read-only view of all transactions made by the user (no copy)
+        return self.transactions.view()
+
+    def query_transactions(self, symbol: str = None, transaction_type: str = None, start: float = None,
+                           end: float = None, sort: str = 'timestamp', descending: bool = False, limit: int = 50,
+                           offset: int = 0, cursor: int = None) -> dict:
+        # Filter, sort and page the transactions on the server side; see TransactionLedger.query
+        return self.transactions.query(symbol, transaction_type, start, end, sort, descending, limit, offset, cursor)
+
+    def iter_transactions_csv(self, symbol: str = None, transaction_type: str = None, start: float = None,
+                              end: float = None, chunk_size: int = 10000):
+        # Stream the (filtered) transactions as CSV text chunks; see TransactionLedger.iter_csv
+        return self.transactions.iter_csv(symbol, transaction_type, start, end, chunk_size)
+
+    def transactions_for(self, symbol: str = None, start: float = None, end: float = None) -> list:
+        # A symbol's transactions (every symbol's if None) with timestamps in [start, end), oldest
+        # first, from the ledger's secondary indexes: O(log n + k) rather than a scan of the history
+        ledger = self.transactions
+        return [ledger.row(position) for position in ledger.index.positions(symbol, start, end)]
+
+    def cost_basis(self, symbol: str) -> dict:
+        # Average-cost position of a symbol from its trades: shares held, their total and per-share
+        # cost, and the profit/loss realized by its sales; only trades since the last call are folded in
+        shares, cost, realized = self.transactions.index.cost_basis(symbol)
+        cost = self.from_units(cost)
+        return {
+            'symbol': symbol,
+            'quantity': shares,
+            'cost_basis': cost,
+            'average_cost': cost / shares if shares else 0.0,
+            'realized_pnl': self.from_units(realized)
+        }
+
+    def realized_pnl(self, symbol: str = None) -> float:
+        # Profit/loss realized by sales under average-cost accounting, for one symbol or all of them
+        index = self.transactions.index
+        symbols = [symbol] if symbol is not None else list(self.transactions._symbols)
+        return self.from_units(sum(index.cost_basis(name)[2] for name in symbols))
 
     def get_account_summary(self) -> dict:
-        # Return a summary of the account
+        # Return a summary of the account; value and profit/loss are O(1) reads of the running market value
         return {
             'user_id': self.user_id,
             'balance': self.balance,
@@ -73,14 +1190,83 @@ class Account:
             'profit_or_loss': self.get_profit_or_loss()
         }
 
-    def record_transaction(self, transaction_type: str, symbol: str, quantity: int, price: float) -> None:
-        # Record a transaction in the transactions list
-        self.transactions.append({
-            'type': transaction_type,
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': price
-        })
+    def refresh_prices(self) -> None:
+        # Pull current prices for the held symbols in one bulk lookup and tick them through the router
+        self.tick_router.tick_many(self.price_provider.get_prices(self.holdings))
+
+    def revalue(self) -> float:
+        # Recompute the running market value from scratch (clears accumulated rounding error)
+        if self.money_scale:
+            self._market_value = sum(quantity * self._marks[symbol] for symbol, quantity in self.holdings.items())
+        else:
+            self._market_value = holdings_value(self.holdings, self._marks)
+        return self.from_units(self._market_value)
+
+    def record_transaction(self, transaction_type: str, symbol: str, quantity: int, price: float,
+                           timestamp: float = None) -> None:
+        # Record a transaction in the ledger and advance the point-in-time index
+        units = self.to_units(price)
+        self.transactions.append(transaction_type, symbol, quantity, units,
+                                 self._now() if timestamp is None else timestamp)
+        self.history.record_trade(transaction_type, symbol, quantity, units)
+        self._mark_trade(transaction_type, symbol, quantity, price)
+
+    def _commit(self, operation: str, symbol: str, quantity: int, amount: float) -> None:
+        # Apply a validated change now and hand it to the journal, if any
+        with self.lock:
+            timestamp = self._now()
+            self.apply(operation, symbol, quantity, amount, timestamp)
+            if self.journal is not None:
+                self.journal.record(self, operation, symbol, quantity, amount, timestamp)
+
+    def apply(self, operation: str, symbol: str, quantity: int, amount: float, timestamp: float) -> None:
+        # Apply a change without checks or price lookups: `amount` is the cash amount for deposits and
+        # withdrawals and the share price for trades. Also used to replay a journal after a restart.
+        self._last_timestamp = max(timestamp, self._last_timestamp)
+        units = self.to_units(amount)
+        if operation == 'deposit':
+            self._balance += units
+            self.history.record_cash_flow(units, timestamp)
+        elif operation == 'withdraw':
+            self._balance -= units
+            self.history.record_cash_flow(-units, timestamp)
+        elif operation == 'buy':
+            self._balance -= units * quantity
+            self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
+            self.record_transaction('buy', symbol, quantity, amount, timestamp)
+        elif operation == 'sell':
+            self.holdings[symbol] -= quantity
+            self._balance += units * quantity
+            self.record_transaction('sell', symbol, quantity, amount, timestamp)
+            if self.holdings[symbol] == 0:
+                del self.holdings[symbol]
+        else:
+            raise ValueError(f'Unknown operation {operation!r}')
+
+    def _mark_trade(self, transaction_type: str, symbol: str, quantity: int, price: float) -> None:
+        # Apply a trade's delta to the running market value; called after holdings were updated.
+        # Marks and the market value are in internal units, the router's prices in currency
+        mark = self._marks.get(symbol)
+        if mark is None:
+            mark = self._marks[symbol] = self.to_units(self.tick_router.price(symbol, price))
+            self.tick_router.subscribe(symbol, self)
+        self._market_value += (quantity if transaction_type == 'buy' else -quantity) * mark
+        if not self.holdings.get(symbol):
+            del self._marks[symbol]
+            self.tick_router.unsubscribe(symbol, self)
+            if not self._marks:
+                self._market_value = self.to_units(0.0)
+
+    def _reprice(self, symbol: str, price: float) -> None:
+        # Price tick for a held symbol: O(1) update of the running market value
+        price = self.to_units(price)
+        self._market_value += self.holdings[symbol] * (price - self._marks[symbol])
+        self._marks[symbol] = price
+
+    def _now(self) -> float:
+        # Timestamps never go backwards, so the ledger and cash-flow log stay sorted for binary search
+        self._last_timestamp = max(self.clock(), self._last_timestamp)
+        return self._last_timestamp
 
     @staticmethod
     def get_share_price(symbol: str) -> float:
@@ -92,13 +1278,129 @@ class Account:
         }
         return prices.get(symbol, 0.0)
 
+
+class AccountManager:
+    # Hosts many accounts for concurrent use. Accounts live in `shards` dicts, each with its own lock
+    # for opening/looking up accounts; every operation on an account holds that account's lock, so
+    # the no-negative-balance and no-overselling checks and the update they guard are atomic.
+    OPERATIONS = ('deposit', 'withdraw', 'buy', 'sell', 'transfer', 'summary')
+    def __init__(self, shards: int = 16, tick_router: TickRouter = None, max_workers: int = None) -> None:
+        self.tick_router = tick_router or TickRouter()
+        self._shards = [{} for _ in range(shards)]
+        self._shard_locks = [threading.Lock() for _ in range(shards)]
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _shard(self, user_id: str) -> int:
+        return hash(user_id) % len(self._shards)
+
+    def open_account(self, user_id: str, initial_deposit: float, **options) -> Account:
+        # Create and register an account; user ids are unique
+        shard = self._shard(user_id)
+        with self._shard_locks[shard]:
+            if user_id in self._shards[shard]:
+                raise ValueError(f'Account {user_id!r} already exists')
+            account = Account(user_id, initial_deposit, tick_router=self.tick_router, **options)
+            self._shards[shard][user_id] = account
+            return account
+
+    def get(self, user_id: str) -> Account:
+        shard = self._shard(user_id)
+        with self._shard_locks[shard]:
+            try:
+                return self._shards[shard][user_id]
+            except KeyError:
+                raise KeyError(f'No account {user_id!r}') from None
+
+    def close_account(self, user_id: str) -> Account:
+        shard = self._shard(user_id)
+        with self._shard_locks[shard]:
+            return self._shards[shard].pop(user_id)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def __contains__(self, user_id: str) -> bool:
+        shard = self._shard(user_id)
+        with self._shard_locks[shard]:
+            return user_id in self._shards[shard]
+
+    def deposit(self, user_id: str, amount: float) -> bool:
+        account = self.get(user_id)
+        with account.lock:
+            account.deposit(amount)
+        return True
+
+    def withdraw(self, user_id: str, amount: float) -> bool:
+        account = self.get(user_id)
+        with account.lock:
+            return account.withdraw(amount)
+
+    def buy(self, user_id: str, symbol: str, quantity: int) -> bool:
+        account = self.get(user_id)
+        with account.lock:
+            return account.buy_shares(symbol, quantity)
+
+    def sell(self, user_id: str, symbol: str, quantity: int) -> bool:
+        account = self.get(user_id)
+        with account.lock:
+            return account.sell_shares(symbol, quantity)
+
+    def transfer(self, from_user: str, to_user: str, amount: float) -> bool:
+        # Move cash between two accounts atomically; both locks are taken in user-id order so
+        # opposite transfers cannot deadlock. Returns False if the source cannot cover it.
+        if amount <= 0:
+            raise ValueError('Transfer amount must be positive')
+        if from_user == to_user:
+            raise ValueError('Cannot transfer to the same account')
+        source, target = self.get(from_user), self.get(to_user)
+        first, second = (source, target) if from_user < to_user else (target, source)
+        with first.lock, second.lock:
+            if not source.withdraw(amount):
+                return False
+            target.deposit(amount)
+            return True
+
+    def summary(self, user_id: str) -> dict:
+        account = self.get(user_id)
+        with account.lock:
+            return account.get_account_summary()
+
+    def submit_many(self, operations) -> list:
+        # Run (name, *args) operations such as ('buy', 'alice', 'AAPL', 5) on the manager's thread pool.
+        # Returns results in input order; an operation that raised gives its exception instead.
+        # Note: under the GIL the pool overlaps lock waits and I/O rather than running Python in parallel.
+        operations = list(operations)
+        unknown = {operation[0] for operation in operations} - set(self.OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operation(s): {', '.join(sorted(unknown))}")
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='accounts')
+        futures = [self._executor.submit(getattr(self, name), *args) for name, *args in operations]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
 # Test basic functionality
-account = Account(user_id='user123', initial_deposit=1000.0)
-account.deposit(500.0)
-account.buy_shares('AAPL', 5)
-account.sell_shares('AAPL', 2)
-account.withdraw(200.0)
-summary = account.get_account_summary()
-transactions = account.get_transactions()
-print(summary)
-print(transactions)
\ No newline at end of file
+if __name__ == '__main__':
+    account = Account(user_id='user123', initial_deposit=1000.0)
+    account.deposit(500.0)
+    account.buy_shares('AAPL', 5)
+    account.sell_shares('AAPL', 2)
+    account.withdraw(200.0)
+    summary = account.get_account_summary()
+    transactions = account.get_transactions()
+    print(summary)
+    print(transactions)
@@ -1,48 +1,141 @@
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
 import gradio as gr
-from accounts import Account
+from accounts import Account, TransactionLedger
+from trade_import import parse_timestamp
 
-# Create a sample account for demonstration purposes
-account = Account(user_id='demo_user', initial_deposit=1000.0)
+# Serving limits: how many handlers of one event run at once, how many requests may wait in the
+# queue before new ones are turned away, and how many history exports run at once. Handlers are
+# plain functions, so Gradio runs them in its worker threads and the event loop stays free
+CONCURRENCY_LIMIT = int(os.getenv('APP_CONCURRENCY_LIMIT', '32'))
+MAX_QUEUE_SIZE = int(os.getenv('APP_MAX_QUEUE_SIZE', '1000'))
+EXPORT_CONCURRENCY_LIMIT = int(os.getenv('APP_EXPORT_CONCURRENCY_LIMIT', '4'))
 
-def create_account(initial_deposit):
-    # Create a new account with an initial deposit
-    global account
-    account = Account(user_id='demo_user', initial_deposit=float(initial_deposit))
+# Transaction history: rows per page on offer, and the table columns
+PAGE_SIZES = [25, 50, 100, 250]
+HISTORY_COLUMNS = ["Time", "Type", "Symbol", "Quantity", "Price"]
+TIMES_HELP = "Times must be epoch seconds or ISO 8601 dates."
+
+# Every browser session works on its own throwaway account, opened with this sample deposit on first
+# use and dropped, with its exports, when the session closes
+SAMPLE_DEPOSIT = 1000.0
+EXPORT_DIR = tempfile.mkdtemp(prefix='account_exports_')
+sessions = {}
+_sessions_lock = threading.Lock()
+
+def session_account(request: gr.Request):
+    # The session's account, opening a sample one on first use
+    account = sessions.get(request.session_hash)
+    if account is None:
+        with _sessions_lock:
+            account = sessions.setdefault(request.session_hash,
+                                          Account(f'session-{request.session_hash}', SAMPLE_DEPOSIT))
+    return account
+
+def close_session(request: gr.Request):
+    # Release the account and export files of a session whose browser tab has gone
+    with _sessions_lock:
+        sessions.pop(request.session_hash, None)
+    shutil.rmtree(os.path.join(EXPORT_DIR, request.session_hash), ignore_errors=True)
+
+def create_account(initial_deposit, request: gr.Request):
+    # Create a new account with an initial deposit, replacing the session's current one
+    with _sessions_lock:
+        sessions[request.session_hash] = Account(f'session-{request.session_hash}', float(initial_deposit))
     return "Account created successfully."
 
-def deposit_funds(amount):
+def deposit_funds(amount, request: gr.Request):
     # Deposit funds into the account
-    account.deposit(float(amount))
+    session_account(request).deposit(float(amount))
     return f"Deposited {amount} to account."
 
-def withdraw_funds(amount):
+def withdraw_funds(amount, request: gr.Request):
     # Withdraw funds from the account, ensuring sufficient balance
-    if account.withdraw(float(amount)):
+    if session_account(request).withdraw(float(amount)):
         return f"Withdrew {amount} from account."
     else:
         return "Insufficient funds, withdrawal failed."
 
-def buy_shares(symbol, quantity):
+def buy_shares(symbol, quantity, request: gr.Request):
     # Buy shares for a given symbol and quantity, ensuring sufficient balance
-    if account.buy_shares(symbol, int(quantity)):
+    if session_account(request).buy_shares(symbol, int(quantity)):
         return f"Bought {quantity} shares of {symbol}."
     else:
         return "Insufficient funds to buy shares."
 
-def sell_shares(symbol, quantity):
+def sell_shares(symbol, quantity, request: gr.Request):
     # Sell shares for a given symbol and quantity, ensuring sufficient holdings
-    if account.sell_shares(symbol, int(quantity)):
+    if session_account(request).sell_shares(symbol, int(quantity)):
         return f"Sold {quantity} shares of {symbol}."
     else:
         return "Insufficient shares to sell."
 
-def get_account_summary():
+def get_account_summary(request: gr.Request):
     # Get a summary of the account
-    return account.get_account_summary()
+    account = session_account(request)
+    with account.lock:
+        return account.get_account_summary()
+
+def history_filters(symbol, transaction_type, start, end):
+    # Query arguments from the history filter inputs; times are epoch seconds or ISO 8601 dates
+    return {
+        'symbol': symbol.strip().upper() or None,
+        'transaction_type': None if transaction_type == 'all' else transaction_type,
+        'start': parse_timestamp(start.strip()),
+        'end': parse_timestamp(end.strip())
+    }
+
+def load_history(symbol, transaction_type, start, end, sort, descending, page_size, cursors, request):
+    # Fetch the page that starts at cursors[-1]; only that page's rows are serialized
+    try:
+        filters = history_filters(symbol, transaction_type, start, end)
+    except ValueError:
+        return [], TIMES_HELP, cursors, None
+    page = session_account(request).query_transactions(sort=sort, descending=descending, limit=int(page_size),
+                                                       cursor=cursors[-1], **filters)
+    rows = [[datetime.fromtimestamp(row['timestamp']).strftime('%Y-%m-%d %H:%M:%S'), row['type'], row['symbol'],
+             row['quantity'], row['price']] for row in page['rows']]
+    first = (len(cursors) - 1) * int(page_size) + 1
+    status = f"Rows {first}-{first + len(rows) - 1} of {page['total']}" if rows else "No matching transactions."
+    return rows, status, cursors, page['next_cursor']
+
+def first_history_page(symbol, transaction_type, start, end, sort, descending, page_size, request: gr.Request):
+    # First page for the current filters and sort order
+    return load_history(symbol, transaction_type, start, end, sort, descending, page_size, [None], request)
 
-def get_transactions():
-    # Get a list of transactions made by the user
-    return account.get_transactions()
+def next_history_page(symbol, transaction_type, start, end, sort, descending, page_size, cursors, next_cursor,
+                      request: gr.Request):
+    # Page after the current one; stays on the last page
+    if next_cursor is not None:
+        cursors = cursors + [next_cursor]
+    return load_history(symbol, transaction_type, start, end, sort, descending, page_size, cursors, request)
+
+def previous_history_page(symbol, transaction_type, start, end, sort, descending, page_size, cursors,
+                          request: gr.Request):
+    # Page before the current one; stays on the first page
+    return load_history(symbol, transaction_type, start, end, sort, descending, page_size,
+                        cursors[:-1] or [None], request)
+
+def write_history(account, directory, filters):
+    # Stream the account's (filtered) transactions a chunk at a time to a new CSV file in `directory`, so
+    # concurrent exports never share a file
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', newline='', dir=directory, prefix='transactions-', suffix='.csv',
+                                     delete=False) as f:
+        for chunk in account.iter_transactions_csv(**filters):
+            f.write(chunk)
+    return f.name
+
+def export_history(symbol, transaction_type, start, end, request: gr.Request):
+    # Export the matching transactions as a CSV download
+    try:
+        filters = history_filters(symbol, transaction_type, start, end)
+    except ValueError:
+        raise gr.Error(TIMES_HELP)
+    return write_history(session_account(request), os.path.join(EXPORT_DIR, request.session_hash), filters)
 
 # Define the Gradio UI interface
 with gr.Blocks() as demo:
@@ -52,36 +145,70 @@ with gr.Blocks() as demo:
         initial_deposit_input = gr.Number(label="Initial Deposit")
         create_account_btn = gr.Button("Create Account")
         account_output = gr.Textbox(label="Status", interactive=False)
-        create_account_btn.click(create_account, inputs=initial_deposit_input, outputs=account_output)
+        create_account_btn.click(create_account, inputs=initial_deposit_input, outputs=account_output, api_name="create_account")
         
         deposit_input = gr.Number(label="Deposit Amount")
         deposit_btn = gr.Button("Deposit Funds")
-        deposit_btn.click(deposit_funds, inputs=deposit_input, outputs=account_output)
+        deposit_btn.click(deposit_funds, inputs=deposit_input, outputs=account_output, api_name="deposit")
         
         withdraw_input = gr.Number(label="Withdraw Amount")
         withdraw_btn = gr.Button("Withdraw Funds")
-        withdraw_btn.click(withdraw_funds, inputs=withdraw_input, outputs=account_output)
+        withdraw_btn.click(withdraw_funds, inputs=withdraw_input, outputs=account_output, api_name="withdraw")
     
     with gr.Tab("Trading"):
         symbol_input_buy = gr.Textbox(label="Share Symbol", placeholder="AAPL, TSLA, GOOGL etc.")
         quantity_input_buy = gr.Number(label="Quantity to Buy")
         buy_btn = gr.Button("Buy Shares")
         trading_output = gr.Textbox(label="Status", interactive=False)
-        buy_btn.click(buy_shares, inputs=[symbol_input_buy, quantity_input_buy], outputs=trading_output)
+        buy_btn.click(buy_shares, inputs=[symbol_input_buy, quantity_input_buy], outputs=trading_output, api_name="buy")
         
         symbol_input_sell = gr.Textbox(label="Share Symbol", placeholder="AAPL, TSLA, GOOGL etc.")
         quantity_input_sell = gr.Number(label="Quantity to Sell")
         sell_btn = gr.Button("Sell Shares")
-        sell_btn.click(sell_shares, inputs=[symbol_input_sell, quantity_input_sell], outputs=trading_output)
+        sell_btn.click(sell_shares, inputs=[symbol_input_sell, quantity_input_sell], outputs=trading_output, api_name="sell")
         
     with gr.Tab("Reports"):
         summary_btn = gr.Button("Get Account Summary")
         summary_output = gr.Textbox(placeholder="Account summary will appear here", lines=5)
-        summary_btn.click(get_account_summary, inputs=None, outputs=summary_output)
+        summary_btn.click(get_account_summary, inputs=None, outputs=summary_output, api_name="summary")
         
-        transactions_btn = gr.Button("Get Transactions")
-        transactions_output = gr.Textbox(placeholder="Transactions log will appear here", lines=5)
-        transactions_btn.click(get_transactions, inputs=None, outputs=transactions_output)
+        gr.Markdown("### Transaction History")
+        with gr.Row():
+            history_symbol = gr.Textbox(label="Symbol", placeholder="All symbols")
+            history_type = gr.Dropdown(["all", "buy", "sell"], value="all", label="Type")
+            history_start = gr.Textbox(label="From", placeholder="2024-01-31 or epoch seconds")
+            history_end = gr.Textbox(label="Until (exclusive)", placeholder="2024-02-29 or epoch seconds")
+        with gr.Row():
+            history_sort = gr.Dropdown(list(TransactionLedger.SORT_KEYS), value="timestamp", label="Sort By")
+            history_descending = gr.Checkbox(label="Newest / Largest First")
+            history_page_size = gr.Dropdown(PAGE_SIZES, value=50, label="Rows per Page")
+        with gr.Row():
+            history_btn = gr.Button("Show History")
+            previous_btn = gr.Button("Previous Page")
+            next_btn = gr.Button("Next Page")
+        history_status = gr.Markdown()
+        history_table = gr.Dataframe(headers=HISTORY_COLUMNS, interactive=False)
+        # Cursors of the visited pages (the last one is on screen) and the cursor of the next page
+        history_cursors = gr.State([None])
+        history_next = gr.State(None)
+        history_filters_inputs = [history_symbol, history_type, history_start, history_end]
+        history_inputs = history_filters_inputs + [history_sort, history_descending, history_page_size]
+        history_outputs = [history_table, history_status, history_cursors, history_next]
+        history_btn.click(first_history_page, inputs=history_inputs, outputs=history_outputs, api_name="history")
+        next_btn.click(next_history_page, inputs=history_inputs + [history_cursors, history_next], outputs=history_outputs)
+        previous_btn.click(previous_history_page, inputs=history_inputs + [history_cursors], outputs=history_outputs)
+
+        export_btn = gr.Button("Export Matching Transactions (CSV)")
+        export_output = gr.File(label="Transactions CSV")
+        export_btn.click(export_history, inputs=history_filters_inputs, outputs=export_output, api_name="export",
+                         concurrency_limit=EXPORT_CONCURRENCY_LIMIT, concurrency_id="export")
+
+    # Drop a session's account and exports when its browser tab closes
+    demo.unload(close_session)
+
+# Queue every event: at most CONCURRENCY_LIMIT handlers per event at once and MAX_QUEUE_SIZE waiting
+demo.queue(default_concurrency_limit=CONCURRENCY_LIMIT, max_size=MAX_QUEUE_SIZE)
 
 # Launch the Gradio interface
-demo.launch()
\ No newline at end of file
+if __name__ == '__main__':
+    demo.launch()
@@ -0,0 +1,190 @@
+# Order Book Module
+#
+# OrderBook keeps resting limit and stop orders for any number of accounts and fills them when a
+# price tick crosses their trigger price:
+#   - buy limits and sell stops trigger when the price falls to their price or below; they wait in
+#     a per-symbol max-heap of trigger prices. Sell limits and buy stops trigger when the price
+#     rises to their price or above; they wait in a per-symbol min-heap;
+#   - a tick pops only the orders it crosses, so it costs O(k log n) for k triggered orders out of
+#     n open ones, instead of a scan over every open order;
+#   - a triggered order fills at the tick price through Account.buy_shares/sell_shares, so the usual
+#     funds and holdings checks apply and the fill lands in the account's transactions (and journal).
+#     An order that fails them is rejected, not kept.
+# Orders only trigger on ticks, never when placed. Cancelled orders stay in their heap until a tick
+# reaches them, or until they outnumber the open ones and the symbol's heaps are rebuilt.
+import heapq
+import itertools
+import threading
+from operator import attrgetter
+
+from accounts import Account, TickRouter
+
+SIDES = ('buy', 'sell')
+KINDS = ('limit', 'stop')
+
+# Rebuild a symbol's heaps once at least this many cancelled orders outnumber its open ones
+COMPACT_MIN_STALE = 64
+
+
+class Order:
+    # One order; status goes from 'open' to 'filled', 'rejected' (failed the funds/holdings check) or 'cancelled'
+    __slots__ = ('order_id', 'account', 'side', 'kind', 'symbol', 'quantity', 'price', 'status', 'fill_price')
+
+    def __init__(self, order_id: int, account: Account, side: str, kind: str, symbol: str, quantity: int,
+                 price: float) -> None:
+        self.order_id = order_id
+        self.account = account
+        self.side = side
+        self.kind = kind
+        self.symbol = symbol
+        self.quantity = quantity
+        self.price = price
+        self.status = 'open'
+        self.fill_price = None
+
+    @property
+    def triggers_on_fall(self) -> bool:
+        # Buy limits and sell stops trigger when the price falls to their price
+        return (self.side == 'buy') == (self.kind == 'limit')
+
+    def to_dict(self) -> dict:
+        return {
+            'order_id': self.order_id,
+            'user_id': self.account.user_id,
+            'side': self.side,
+            'kind': self.kind,
+            'symbol': self.symbol,
+            'quantity': self.quantity,
+            'price': self.price,
+            'status': self.status,
+            'fill_price': self.fill_price
+        }
+
+    def __repr__(self) -> str:
+        return (f'Order({self.order_id}, {self.account.user_id!r}, {self.side} {self.quantity} {self.symbol} '
+                f'{self.kind} {self.price}, {self.status})')
+
+
+class OrderBook:
+    # Resting orders of many accounts, indexed by symbol and trigger price. Share the accounts'
+    # TickRouter so the ticks sent through tick() also revalue the accounts holding the symbol.
+    def __init__(self, tick_router: TickRouter = None) -> None:
+        self.tick_router = tick_router or TickRouter()
+        self._falling = {}  # symbol -> heap of (-price, order id, order)
+        self._rising = {}  # symbol -> heap of (price, order id, order)
+        self._orders = {}  # order id -> open order
+        self._stale = {}  # symbol -> cancelled orders still in its heaps
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def place(self, account: Account, side: str, symbol: str, quantity: int, kind: str, price: float) -> int:
+        # Rest a limit or stop order until a tick crosses `price`; returns its order id
+        if side not in SIDES:
+            raise ValueError(f'Unknown side {side!r}; expected one of {SIDES}')
+        if kind not in KINDS:
+            raise ValueError(f'Unknown order kind {kind!r}; expected one of {KINDS}')
+        if type(quantity) is not int or quantity < 1:
+            raise ValueError('quantity must be a positive integer')
+        if not price > 0:
+            raise ValueError('price must be positive')
+        with self._lock:
+            order = Order(next(self._ids), account, side, kind, symbol, quantity, price)
+            self._orders[order.order_id] = order
+            if order.triggers_on_fall:
+                heapq.heappush(self._falling.setdefault(symbol, []), (-price, order.order_id, order))
+            else:
+                heapq.heappush(self._rising.setdefault(symbol, []), (price, order.order_id, order))
+            return order.order_id
+
+    def cancel(self, order_id: int) -> bool:
+        # Cancel an open order; False if it is unknown or no longer open
+        with self._lock:
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                return False
+            order.status = 'cancelled'
+            symbol = order.symbol
+            stale = self._stale[symbol] = self._stale.get(symbol, 0) + 1
+            queued = len(self._falling.get(symbol, ())) + len(self._rising.get(symbol, ()))
+            if stale >= COMPACT_MIN_STALE and stale > queued - stale:
+                self._compact(symbol)
+            return True
+
+    def get(self, order_id: int) -> Order:
+        with self._lock:
+            try:
+                return self._orders[order_id]
+            except KeyError:
+                raise KeyError(f'No open order {order_id}') from None
+
+    def open_orders(self, account: Account = None, symbol: str = None) -> list:
+        # Open orders as dicts, oldest first, optionally only one account's or one symbol's
+        with self._lock:
+            return [order.to_dict() for order in self._orders.values()
+                    if (account is None or order.account is account) and (symbol is None or order.symbol == symbol)]
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def tick(self, symbol: str, price: float) -> list:
+        # Apply a price tick: revalue the holders through the router, then fill every order it triggers
+        # at `price`, in the order they were placed. Returns the triggered orders with their final status
+        self.tick_router.tick(symbol, price)
+        with self._lock:
+            triggered = self._pop_triggered(symbol, price)
+        for order in triggered:
+            account = order.account
+            with account.lock:
+                if order.side == 'buy':
+                    filled = account.buy_shares(symbol, order.quantity, price)
+                else:
+                    filled = account.sell_shares(symbol, order.quantity, price)
+            order.status = 'filled' if filled else 'rejected'
+            order.fill_price = price if filled else None
+        return triggered
+
+    def tick_many(self, prices: dict) -> list:
+        return [order for symbol, price in prices.items() for order in self.tick(symbol, price)]
+
+    def _pop_triggered(self, symbol: str, price: float) -> list:
+        # Remove the open orders a tick at `price` crosses from the heaps; called with the lock held
+        triggered, stale = [], 0
+        heap = self._falling.get(symbol)
+        while heap and -heap[0][0] >= price:
+            order = heapq.heappop(heap)[2]
+            if order.status == 'open':
+                triggered.append(order)
+            else:
+                stale += 1
+        heap = self._rising.get(symbol)
+        while heap and heap[0][0] <= price:
+            order = heapq.heappop(heap)[2]
+            if order.status == 'open':
+                triggered.append(order)
+            else:
+                stale += 1
+        if stale:
+            self._stale[symbol] -= stale
+        for order in triggered:
+            del self._orders[order.order_id]
+        triggered.sort(key=attrgetter('order_id'))
+        return triggered
+
+    def _compact(self, symbol: str) -> None:
+        # Drop cancelled orders from a symbol's heaps
+        for heaps in (self._falling, self._rising):
+            heap = [entry for entry in heaps.get(symbol, ()) if entry[2].status == 'open']
+            heapq.heapify(heap)
+            heaps[symbol] = heap
+        self._stale.pop(symbol, None)
+
+
+# Rest a few orders on a demo account and run some ticks through the book
+if __name__ == '__main__':
+    account = Account(user_id='user123', initial_deposit=10000.0)
+    book = OrderBook(account.tick_router)
+    book.place(account, 'buy', 'AAPL', 10, 'limit', 140.0)
+    book.place(account, 'sell', 'AAPL', 10, 'stop', 130.0)
+    for price in (150.0, 139.5, 135.0, 129.0):
+        print(price, book.tick('AAPL', price))
+    print(account.get_account_summary())
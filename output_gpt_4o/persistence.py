@@ -0,0 +1,456 @@
+# Account Persistence Module
+#
+# AccountStore keeps accounts durable across restarts:
+#   - every deposit, withdrawal, buy and sell is appended to a binary write-ahead log (WAL);
+#   - a background writer thread flushes whatever has queued up with ONE write + fsync
+#     (group commit), so callers never wait on the disk unless they ask to;
+#   - every `snapshot_every` records a snapshot of all accounts (ledger columns as raw
+#     array bytes) is written next to the log, and log segments it covers are deleted;
+#   - recovery maps the latest snapshot and replays only the log tail after it, so restart
+#     time is bounded by `snapshot_every`, not by the length of the history.
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None
+
+from accounts import Account, TickRouter
+
+OPERATIONS = ('open', 'deposit', 'withdraw', 'buy', 'sell')
+
+# Log record: frame (payload length, crc32 of payload) + payload
+# (seq, operation, quantity, amount, timestamp, user id length, symbol length, user id, symbol)
+FRAME = struct.Struct('<II')
+RECORD = struct.Struct('<QBqddHH')
+SNAPSHOT_MAGIC = b'ACCTSNP1'
+SNAPSHOT_HEADER = struct.Struct('<8sQQI')  # magic, seq, metadata length, crc32 of metadata
+
+
+class WalCorruptError(ValueError):
+    # A damaged record in the middle of the log (a torn record at the very end is expected after a crash)
+    pass
+
+
+def encode_record(seq: int, operation: str, user_id: str, symbol: str, quantity: int, amount: float,
+                  timestamp: float) -> bytes:
+    # Serialize one log record with its frame
+    user = user_id.encode('utf-8')
+    sym = symbol.encode('utf-8')
+    payload = RECORD.pack(seq, OPERATIONS.index(operation), quantity, amount, timestamp, len(user), len(sym)) + user + sym
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str):
+    # Yield (offset after the record, record tuple) for each intact record; stops at a torn or corrupt tail
+    with open(path, 'rb') as f:
+        data = f.read()
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or length < RECORD.size or zlib.crc32(payload) != crc:
+            return
+        seq, op, quantity, amount, timestamp, user_len, sym_len = RECORD.unpack_from(payload)
+        user = payload[RECORD.size:RECORD.size + user_len].decode('utf-8')
+        symbol = payload[RECORD.size + user_len:RECORD.size + user_len + sym_len].decode('utf-8')
+        offset = start + length
+        yield offset, (seq, OPERATIONS[op], user, symbol, quantity, amount, timestamp)
+
+
+def _fsync_directory(directory: str) -> None:
+    # Make renames and new files durable; not supported on every platform
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class AccountStore:
+    # Accounts backed by a write-ahead log and snapshots in `directory`.
+    # With synchronous=False (default) a change is durable within one group commit of the call returning;
+    # with synchronous=True each call waits for its commit, and concurrent callers share the fsync.
+    def __init__(self, directory: str, snapshot_every: int = 10000, synchronous: bool = False,
+                 tick_router: TickRouter = None, **account_options) -> None:
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.synchronous = synchronous
+        self.tick_router = tick_router or TickRouter()
+        self.account_options = account_options
+        self.accounts = {}
+        os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._buffer = bytearray()
+        self._buffer_first_seq = 0
+        self._seq = 0
+        self._durable_seq = 0
+        self._since_snapshot = 0
+        self._error = None
+        self._closed = False
+        self._rotate = True  # open a new segment with the next batch
+        self._segment = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_wanted = threading.Event()
+        self.stats = {'records': 0, 'commits': 0, 'snapshots': 0}
+        # One store per directory: a second writer would interleave logs and delete the other's files
+        self._lock_file = open(os.path.join(directory, 'LOCK'), 'a')
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    raise RuntimeError(f'{directory} is in use by another AccountStore') from None
+            self.recovery = self._recover()
+        except BaseException:
+            self._lock_file.close()
+            raise
+
+        self._writer = threading.Thread(target=self._write_loop, name='accounts-wal', daemon=True)
+        self._writer.start()
+        self._snapshotter = threading.Thread(target=self._snapshot_loop, name='accounts-snapshot', daemon=True)
+        self._snapshotter.start()
+
+    # ----- accounts -----
+
+    def open_account(self, user_id: str, initial_deposit: float, replace: bool = False) -> Account:
+        # Create a journaled account; with replace=True an existing account of that user is reset
+        if user_id in self.accounts and not replace:
+            raise ValueError(f'Account {user_id!r} already exists')
+        account = self._new_account(user_id, initial_deposit)
+        with account.lock:
+            self.accounts[user_id] = account
+            self.record(account, 'open', '', 0, initial_deposit, account._now())
+        return account
+
+    def get(self, user_id: str) -> Account:
+        try:
+            return self.accounts[user_id]
+        except KeyError:
+            raise KeyError(f'No account {user_id!r}') from None
+
+    def _new_account(self, user_id: str, initial_deposit: float) -> Account:
+        return Account(user_id, initial_deposit, tick_router=self.tick_router, journal=self, **self.account_options)
+
+    # ----- write-ahead log -----
+
+    def record(self, account: Account, operation: str, symbol: str, quantity: int, amount: float,
+               timestamp: float) -> int:
+        # Journal hook called by Account after a change was applied; queues the record for the
+        # next group commit and returns its sequence number
+        return self.record_many(account, [(operation, symbol, quantity, amount, timestamp)])
+
+    def record_many(self, account: Account, records: list) -> int:
+        # Journal hook for Account.apply_batch: queues (operation, symbol, quantity, amount, timestamp)
+        # records in one go and returns the last sequence number
+        with self._cond:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise RuntimeError('AccountStore is closed')
+            seq = self._seq
+            if not self._buffer:
+                self._buffer_first_seq = seq + 1
+            user_id = account.user_id
+            for operation, symbol, quantity, amount, timestamp in records:
+                seq += 1
+                self._buffer += encode_record(seq, operation, user_id, symbol, quantity, amount, timestamp)
+            self._seq = account.journal_seq = seq
+            self.stats['records'] += len(records)
+            self._since_snapshot += len(records)
+            if self._since_snapshot >= self.snapshot_every:
+                self._since_snapshot = 0
+                self._snapshot_wanted.set()
+            self._cond.notify_all()
+        if self.synchronous:
+            self.sync(seq)
+        return seq
+
+    def sync(self, seq: int = None) -> None:
+        # Block until every record up to `seq` (default: all so far) is on disk
+        with self._cond:
+            target = self._seq if seq is None else seq
+            self._cond.wait_for(lambda: self._durable_seq >= target or self._error is not None)
+            if self._error is not None:
+                raise self._error
+
+    def _write_loop(self) -> None:
+        # Group commit: take everything queued, write it and fsync once; records arriving during the
+        # fsync form the next batch, so the fsync rate stays bounded however many callers there are
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._buffer or self._closed)
+                if not self._buffer:
+                    return
+                batch, first, last = self._buffer, self._buffer_first_seq, self._seq
+                self._buffer = bytearray()
+                rotate, self._rotate = self._rotate, False
+            try:
+                if rotate:
+                    self._open_segment(first)
+                self._segment.write(batch)
+                self._segment.flush()
+                os.fsync(self._segment.fileno())
+            except OSError as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable_seq = last
+                self.stats['commits'] += 1
+                self._cond.notify_all()
+
+    def _open_segment(self, first_seq: int) -> None:
+        # Start a new log file named after the first sequence number it holds
+        if self._segment is not None:
+            self._segment.close()
+        self._segment = open(os.path.join(self.directory, f'wal-{first_seq:020d}.log'), 'ab')
+        _fsync_directory(self.directory)
+
+    def _segments(self) -> list:
+        # (first seq, path) of every log segment, oldest first
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith('wal-') and name.endswith('.log'))
+        return [(int(name[4:-4]), os.path.join(self.directory, name)) for name in names]
+
+    # ----- snapshots -----
+
+    def _snapshot_loop(self) -> None:
+        while True:
+            self._snapshot_wanted.wait()
+            self._snapshot_wanted.clear()
+            with self._cond:
+                if self._closed:
+                    return
+            try:
+                self.snapshot()
+            except OSError as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+
+    def snapshot(self) -> int:
+        # Write a snapshot of every account and drop the log segments it makes redundant; returns its seq
+        with self._snapshot_lock:
+            with self._cond:
+                # Start a fresh segment with the next batch, so older segments hold only records up to `seq`
+                seq = self._seq
+                self._rotate = True
+            parts = []
+            for account in list(self.accounts.values()):
+                with account.lock:
+                    parts.append(_account_state(account))
+            path = os.path.join(self.directory, f'snapshot-{seq:020d}.snap')
+            _write_snapshot(path, seq, parts)
+            _fsync_directory(self.directory)
+            for name in os.listdir(self.directory):
+                if name.startswith('snapshot-') and name.endswith('.snap') and name < os.path.basename(path):
+                    os.unlink(os.path.join(self.directory, name))
+            segments = self._segments()
+            for (first, segment), (next_first, _) in zip(segments, segments[1:]):
+                if next_first <= seq + 1:
+                    os.unlink(segment)
+            with self._cond:
+                self.stats['snapshots'] += 1
+            return seq
+
+    # ----- recovery -----
+
+    def _recover(self) -> dict:
+        # Load the newest readable snapshot, then replay the log records after it
+        started = time.perf_counter()
+        snapshot_seq = 0
+        for name in os.listdir(self.directory):
+            if name.endswith('.snap.tmp'):
+                # Left behind by a crash while snapshotting
+                os.unlink(os.path.join(self.directory, name))
+        snapshots = sorted((name for name in os.listdir(self.directory)
+                            if name.startswith('snapshot-') and name.endswith('.snap')), reverse=True)
+        for name in snapshots:
+            try:
+                snapshot_seq, parts = _read_snapshot(os.path.join(self.directory, name))
+            except (OSError, ValueError):
+                continue
+            for meta, columns in parts:
+                account = _restore_account(self._new_account(meta['user_id'], meta['initial_deposit']), meta, columns)
+                self.accounts[account.user_id] = account
+            break
+        self._seq = snapshot_seq
+
+        replayed = 0
+        segments = self._segments()
+        for index, (_, path) in enumerate(segments):
+            end = 0
+            for end, (seq, operation, user_id, symbol, quantity, amount, timestamp) in read_records(path):
+                self._seq = max(self._seq, seq)
+                if seq <= snapshot_seq:
+                    continue
+                account = self.accounts.get(user_id)
+                if operation == 'open':
+                    account = self.accounts[user_id] = self._new_account(user_id, amount)
+                    account._last_timestamp = timestamp
+                elif account is None or seq <= account.journal_seq:
+                    continue
+                else:
+                    account.apply(operation, symbol, quantity, amount, timestamp)
+                account.journal_seq = seq
+                replayed += 1
+            if end < os.path.getsize(path):
+                if index != len(segments) - 1:
+                    raise WalCorruptError(f'Damaged record in {path} at byte {end}')
+                # Torn write from a crash: cut the log back to the last whole record
+                with open(path, 'r+b') as f:
+                    f.truncate(end)
+        self._durable_seq = self._seq
+        return {'snapshot_seq': snapshot_seq, 'replayed': replayed, 'accounts': len(self.accounts),
+                'seconds': time.perf_counter() - started}
+
+    def close(self, snapshot: bool = True) -> None:
+        # Commit everything, optionally snapshot (so the next start replays nothing), and stop the threads
+        if self._closed:
+            return
+        if snapshot and self._error is None:
+            self.snapshot()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._snapshot_wanted.set()
+        self._writer.join()
+        self._snapshotter.join()
+        if self._segment is not None:
+            self._segment.close()
+        self._lock_file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> 'AccountStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# ----- snapshot format -----
+# header | metadata JSON (one entry per account, column offsets into the data) | raw column bytes
+
+def _account_state(account: Account):
+    # Metadata and typed columns of one account; the caller holds account.lock
+    ledger, history = account.transactions, account.history
+    columns = {
+        'type': ledger._types, 'symbol_id': ledger._symbol_ids, 'quantity': ledger._quantities,
+        'price': ledger._prices, 'timestamp': ledger._timestamps,
+        'flow_time': history._flow_times, 'flow_total': history._flow_totals
+    }
+    # Cash, marks and values are in the account's internal units (minor units with a money scale)
+    meta = {
+        'user_id': account.user_id,
+        'money_scale': account.money_scale,
+        'initial_deposit': float(account.initial_deposit),
+        'initial_units': account._initial_units,
+        'balance': account._balance,
+        'holdings': dict(account.holdings),
+        'last_timestamp': account._last_timestamp,
+        'journal_seq': account.journal_seq,
+        'marks': dict(account._marks),
+        'market_value': account._market_value,
+        'symbols': list(ledger._symbols),
+        'checkpoint_interval': history.interval,
+        'checkpoints': list(history._checkpoints),
+        'trade_cash': history._trade_cash
+    }
+    return meta, {name: column.tobytes() for name, column in columns.items()}
+
+
+def _write_snapshot(path: str, seq: int, parts: list) -> None:
+    # Write to a temporary file, fsync and rename, so a crash never leaves a half-written snapshot
+    offset = 0
+    entries = []
+    for meta, blobs in parts:
+        layout = {}
+        for name, blob in blobs.items():
+            layout[name] = [offset, len(blob)]
+            offset += len(blob)
+        entries.append(dict(meta, columns=layout))
+    metadata = json.dumps({'byteorder': sys.byteorder, 'accounts': entries}).encode('utf-8')
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, seq, len(metadata), zlib.crc32(metadata)))
+        f.write(metadata)
+        for _, blobs in parts:
+            for blob in blobs.values():
+                f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_snapshot(path: str):
+    # Map the snapshot and copy each column straight from the mapping into its array; prices and
+    # cash flows are int64 minor units for accounts with a money scale
+    typecodes = {'type': 'b', 'symbol_id': 'i', 'quantity': 'q', 'price': 'd', 'timestamp': 'd',
+                 'flow_time': 'd', 'flow_total': 'd'}
+    fixed_point = dict(typecodes, price='q', flow_total='q')
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, seq, length, crc = SNAPSHOT_HEADER.unpack_from(mapped)
+        metadata = mapped[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + length]
+        if magic != SNAPSHOT_MAGIC or zlib.crc32(metadata) != crc:
+            raise ValueError(f'{path} is not a valid snapshot')
+        metadata = json.loads(metadata)
+        data_start = SNAPSHOT_HEADER.size + length
+        parts = []
+        with memoryview(mapped) as view:
+            for meta in metadata['accounts']:
+                columns = {}
+                for name, (offset, size) in meta.pop('columns').items():
+                    column = array((fixed_point if meta.get('money_scale') else typecodes)[name])
+                    column.frombytes(view[data_start + offset:data_start + offset + size])
+                    if metadata['byteorder'] != sys.byteorder:
+                        column.byteswap()
+                    columns[name] = column
+                parts.append((meta, columns))
+    return seq, parts
+
+
+def _restore_account(account: Account, meta: dict, columns: dict) -> Account:
+    # Put a snapshotted state into a freshly created account
+    if meta.get('money_scale') != account.money_scale:
+        raise ValueError(f"Snapshot of {meta['user_id']} uses money_scale {meta.get('money_scale')}, "
+                         f'the store {account.money_scale}')
+    ledger, history = account.transactions, account.history
+    account._balance = meta['balance']
+    account._initial_units = meta.get('initial_units', account._initial_units)
+    account.holdings = meta['holdings']
+    account._last_timestamp = meta['last_timestamp']
+    account.journal_seq = meta['journal_seq']
+    ledger._types, ledger._symbol_ids = columns['type'], columns['symbol_id']
+    ledger._quantities, ledger._prices, ledger._timestamps = columns['quantity'], columns['price'], columns['timestamp']
+    ledger._symbols = [sys.intern(symbol) for symbol in meta['symbols']]
+    ledger._symbol_index = {symbol: index for index, symbol in enumerate(ledger._symbols)}
+    history.interval = meta['checkpoint_interval']
+    history._checkpoints = [(holdings, cash) for holdings, cash in meta['checkpoints']]
+    history._holdings = dict(meta['holdings'])
+    history._trade_cash = meta['trade_cash']
+    history._flow_times, history._flow_totals = columns['flow_time'], columns['flow_total']
+    # Resume tick-driven valuation from the marks the account had
+    account._marks = meta['marks']
+    account._market_value = meta['market_value']
+    for symbol, mark in account._marks.items():
+        account.tick_router.price(symbol, account.from_units(mark))
+        account.tick_router.subscribe(symbol, account)
+    return account
@@ -0,0 +1,174 @@
+# Monte Carlo Simulation Module
+#
+# Stress-tests a target-weight rebalancing strategy on many independent simulated markets:
+#   - price paths are geometric Brownian motion, generated with NumPy a whole chunk of simulations
+#     at a time ((simulations, steps + 1, symbols) arrays, no per-step Python loop);
+#   - each simulation runs a real Account: every `rebalance_every` steps the positions are moved
+#     back to the target weights through Account.apply_columns (sells first), so the usual funds
+#     and holdings rules apply; between rebalances the equity curve is one matrix product;
+#   - simulations are split into fixed-size chunks run on a process pool. A worker receives only
+#     small arrays and numbers (start prices, weights, drift, volatility, a seed) and builds its
+#     own paths and accounts, then sends back per-simulation P&L, max drawdown and final value.
+# Chunks are seeded from one SeedSequence and do not depend on the number of workers, so a run
+# gives the same results on 1 or 64 processes.
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from accounts import Account
+
+TRADING_DAYS = 252
+DEFAULT_CHUNK_SIZE = 100
+
+
+def price_paths(start_prices, steps: int, simulations: int, drift=0.05, volatility=0.2, dt: float = 1 / TRADING_DAYS,
+                rng=None):
+    # Geometric Brownian motion paths as a (simulations, steps + 1, symbols) array starting at start_prices;
+    # drift and volatility are annualised, per symbol or one for all
+    if np is None:
+        raise ImportError('Simulating price paths requires numpy')
+    start_prices = np.asarray(start_prices, dtype=np.float64)
+    drift = np.asarray(drift, dtype=np.float64)
+    volatility = np.asarray(volatility, dtype=np.float64)
+    rng = rng if rng is not None else np.random.default_rng()
+    shocks = rng.standard_normal((simulations, steps, len(start_prices)))
+    log_returns = (drift - 0.5 * volatility ** 2) * dt + volatility * np.sqrt(dt) * shocks
+    paths = np.empty((simulations, steps + 1, len(start_prices)))
+    paths[:, 0] = 0.0
+    np.cumsum(log_returns, axis=1, out=paths[:, 1:])
+    np.exp(paths, out=paths)
+    paths *= start_prices
+    return paths
+
+
+def max_drawdown(equity):
+    # Largest peak-to-trough fall of each equity curve (last axis), as a fraction of the peak
+    peaks = np.maximum.accumulate(equity, axis=-1)
+    return ((peaks - equity) / peaks).max(axis=-1)
+
+
+def simulate_account(prices, symbols, weights, initial_deposit: float, rebalance_every: int, money_scale: int = None):
+    # Run one account over a (steps + 1, symbols) price path; returns its equity curve and trade count
+    account = Account('simulation', initial_deposit, clock=lambda: 0.0, money_scale=money_scale)
+    held = np.zeros(len(symbols), dtype=np.int64)
+    equity = np.empty(len(prices))
+    for start in range(0, len(prices), rebalance_every):
+        row = prices[start]
+        target = np.floor(weights * (account.balance + held @ row) / row).astype(np.int64)
+        delta = target - held
+        order = np.argsort(delta, kind='stable')
+        order = order[delta[order] != 0]
+        if len(order):
+            account.apply_columns(np.where(delta[order] > 0, 'buy', 'sell'), symbols[order], np.abs(delta[order]),
+                                  row[order], np.full(len(order), float(start)))
+            held = np.array([account.holdings.get(symbol, 0) for symbol in symbols], dtype=np.int64)
+        segment = prices[start:start + rebalance_every]
+        equity[start:start + len(segment)] = account.balance + segment @ held
+    return equity, len(account.transactions)
+
+
+def simulate_chunk(seed, simulations: int, start_prices, symbols, weights, steps: int, drift, volatility,
+                   initial_deposit: float, rebalance_every: int, money_scale: int = None) -> dict:
+    # Worker entry point: build `simulations` paths from `seed` and run one account on each
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    paths = price_paths(start_prices, steps, simulations, drift, volatility, rng=rng)
+    symbols = np.asarray(symbols)
+    weights = np.asarray(weights, dtype=np.float64)
+    equity = np.empty((simulations, steps + 1))
+    trades = 0
+    for i in range(simulations):
+        equity[i], count = simulate_account(paths[i], symbols, weights, initial_deposit, rebalance_every, money_scale)
+        trades += count
+    return {
+        'pnl': equity[:, -1] - initial_deposit,
+        'max_drawdown': max_drawdown(equity),
+        'final_value': equity[:, -1],
+        'trades': trades,
+        'pid': os.getpid(),
+        'seconds': time.perf_counter() - started
+    }
+
+
+def summarize(pnl, drawdowns) -> dict:
+    # Distribution statistics of the simulated P&L and drawdowns
+    p5, p50, p95 = np.percentile(pnl, [5, 50, 95])
+    return {
+        'mean_pnl': float(pnl.mean()),
+        'std_pnl': float(pnl.std()),
+        'pnl_p5': float(p5),
+        'pnl_median': float(p50),
+        'pnl_p95': float(p95),
+        'value_at_risk_95': float(max(-p5, 0.0)),
+        'probability_of_loss': float((pnl < 0).mean()),
+        'mean_max_drawdown': float(drawdowns.mean()),
+        'worst_max_drawdown': float(drawdowns.max())
+    }
+
+
+def run_simulation(symbols, start_prices, weights, simulations: int = 1000, steps: int = TRADING_DAYS, drift=0.05,
+                   volatility=0.2, initial_deposit: float = 100000.0, rebalance_every: int = 21, workers: int = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = None, money_scale: int = None) -> dict:
+    # Simulate `simulations` accounts rebalancing to `weights` (fractions of equity per symbol, summing
+    # to at most 1) over `steps` days. workers=1 runs in this process; otherwise chunks go to a
+    # ProcessPoolExecutor with `workers` processes (default: one per CPU). Returns
+    # {'pnl', 'max_drawdown', 'final_value': arrays in simulation order, 'summary': statistics,
+    #  'workers': [{'pid', 'chunks', 'simulations', 'seconds'}], 'seconds': wall time, 'trades': count}
+    if np is None:
+        raise ImportError('Monte Carlo simulation requires numpy')
+    weights = np.asarray(weights, dtype=np.float64)
+    start_prices = np.asarray(start_prices, dtype=np.float64)
+    if not len(symbols) == len(start_prices) == len(weights):
+        raise ValueError('symbols, start_prices and weights must have the same length')
+    if (weights < 0).any() or weights.sum() > 1 + 1e-9:
+        raise ValueError('weights must be non-negative and sum to at most 1')
+    if (start_prices <= 0).any():
+        raise ValueError('start prices must be positive')
+    if simulations < 1 or steps < 1 or rebalance_every < 1 or chunk_size < 1:
+        raise ValueError('simulations, steps, rebalance_every and chunk_size must be at least 1')
+
+    sizes = [min(chunk_size, simulations - start) for start in range(0, simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    shared = (start_prices, tuple(symbols), weights, steps, drift, volatility, initial_deposit, rebalance_every,
+              money_scale)
+    started = time.perf_counter()
+    if workers == 1:
+        chunks = [simulate_chunk(chunk_seed, size, *shared) for chunk_seed, size in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(simulate_chunk, chunk_seed, size, *shared) for chunk_seed, size in zip(seeds, sizes)]
+            chunks = [future.result() for future in futures]
+    seconds = time.perf_counter() - started
+
+    per_worker = {}
+    for chunk, size in zip(chunks, sizes):
+        stats = per_worker.setdefault(chunk['pid'], {'pid': chunk['pid'], 'chunks': 0, 'simulations': 0, 'seconds': 0.0})
+        stats['chunks'] += 1
+        stats['simulations'] += size
+        stats['seconds'] += chunk['seconds']
+    pnl = np.concatenate([chunk['pnl'] for chunk in chunks])
+    drawdowns = np.concatenate([chunk['max_drawdown'] for chunk in chunks])
+    return {
+        'pnl': pnl,
+        'max_drawdown': drawdowns,
+        'final_value': np.concatenate([chunk['final_value'] for chunk in chunks]),
+        'summary': summarize(pnl, drawdowns),
+        'workers': list(per_worker.values()),
+        'seconds': seconds,
+        'trades': sum(chunk['trades'] for chunk in chunks)
+    }
+
+
+# Simulate a 60/30 AAPL/TSLA portfolio: python simulation.py [simulations] [workers]
+if __name__ == '__main__':
+    result = run_simulation(['AAPL', 'TSLA'], [150.0, 600.0], [0.6, 0.3], drift=[0.08, 0.12], volatility=[0.25, 0.6],
+                            simulations=int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+                            workers=int(sys.argv[2]) if len(sys.argv) > 2 else None, seed=1)
+    print(result['summary'])
+    print(f"{len(result['pnl'])} simulations in {result['seconds']:.2f} s on {len(result['workers'])} worker(s)")
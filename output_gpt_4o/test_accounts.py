@@ -1,5 +1,9 @@
+import time
 import unittest
-from accounts import Account
+import threading
+import accounts
+from accounts import (Account, AccountManager, CachedPriceProvider, PriceProvider, StaticPriceProvider, TickRouter, TransactionLedger,
+                      holdings_value)
 
 class TestAccount(unittest.TestCase):
     # Test account initialization
@@ -107,5 +111,584 @@ class TestAccount(unittest.TestCase):
         self.assertEqual(summary['balance'], account.balance)
         self.assertEqual(summary['holdings']['AAPL'], 1)
 
+    # Test threads hammering one account never overdraw it or oversell a holding
+    def test_concurrent_trades_on_one_account(self):
+        class SlowJournal:
+            # Holds the account lock a little while recording, so racing threads pile up behind it
+            def record(self, *args):
+                time.sleep(0.0005)
+        account = Account('user123', 1000.0, journal=SlowJournal())
+        start, errors = threading.Barrier(8), []
+        def hammer():
+            start.wait()
+            try:
+                for _ in range(20):
+                    account.withdraw(400.0)
+                    account.buy_shares('AAPL', 2)
+                    account.sell_shares('AAPL', 2)
+                    account.deposit(100.0)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=hammer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertGreaterEqual(account.balance, 0.0)
+        self.assertGreaterEqual(account.holdings.get('AAPL', 0), 0)
+        transactions = account.get_transactions()
+        bought = sum(t['quantity'] for t in transactions if t['type'] == 'buy')
+        sold = sum(t['quantity'] for t in transactions if t['type'] == 'sell')
+        self.assertEqual(account.holdings.get('AAPL', 0), bought - sold)
+
+class TestPointInTime(unittest.TestCase):
+    # Account whose clock returns 1, 2, 3, ... so every operation has a known timestamp
+    def make_account(self, checkpoint_interval=2):
+        ticks = iter(range(1, 1000))
+        return Account('user123', 10000.0, clock=lambda: float(next(ticks)), checkpoint_interval=checkpoint_interval)
+
+    # Test holdings at points before, between and after trades
+    def test_holdings_at(self):
+        account = self.make_account()
+        account.buy_shares('AAPL', 5)    # t=1
+        account.buy_shares('TSLA', 2)    # t=2
+        account.sell_shares('AAPL', 5)   # t=3
+        account.buy_shares('AAPL', 1)    # t=4
+        account.sell_shares('TSLA', 1)   # t=5
+        self.assertEqual(account.holdings_at(0.5), {})
+        self.assertEqual(account.holdings_at(1), {'AAPL': 5})
+        self.assertEqual(account.holdings_at(3.5), {'TSLA': 2})
+        self.assertEqual(account.holdings_at(100), account.get_holdings())
+
+    # Test cash and profit/loss include deposits and withdrawals made before the point in time
+    def test_cash_and_profit_or_loss_at(self):
+        account = self.make_account()
+        account.deposit(500.0)           # t=1
+        account.buy_shares('AAPL', 10)   # t=2
+        account.withdraw(100.0)          # t=3
+        self.assertEqual(account.cash_at(1), 10500.0)
+        self.assertEqual(account.cash_at(2), 9000.0)
+        self.assertEqual(account.cash_at(3), account.balance)
+        self.assertEqual(account.profit_or_loss_at(2), 500.0)
+        self.assertEqual(account.profit_or_loss_at(2, prices={'AAPL': 160.0}), 600.0)
+        self.assertEqual(account.profit_or_loss_at(10), account.get_profit_or_loss())
+
+    # Test answers do not depend on the checkpoint interval
+    def test_checkpoint_interval(self):
+        results = []
+        for interval in (1, 3, 1000):
+            account = self.make_account(checkpoint_interval=interval)
+            for i in range(20):
+                if i % 3:
+                    account.buy_shares('AAPL', 1)
+                else:
+                    account.sell_shares('AAPL', 1)
+            results.append([account.holdings_at(t) for t in range(0, 22)])
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+class CountingPriceProvider(PriceProvider):
+    # Price source that records every bulk call it receives
+    def __init__(self, prices, delay=None):
+        self.prices = prices
+        self.calls = []
+        self.delay = delay
+
+    def get_prices(self, symbols):
+        self.calls.append(list(symbols))
+        if self.delay is not None:
+            self.delay.wait(1)
+        return {symbol: self.prices[symbol] for symbol in symbols}
+
+class TestPriceProviders(unittest.TestCase):
+    # Test the static provider answers like get_share_price
+    def test_static_provider(self):
+        provider = StaticPriceProvider(Account.get_share_price)
+        self.assertEqual(provider.get_prices(['AAPL', 'TSLA']), {'AAPL': 150.0, 'TSLA': 600.0})
+        self.assertEqual(provider.get_price('GOOGL'), 2800.0)
+
+    # Test a summary needs no price lookups and a refresh costs one bulk lookup per held symbol
+    def test_summary_and_refresh_lookups(self):
+        source = CountingPriceProvider({'AAPL': 150.0, 'TSLA': 600.0})
+        account = Account('user123', 10000.0, price_provider=source)
+        account.buy_shares('AAPL', 2)
+        account.buy_shares('TSLA', 1)
+        source.calls.clear()
+        summary = account.get_account_summary()
+        self.assertEqual(source.calls, [])
+        self.assertEqual(summary['portfolio_value'], 10000.0)
+        self.assertEqual(summary['profit_or_loss'], 0.0)
+        source.prices['AAPL'] = 160.0
+        account.refresh_prices()
+        self.assertEqual(source.calls, [['AAPL', 'TSLA']])
+        self.assertEqual(account.get_profit_or_loss(), 20.0)
+
+    # Test cached prices expire after the TTL and the cache keeps at most max_size symbols
+    def test_cache_ttl_and_lru(self):
+        now = [0.0]
+        source = CountingPriceProvider({'AAPL': 150.0, 'TSLA': 600.0, 'GOOGL': 2800.0})
+        cached = CachedPriceProvider(source, ttl=5.0, max_size=2, clock=lambda: now[0])
+        cached.get_prices(['AAPL', 'TSLA'])
+        cached.get_prices(['AAPL', 'TSLA'])
+        self.assertEqual(source.calls, [['AAPL', 'TSLA']])
+        cached.get_prices(['GOOGL'])       # evicts the least recently used symbol
+        cached.get_prices(['TSLA'])
+        self.assertEqual(source.calls[-1], ['GOOGL'])
+        cached.get_prices(['AAPL'])
+        self.assertEqual(source.calls[-1], ['AAPL'])
+        now[0] = 10.0
+        cached.get_prices(['AAPL'])
+        self.assertEqual(source.calls[-1], ['AAPL'])
+
+    # Test concurrent requests for a symbol being fetched share that fetch
+    def test_requests_are_coalesced(self):
+        release = threading.Event()
+        source = CountingPriceProvider({'AAPL': 150.0}, delay=release)
+        cached = CachedPriceProvider(source, ttl=60.0)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cached.get_price('AAPL'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [150.0] * 5)
+        self.assertEqual(len(source.calls), 1)
+
+    # Test a source that omits a symbol is reported by name, and the symbols it did answer are cached
+    def test_source_omits_symbol(self):
+        class PartialPriceProvider(CountingPriceProvider):
+            def get_prices(self, symbols):
+                return super().get_prices([symbol for symbol in symbols if symbol in self.prices])
+        cached = CachedPriceProvider(PartialPriceProvider({'AAPL': 150.0}), ttl=60.0)
+        with self.assertRaisesRegex(ValueError, 'No price for XYZ'):
+            cached.get_prices(['AAPL', 'XYZ'])
+        with self.assertRaisesRegex(ValueError, 'No price for XYZ'):
+            cached.get_price('XYZ')
+        self.assertEqual(cached.get_prices(['AAPL']), {'AAPL': 150.0})
+        self.assertEqual(cached.fetches, 2)
+
+    # Test the vectorized and plain valuations agree
+    def test_holdings_value(self):
+        holdings = {f'S{i}': i for i in range(100)}
+        prices = {f'S{i}': 1.5 for i in range(100)}
+        self.assertEqual(holdings_value(holdings, prices), 1.5 * sum(range(100)))
+        self.assertEqual(holdings_value({}, {}), 0.0)
+
+class TestTickValuation(unittest.TestCase):
+    # Test trades and ticks keep the running value equal to a full recomputation
+    def test_ticks_update_value(self):
+        router = TickRouter()
+        account = Account('user123', 10000.0, tick_router=router)
+        account.buy_shares('AAPL', 10)
+        account.buy_shares('TSLA', 2)
+        router.tick('AAPL', 155.0)
+        router.tick('TSLA', 590.0)
+        account.sell_shares('AAPL', 4)
+        expected = account.balance + 6 * 155.0 + 2 * 590.0
+        self.assertAlmostEqual(account.get_portfolio_value(), expected)
+        self.assertAlmostEqual(account.get_profit_or_loss(), expected - 10000.0)
+        self.assertAlmostEqual(account.revalue(), 6 * 155.0 + 2 * 590.0)
+
+    # Test a tick only reaches accounts holding the symbol, and selling out unsubscribes
+    def test_tick_fans_out_to_holders_only(self):
+        router = TickRouter()
+        holders = [Account(f'user{i}', 10000.0, tick_router=router) for i in range(3)]
+        other = Account('other', 10000.0, tick_router=router)
+        for account in holders:
+            account.buy_shares('AAPL', 1)
+        other.buy_shares('TSLA', 1)
+        self.assertEqual(router.tick('AAPL', 151.0), 3)
+        holders[0].sell_shares('AAPL', 1)
+        self.assertEqual(router.tick('AAPL', 152.0), 2)
+        self.assertEqual(other.get_portfolio_value(), 10000.0)
+        self.assertEqual(holders[0].get_portfolio_value(), holders[0].balance)
+
+    # Test a new position is valued at the symbol's last tick, not the trade price
+    def test_new_position_uses_last_tick(self):
+        router = TickRouter()
+        router.tick('AAPL', 170.0)
+        account = Account('user123', 1000.0, tick_router=router)
+        account.buy_shares('AAPL', 1)
+        self.assertEqual(account.get_portfolio_value(), 850.0 + 170.0)
+
+class TestAccountManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = AccountManager(shards=4, max_workers=8)
+        self.addCleanup(self.manager.shutdown)
+
+    # Test opening, looking up and rejecting duplicate accounts
+    def test_open_and_get(self):
+        account = self.manager.open_account('alice', 1000.0)
+        self.assertIs(self.manager.get('alice'), account)
+        self.assertIn('alice', self.manager)
+        self.assertEqual(len(self.manager), 1)
+        with self.assertRaises(ValueError):
+            self.manager.open_account('alice', 5.0)
+        with self.assertRaises(KeyError):
+            self.manager.get('bob')
+
+    # Test transfers move cash only when the source can cover them
+    def test_transfer(self):
+        self.manager.open_account('alice', 1000.0)
+        self.manager.open_account('bob', 0.0)
+        self.assertTrue(self.manager.transfer('alice', 'bob', 400.0))
+        self.assertFalse(self.manager.transfer('bob', 'alice', 500.0))
+        self.assertEqual(self.manager.get('alice').balance, 600.0)
+        self.assertEqual(self.manager.get('bob').balance, 400.0)
+        with self.assertRaises(ValueError):
+            self.manager.transfer('alice', 'bob', -1.0)
+
+    # Test concurrent trades and transfers keep balances non-negative, holdings consistent and cash conserved
+    def test_concurrent_operations_keep_invariants(self):
+        users = ['u0', 'u1', 'u2']
+        for user in users:
+            self.manager.open_account(user, 1500.0)
+        operations = []
+        for i in range(600):
+            user, other = users[i % 3], users[(i + 1) % 3]
+            operations.append(('buy', user, 'AAPL', 3))
+            operations.append(('sell', user, 'AAPL', 4))
+            operations.append(('transfer', user, other, 200.0))
+        results = self.manager.submit_many(operations)
+        self.assertFalse([r for r in results if isinstance(r, Exception)])
+        total_cash = 0.0
+        for user in users:
+            account = self.manager.get(user)
+            self.assertGreaterEqual(account.balance, 0.0)
+            bought = sum(t['quantity'] for t in account.get_transactions() if t['type'] == 'buy')
+            sold = sum(t['quantity'] for t in account.get_transactions() if t['type'] == 'sell')
+            self.assertEqual(account.holdings.get('AAPL', 0), bought - sold)
+            total_cash += account.balance + 150.0 * (bought - sold)
+        self.assertAlmostEqual(total_cash, 4500.0)
+
+    # Test submit_many keeps input order and reports failures in place
+    def test_submit_many_results(self):
+        self.manager.open_account('alice', 100.0)
+        results = self.manager.submit_many([('withdraw', 'alice', 50.0), ('withdraw', 'nobody', 1.0), ('deposit', 'alice', 5.0)])
+        self.assertTrue(results[0])
+        self.assertIsInstance(results[1], KeyError)
+        self.assertTrue(results[2])
+        with self.assertRaises(ValueError):
+            self.manager.submit_many([('shutdown',)])
+
+class TestTransactionLedger(unittest.TestCase):
+    # Test rows round-trip through the typed columns
+    def test_append_and_row(self):
+        ledger = TransactionLedger()
+        ledger.append('buy', 'AAPL', 5, 150.0, 1.0)
+        ledger.append('sell', 'AAPL', 2, 155.5, 2.0)
+        self.assertEqual(len(ledger), 2)
+        self.assertEqual(ledger[1], {'type': 'sell', 'symbol': 'AAPL', 'quantity': 2, 'price': 155.5, 'timestamp': 2.0})
+        self.assertEqual(ledger[-1]['type'], 'sell')
+        self.assertEqual(list(ledger.column('symbol_id')), [0, 0])
+
+    # Test views are fixed to the rows that existed when they were taken
+    def test_view_is_stable_after_append(self):
+        ledger = TransactionLedger()
+        ledger.append('buy', 'AAPL', 1, 150.0, 1.0)
+        view = ledger.view()
+        ledger.append('buy', 'TSLA', 1, 600.0, 2.0)
+        self.assertEqual(len(view), 1)
+        self.assertEqual(len(ledger[0:]), 2)
+        self.assertEqual(ledger[1:][0]['symbol'], 'TSLA')
+        self.assertFalse(hasattr(view, 'append'))
+
+    # Test the ledger compares equal to the equivalent list of dicts
+    def test_equals_list(self):
+        account = Account('user123', 1000.0)
+        account.buy_shares('AAPL', 1)
+        self.assertEqual(account.transactions, list(account.get_transactions()))
+        self.assertNotEqual(account.transactions, [])
+
+    # Test NumPy export when NumPy is installed
+    def test_to_numpy(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest('numpy not installed')
+        ledger = TransactionLedger()
+        ledger.append('buy', 'AAPL', 3, 150.0, 1.0)
+        ledger.append('buy', 'TSLA', 1, 600.0, 2.0)
+        columns = ledger.to_numpy()
+        self.assertEqual(list(columns['symbol']), ['AAPL', 'TSLA'])
+        self.assertEqual(float((columns['quantity'] * columns['price']).sum()), 1050.0)
+        ledger.append('sell', 'AAPL', 1, 150.0, 3.0)
+        self.assertEqual(len(ledger), 3)
+
+class TestTransactionQuery(unittest.TestCase):
+    def setUp(self):
+        self.ledger = TransactionLedger()
+        for i in range(40):
+            self.ledger.append('sell' if i % 4 == 3 else 'buy', ['TSLA', 'AAPL', 'GOOGL'][i % 3], i % 7 + 1,
+                               100.0 + i % 5, float(i))
+
+    def pages(self, **options):
+        # Follow next_cursor through every page
+        rows, cursor = [], None
+        while True:
+            page = self.ledger.query(cursor=cursor, **options)
+            rows += page['rows']
+            cursor = page['next_cursor']
+            if cursor is None:
+                return rows
+
+    # Test filters combine and the total counts every match, not just the page
+    def test_filters(self):
+        page = self.ledger.query(symbol='AAPL', transaction_type='buy', start=10.0, end=30.0, limit=3)
+        expected = [row for row in self.ledger if row['symbol'] == 'AAPL' and row['type'] == 'buy'
+                    and 10.0 <= row['timestamp'] < 30.0]
+        self.assertEqual(page['total'], len(expected))
+        self.assertEqual(page['rows'], expected[:3])
+        self.assertEqual(self.ledger.query(symbol='MSFT')['total'], 0)
+        with self.assertRaises(ValueError):
+            self.ledger.query(transaction_type='hold')
+
+    # Test cursor and offset paging both walk every row once, in sort order
+    def test_paging_and_sort(self):
+        for sort in TransactionLedger.SORT_KEYS:
+            for descending in (False, True):
+                rows = self.pages(sort=sort, descending=descending, limit=6)
+                key = (lambda row: row[sort]) if sort != 'type' else (lambda row: row['type'] == 'sell')
+                self.assertEqual([row[sort] for row in rows],
+                                 [row[sort] for row in sorted(self.ledger, key=key, reverse=descending)])
+                self.assertEqual(len(rows), 40)
+        by_offset = [row for offset in range(0, 40, 6) for row in self.ledger.query(sort='price', limit=6, offset=offset)['rows']]
+        self.assertEqual(by_offset, self.pages(sort='price', limit=6))
+        with self.assertRaises(ValueError):
+            self.ledger.query(offset=6, cursor=5)
+
+    # Test a cursor keeps its place while new transactions are appended
+    def test_cursor_is_stable(self):
+        first = self.ledger.query(limit=10)
+        self.ledger.append('buy', 'AAPL', 1, 1.0, 40.0)
+        second = self.ledger.query(limit=10, cursor=first['next_cursor'])
+        self.assertEqual(second['rows'][0]['timestamp'], 10.0)
+        self.assertEqual(second['total'], 41)
+
+    # Test the pure-Python fallback gives the same pages as NumPy
+    def test_without_numpy(self):
+        options = dict(symbol='TSLA', sort='price', descending=True, limit=4)
+        with_numpy = self.pages(**options)
+        saved, accounts.np = accounts.np, None
+        try:
+            self.assertEqual(self.pages(**options), with_numpy)
+        finally:
+            accounts.np = saved
+
+    # Test ties keep ledger order in both directions, with and without NumPy, across cursor pages
+    def test_ties_keep_ledger_order(self):
+        saved = accounts.np
+        try:
+            for numpy_module in (saved, None):
+                accounts.np = numpy_module
+                for sort in TransactionLedger.SORT_KEYS:
+                    for descending in (False, True):
+                        # sorted() with reverse=True is stable too: equal values stay in ledger order
+                        expected = sorted(self.ledger, reverse=descending,
+                                          key=(lambda row: row[sort]) if sort != 'type' else (lambda row: row['type'] == 'sell'))
+                        self.assertEqual(self.pages(sort=sort, descending=descending, limit=5), expected)
+                        self.assertEqual(self.ledger.query(sort=sort, descending=descending, limit=3)['rows'], expected[:3])
+        finally:
+            accounts.np = saved
+
+    # Test the CSV export streams the filtered rows in chunks
+    def test_iter_csv(self):
+        account = Account('user123', 10000.0, clock=lambda: 5.0)
+        for _ in range(5):
+            account.buy_shares('AAPL', 1)
+        account.buy_shares('TSLA', 1)
+        chunks = list(account.iter_transactions_csv(symbol='AAPL', chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        lines = ''.join(chunks).splitlines()
+        self.assertEqual(lines[0], 'timestamp,type,symbol,quantity,price')
+        self.assertEqual(lines[1:], ['5.0,buy,AAPL,1,150.0'] * 5)
+        self.assertEqual(list(account.iter_transactions_csv(symbol='MSFT')), ['timestamp,type,symbol,quantity,price\r\n'])
+
+class TestLedgerIndex(unittest.TestCase):
+    # Test symbol and time-range lookups match a scan, and keep up with later trades
+    def test_transactions_for(self):
+        times = iter(range(1000))
+        account = Account('user123', 100000.0, clock=lambda: float(next(times)))
+        for i in range(60):
+            account.buy_shares(['AAPL', 'TSLA', 'GOOGL'][i % 3], i % 4 + 1)
+        scan = lambda symbol, start, end: [row for row in account.get_transactions() if symbol in (None, row['symbol'])
+                                           and start <= row['timestamp'] < end]
+        self.assertEqual(account.transactions_for('TSLA', 10.0, 40.0), scan('TSLA', 10.0, 40.0))
+        self.assertEqual(account.transactions_for(None, 55.0, 200.0), scan(None, 55.0, 200.0))
+        self.assertEqual(account.transactions_for('AAPL'), scan('AAPL', 0.0, 1000.0))
+        self.assertEqual(account.transactions_for('MSFT'), [])
+        account.buy_shares('TSLA', 2)
+        self.assertEqual(account.transactions_for('TSLA', 50.0), scan('TSLA', 50.0, 1000.0))
+
+    # Test average-cost basis and realized profit/loss, with and without fixed-point money
+    def test_cost_basis(self):
+        for money_scale in (None, 100):
+            account = Account('user123', 10000.0, money_scale=money_scale)
+            account.buy_shares('AAPL', 10, 100.0)
+            account.buy_shares('AAPL', 10, 110.0)
+            account.sell_shares('AAPL', 5, 120.0)
+            self.assertEqual(account.cost_basis('AAPL'), {'symbol': 'AAPL', 'quantity': 15, 'cost_basis': 1575.0,
+                                                          'average_cost': 105.0, 'realized_pnl': 75.0})
+            account.buy_shares('TSLA', 3, 10.0)
+            account.sell_shares('TSLA', 3, 9.0)
+            account.sell_shares('AAPL', 15, 100.0)
+            self.assertEqual(account.cost_basis('AAPL')['cost_basis'], 0.0)
+            self.assertEqual(account.cost_basis('AAPL')['realized_pnl'], 0.0)
+            self.assertEqual(account.realized_pnl('TSLA'), -3.0)
+            self.assertEqual(account.realized_pnl(), -3.0)
+            self.assertEqual(account.cost_basis('MSFT')['quantity'], 0)
+
+    # Test a batch indexed in bulk matches the per-row path, and an out-of-order ledger still filters correctly
+    def test_bulk_and_unordered(self):
+        account = Account('user123', 10 ** 7, clock=lambda: 1.0)
+        symbols = ['AAPL', 'TSLA', 'GOOGL']
+        account.apply_columns(['buy'] * 2000, [symbols[i % 7 % 3] for i in range(2000)], [1] * 2000,
+                              timestamps=[float(i // 10) for i in range(2000)])
+        ledger = account.transactions
+        with_numpy = list(ledger.index.positions('TSLA', 20.0, 150.0))
+        self.assertEqual(with_numpy, [i for i in range(200, 1500) if symbols[i % 7 % 3] == 'TSLA'])
+        saved, accounts.np = accounts.np, None
+        try:
+            ledger.index = accounts.LedgerIndex(ledger)
+            self.assertEqual(list(ledger.index.positions('TSLA', 20.0, 150.0)), with_numpy)
+        finally:
+            accounts.np = saved
+        unordered = TransactionLedger()
+        for t in (5.0, 1.0, 3.0, 2.0):
+            unordered.append('buy', 'AAPL', 1, 1.0, t)
+        self.assertEqual(list(unordered.index.positions('AAPL', 2.0, 5.0)), [2, 3])
+        self.assertFalse(unordered.index.time_ordered)
+        self.assertEqual(list(unordered.select(start=2.0, end=5.0)), [2, 3])
+
+class TestApplyBatch(unittest.TestCase):
+    # Mixed trades, some of which the per-call methods refuse
+    def trades(self, count):
+        symbols = ['AAPL', 'TSLA', 'GOOGL']
+        return [('buy' if i % 3 else 'sell', symbols[i % 5 % 3], i % 4 + 1, None, None) for i in range(count)]
+
+    def per_call(self, trades):
+        account = Account('user123', 20000.0, clock=lambda: 1.0, checkpoint_interval=7)
+        for kind, symbol, quantity, _, _ in trades:
+            (account.buy_shares if kind == 'buy' else account.sell_shares)(symbol, quantity)
+        return account
+
+    def assertSameAccount(self, expected, actual):
+        self.assertEqual(actual.balance, expected.balance)
+        self.assertEqual(actual.get_holdings(), expected.get_holdings())
+        self.assertEqual(actual.transactions, expected.transactions)
+        self.assertAlmostEqual(actual.get_portfolio_value(), expected.get_portfolio_value())
+        for t in (0.5, 1.0):
+            self.assertEqual(actual.holdings_at(t), expected.holdings_at(t))
+
+    # Test a batch gives the same account as calling buy_shares/sell_shares row by row
+    def test_matches_per_call(self):
+        trades = self.trades(3000)
+        expected = self.per_call(trades)
+        account = Account('user123', 20000.0, clock=lambda: 1.0, checkpoint_interval=7)
+        result = account.apply_batch(trades)
+        self.assertEqual(result['accepted'], len(expected.transactions))
+        self.assertEqual(result['accepted'] + len(result['rejected']), len(trades))
+        self.assertSameAccount(expected, account)
+
+    # Test NumPy columns take the vectorized path with the same outcome
+    def test_numpy_columns(self):
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest('numpy not installed')
+        trades = self.trades(3000)
+        expected = self.per_call(trades)
+        account = Account('user123', 20000.0, clock=lambda: 1.0, checkpoint_interval=7)
+        types, symbols, quantities, _, _ = zip(*trades)
+        result = account.apply_columns(np.array(types), np.array(symbols), np.array(quantities))
+        self.assertEqual(result['accepted'], len(expected.transactions))
+        self.assertSameAccount(expected, account)
+
+    # Test bad rows are skipped with a reason and the rest are applied in order
+    def test_rejected_rows(self):
+        account = Account('user123', 1000.0, clock=lambda: 5.0, price_provider=StaticPriceProvider({'AAPL': 150.0}.get))
+        result = account.apply_batch([
+            ('buy', 'AAPL', 2, 100.0, 1.0),
+            ('hold', 'AAPL', 1, 100.0, 2.0),
+            ('buy', 'AAPL', 0, 100.0, 2.0),
+            ('buy', 'AAPL', 1, -1.0, 2.0),
+            ('buy', 'NOPE', 1, None, 2.0),
+            ('sell', 'AAPL', 3, 100.0, 3.0),
+            ('buy', 'TSLA', 2, 600.0, 3.0),
+            ('sell', 'AAPL', 1, 110.0, None),
+            ('buy',),
+        ])
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual(result['rejected'], [(1, "unknown type 'hold'"), (2, 'quantity must be a positive integer'),
+                                              (3, 'price must be a non-negative number'), (4, 'no price for NOPE'),
+                                              (5, 'insufficient shares'), (6, 'insufficient funds'),
+                                              (8, 'malformed row')])
+        self.assertEqual(account.balance, 910.0)
+        self.assertEqual(account.get_holdings(), {'AAPL': 1})
+        self.assertEqual([row['timestamp'] for row in account.get_transactions()], [1.0, 5.0])
+        with self.assertRaises(ValueError):
+            account.apply_columns(['buy'], ['AAPL'], [1, 2])
+
+class TestFixedPoint(unittest.TestCase):
+    # Test integer minor units keep checks exact where float balances drift
+    def test_no_drift(self):
+        drifting = Account('float', 0.0)
+        exact = Account('cents', 0.0, money_scale=100)
+        for account in (drifting, exact):
+            for _ in range(10):
+                account.deposit(0.1)
+        self.assertFalse(drifting.withdraw(1.0))
+        self.assertTrue(exact.withdraw(1.0))
+        self.assertEqual(exact.balance, 0.0)
+        with self.assertRaises(ValueError):
+            Account('bad', 0.0, money_scale=2.5)
+
+    # Test trades, ticks, valuation and history in minor units
+    def test_trades_and_valuation(self):
+        router = TickRouter()
+        account = Account('cents', 0.3, clock=lambda: 1.0, money_scale=100, tick_router=router,
+                          price_provider=StaticPriceProvider(lambda symbol: 0.1))
+        self.assertTrue(account.buy_shares('PENNY', 3))  # 3 x 0.1 is 0.30000000000000004 as floats
+        self.assertEqual(account.balance, 0.0)
+        self.assertEqual(account._balance, 0)
+        self.assertEqual(account.transactions.column('price').tolist(), [10])
+        self.assertEqual(account.get_transactions()[0]['price'], 0.1)
+        router.tick('PENNY', 0.2)
+        self.assertEqual(account.get_portfolio_value(), 0.6)
+        self.assertEqual(account.get_profit_or_loss(), 0.3)
+        self.assertEqual(account._market_value, 60)
+        self.assertTrue(account.sell_shares('PENNY', 1))
+        self.assertEqual(account.revalue(), 0.4)
+        self.assertEqual(account.get_portfolio_value({'PENNY': 0.7}), 1.5)
+        self.assertEqual(account.cash_at(1.0), 0.1)
+        self.assertEqual(account.get_account_summary()['balance'], 0.1)
+
+    # Test batches give the same exact state as the per-call methods, with and without NumPy arrays
+    def test_apply_batch(self):
+        trades = [('buy' if i % 3 else 'sell', 'AAPL' if i % 2 else 'TSLA', i % 4 + 1, 0.01 * (i % 97 + 1), None)
+                  for i in range(2000)]
+        expected = Account('cents', 50.0, clock=lambda: 1.0, checkpoint_interval=7, money_scale=100)
+        for kind, symbol, quantity, price, _ in trades:
+            expected.price_provider = StaticPriceProvider(lambda symbol, price=price: price)
+            (expected.buy_shares if kind == 'buy' else expected.sell_shares)(symbol, quantity)
+        columns = [list(column) for column in zip(*trades)]
+        try:
+            import numpy as np
+            arrays = [np.array(column) for column in columns[:4]]
+        except ImportError:
+            arrays = None
+        for batch in (columns[:4], arrays):
+            if batch is None:
+                continue
+            account = Account('cents', 50.0, clock=lambda: 1.0, checkpoint_interval=7, money_scale=100)
+            account.apply_columns(*batch)
+            self.assertEqual(account._balance, expected._balance)
+            self.assertEqual(account.get_holdings(), expected.get_holdings())
+            self.assertEqual(account.transactions, expected.transactions)
+            self.assertEqual(account.history._checkpoints, expected.history._checkpoints)
+            self.assertEqual(account._market_value, expected._market_value)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import unittest
+from accounts import Account, StaticPriceProvider, TickRouter
+from orders import OrderBook
+
+class TestOrderBook(unittest.TestCase):
+    def setUp(self):
+        self.router = TickRouter()
+        self.account = Account('user123', 10000.0, clock=lambda: 1.0, tick_router=self.router,
+                               price_provider=StaticPriceProvider({'AAPL': 150.0}.get))
+        self.book = OrderBook(self.router)
+
+    # Test limit orders fill at the tick price once it reaches their limit
+    def test_limit_orders(self):
+        buy = self.book.place(self.account, 'buy', 'AAPL', 10, 'limit', 140.0)
+        sell = self.book.place(self.account, 'sell', 'AAPL', 4, 'limit', 160.0)
+        self.assertEqual(self.book.tick('AAPL', 145.0), [])
+        self.assertEqual([order.order_id for order in self.book.tick('AAPL', 138.0)], [buy])
+        self.assertEqual(self.account.get_holdings(), {'AAPL': 10})
+        self.assertEqual(self.account.balance, 10000.0 - 1380.0)
+        filled = self.book.tick('AAPL', 161.0)
+        self.assertEqual([(order.order_id, order.status, order.fill_price) for order in filled], [(sell, 'filled', 161.0)])
+        self.assertEqual([(row['type'], row['quantity'], row['price']) for row in self.account.get_transactions()],
+                         [('buy', 10, 138.0), ('sell', 4, 161.0)])
+        self.assertEqual(len(self.book), 0)
+
+    # Test stop orders trigger when the price moves through them, and a tick revalues the holder
+    def test_stop_orders(self):
+        self.account.buy_shares('AAPL', 10)
+        self.book.place(self.account, 'sell', 'AAPL', 10, 'stop', 130.0)
+        self.book.place(self.account, 'buy', 'AAPL', 1, 'stop', 170.0)
+        self.book.tick('AAPL', 135.0)
+        self.assertEqual(self.account.get_portfolio_value(), 10000.0 - 1500.0 + 1350.0)
+        self.assertEqual([order.side for order in self.book.tick('AAPL', 125.0)], ['sell'])
+        self.assertEqual(self.account.get_holdings(), {})
+        self.assertEqual([order.side for order in self.book.tick('AAPL', 175.0)], ['buy'])
+        self.assertEqual(self.account.get_holdings(), {'AAPL': 1})
+
+    # Test triggered orders go through the funds and holdings checks and fill in placement order
+    def test_checks_and_order(self):
+        first = self.book.place(self.account, 'buy', 'AAPL', 60, 'limit', 100.0)
+        second = self.book.place(self.account, 'buy', 'AAPL', 60, 'limit', 120.0)
+        short = self.book.place(self.account, 'sell', 'AAPL', 500, 'stop', 110.0)
+        triggered = self.book.tick('AAPL', 100.0)
+        self.assertEqual([(order.order_id, order.status) for order in triggered],
+                         [(first, 'filled'), (second, 'rejected'), (short, 'rejected')])
+        self.assertEqual(self.account.get_holdings(), {'AAPL': 60})
+        self.assertEqual(len(self.account.get_transactions()), 1)
+
+    # Test cancelled orders never fill and are compacted away once they pile up
+    def test_cancel(self):
+        ids = [self.book.place(self.account, 'buy', 'AAPL', 1, 'limit', 100.0 + i % 10) for i in range(200)]
+        for order_id in ids[:150]:
+            self.assertTrue(self.book.cancel(order_id))
+        self.assertFalse(self.book.cancel(ids[0]))
+        self.assertLess(len(self.book._falling['AAPL']), 200)
+        self.assertEqual(len(self.book.open_orders(self.account)), 50)
+        self.assertEqual(len(self.book.tick('AAPL', 50.0)), 50)
+        self.assertEqual(self.account.get_holdings(), {'AAPL': 50})
+        self.assertEqual(self.book.open_orders(), [])
+
+    # Test bad orders are refused when placed
+    def test_validation(self):
+        for args in (('hold', 'AAPL', 1, 'limit', 1.0), ('buy', 'AAPL', 0, 'limit', 1.0),
+                     ('buy', 'AAPL', 1, 'market', 1.0), ('buy', 'AAPL', 1, 'stop', 0.0)):
+            with self.assertRaises(ValueError):
+                self.book.place(self.account, *args)
+
+if __name__ == '__main__':
+    unittest.main()
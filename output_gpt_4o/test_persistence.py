@@ -0,0 +1,215 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from persistence import AccountStore, WalCorruptError, encode_record, read_records
+
+class TestAccountStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close(snapshot=False)
+        shutil.rmtree(self.directory)
+
+    def open_store(self, **options):
+        # Track stores so threads are stopped even when a test fails
+        store = AccountStore(self.directory, **options)
+        self.stores.append(store)
+        return store
+
+    def trade(self, account):
+        account.buy_shares('AAPL', 3)
+        account.sell_shares('AAPL', 1)
+        account.buy_shares('TSLA', 1)
+        account.withdraw(100.0)
+        account.deposit(50.0)
+
+    def assertSameAccount(self, expected, actual):
+        self.assertEqual(actual.get_account_summary(), expected.get_account_summary())
+        self.assertEqual(list(actual.get_transactions()), list(expected.get_transactions()))
+        self.assertEqual(actual.cash_at(float('inf')), expected.cash_at(float('inf')))
+        self.assertEqual(actual.holdings_at(float('inf')), expected.holdings_at(float('inf')))
+        for symbol in ('AAPL', 'TSLA'):
+            self.assertEqual(actual.transactions_for(symbol), expected.transactions_for(symbol))
+            self.assertEqual(actual.cost_basis(symbol), expected.cost_basis(symbol))
+
+    # Test a clean shutdown snapshots everything, so the restart replays nothing
+    def test_close_and_reopen(self):
+        store = self.open_store()
+        account = store.open_account('alice', 10000.0)
+        self.trade(account)
+        store.close()
+        recovered = self.open_store()
+        self.assertEqual(recovered.recovery['replayed'], 0)
+        self.assertSameAccount(account, recovered.get('alice'))
+
+    # Test recovery from the log alone after a crash (no snapshot was taken)
+    def test_recover_from_log(self):
+        store = self.open_store(snapshot_every=10 ** 6)
+        account = store.open_account('alice', 100000.0)
+        for _ in range(20):
+            self.trade(account)
+        store.close(snapshot=False)
+        recovered = self.open_store()
+        self.assertEqual(recovered.recovery['snapshot_seq'], 0)
+        self.assertEqual(recovered.recovery['replayed'], 101)
+        self.assertSameAccount(account, recovered.get('alice'))
+
+    # Test recovery loads the latest snapshot and replays only the tail after it
+    def test_snapshot_bounds_replay(self):
+        store = self.open_store(snapshot_every=10 ** 6, checkpoint_interval=4)
+        account = store.open_account('alice', 100000.0)
+        for _ in range(50):
+            self.trade(account)
+        seq = store.snapshot()
+        for _ in range(3):
+            self.trade(account)
+        store.close(snapshot=False)
+        names = os.listdir(self.directory)
+        self.assertEqual([name for name in names if name.endswith('.snap')], [f'snapshot-{seq:020d}.snap'])
+        recovered = self.open_store()
+        self.assertEqual(recovered.recovery['snapshot_seq'], seq)
+        self.assertEqual(recovered.recovery['replayed'], 15)
+        restored = recovered.get('alice')
+        self.assertSameAccount(account, restored)
+        self.assertEqual(restored.history.interval, 4)
+
+    # Test snapshots are taken in the background and older log segments are removed
+    def test_automatic_snapshots(self):
+        store = self.open_store(snapshot_every=50)
+        account = store.open_account('alice', 100000.0)
+        for _ in range(100):
+            self.trade(account)
+        deadline = time.monotonic() + 10
+        while not store.stats['snapshots'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(store.stats['snapshots'], 0)
+        store.snapshot()
+        self.trade(account)
+        store.close(snapshot=False)
+        self.assertLessEqual(len([name for name in os.listdir(self.directory) if name.startswith('wal-')]), 2)
+        recovered = self.open_store()
+        self.assertLessEqual(recovered.recovery['replayed'], 5)
+        self.assertSameAccount(account, recovered.get('alice'))
+
+    # Test a torn record at the end of the log is dropped and cut off
+    def test_torn_tail(self):
+        store = self.open_store(snapshot_every=10 ** 6)
+        account = store.open_account('alice', 10000.0)
+        self.trade(account)
+        store.close(snapshot=False)
+        segment = os.path.join(self.directory, sorted(os.listdir(self.directory))[-1])
+        size = os.path.getsize(segment)
+        record = encode_record(99, 'deposit', 'alice', '', 0, 1.0, 0.0)
+        with open(segment, 'ab') as f:
+            f.write(record[:len(record) // 2])
+        recovered = self.open_store()
+        self.assertSameAccount(account, recovered.get('alice'))
+        self.assertEqual(os.path.getsize(segment), size)
+
+    # Test damage before the last segment is reported rather than silently skipped
+    def test_corrupt_middle_segment(self):
+        store = self.open_store(snapshot_every=10 ** 6)
+        account = store.open_account('alice', 10000.0)
+        self.trade(account)
+        store.close(snapshot=False)
+        segment = os.path.join(self.directory, sorted(os.listdir(self.directory))[-1])
+        with open(segment, 'r+b') as f:
+            f.seek(20)
+            f.write(b'\xff\xff')
+        with open(os.path.join(self.directory, 'wal-99999999999999999999.log'), 'wb') as f:
+            f.write(encode_record(10 ** 6, 'deposit', 'alice', '', 0, 1.0, 0.0))
+        with self.assertRaises(WalCorruptError):
+            AccountStore(self.directory)
+
+    # Test re-opening an account with replace=True starts it over after a restart too
+    def test_replace_account(self):
+        store = self.open_store()
+        account = store.open_account('alice', 10000.0)
+        self.trade(account)
+        with self.assertRaises(ValueError):
+            store.open_account('alice', 500.0)
+        fresh = store.open_account('alice', 500.0, replace=True)
+        fresh.deposit(25.0)
+        store.close(snapshot=False)
+        recovered = self.open_store()
+        self.assertSameAccount(fresh, recovered.get('alice'))
+        self.assertEqual(recovered.get('alice').balance, 525.0)
+
+    # Test a directory can only be used by one store at a time
+    def test_directory_lock(self):
+        store = self.open_store()
+        with self.assertRaises(RuntimeError):
+            AccountStore(self.directory)
+        store.close()
+        self.open_store()
+
+    # Test synchronous mode: each call returns only once its record is on disk, and concurrent
+    # callers share fsyncs
+    def test_synchronous_group_commit(self):
+        store = self.open_store(synchronous=True)
+        accounts = [store.open_account(f'user{i}', 1000.0) for i in range(8)]
+
+        def deposits(account):
+            for _ in range(50):
+                account.deposit(1.0)
+                self.assertGreaterEqual(store._durable_seq, account.journal_seq)
+
+        threads = [threading.Thread(target=deposits, args=(account,)) for account in accounts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(store.stats['commits'], store.stats['records'])
+        store.close(snapshot=False)
+        recovered = self.open_store()
+        self.assertEqual([recovered.get(f'user{i}').balance for i in range(8)], [1050.0] * 8)
+
+    # Test a batch is journaled as one record per trade and recovers like single trades
+    def test_apply_batch_journaled(self):
+        store = self.open_store(snapshot_every=10 ** 6)
+        account = store.open_account('alice', 10000.0)
+        result = account.apply_batch([('buy', 'AAPL', 5, 150.0, 1.0), ('sell', 'AAPL', 9, 150.0, 2.0),
+                                      ('sell', 'AAPL', 2, 160.0, 3.0)])
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual(account.journal_seq, 3)
+        store.close(snapshot=False)
+        recovered = self.open_store()
+        self.assertEqual(recovered.recovery['replayed'], 3)
+        self.assertSameAccount(account, recovered.get('alice'))
+
+    # Test accounts with a money scale keep their exact minor units through snapshots and the log
+    def test_fixed_point_money(self):
+        store = self.open_store(snapshot_every=10 ** 6, money_scale=100)
+        account = store.open_account('alice', 10000.0)
+        self.trade(account)
+        store.snapshot()
+        for _ in range(10):
+            account.deposit(0.1)
+        store.close(snapshot=False)
+        recovered = self.open_store(money_scale=100)
+        restored = recovered.get('alice')
+        self.assertSameAccount(account, restored)
+        self.assertEqual(restored._balance, account._balance)
+        self.assertTrue(restored.withdraw(restored.balance))
+        recovered.close()
+        with self.assertRaises(ValueError):
+            AccountStore(self.directory)
+
+    # Test records round-trip through the binary format
+    def test_record_format(self):
+        path = os.path.join(self.directory, 'records.log')
+        with open(path, 'wb') as f:
+            f.write(encode_record(1, 'buy', 'bob', 'AAPL', 5, 150.0, 12.5))
+            f.write(encode_record(2, 'withdraw', 'bob', '', 0, 20.0, 13.0))
+        records = [record for _, record in read_records(path)]
+        self.assertEqual(records, [(1, 'buy', 'bob', 'AAPL', 5, 150.0, 12.5),
+                                   (2, 'withdraw', 'bob', '', 0, 20.0, 13.0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from simulation import max_drawdown, price_paths, run_simulation, simulate_account
+
+@unittest.skipIf(np is None, 'numpy not installed')
+class TestSimulation(unittest.TestCase):
+    # Test paths start at the given prices, stay positive and are reproducible from a seed
+    def test_price_paths(self):
+        paths = price_paths([100.0, 50.0], 30, 8, volatility=[0.2, 0.5], rng=np.random.default_rng(3))
+        self.assertEqual(paths.shape, (8, 31, 2))
+        self.assertTrue((paths[:, 0] == [100.0, 50.0]).all())
+        self.assertTrue((paths > 0).all())
+        again = price_paths([100.0, 50.0], 30, 8, volatility=[0.2, 0.5], rng=np.random.default_rng(3))
+        self.assertTrue((paths == again).all())
+        flat = price_paths([100.0], 10, 2, drift=0.0, volatility=0.0)
+        self.assertTrue((flat == 100.0).all())
+
+    # Test drawdown is the largest fall from a running peak
+    def test_max_drawdown(self):
+        equity = np.array([[100.0, 120.0, 90.0, 110.0, 60.0, 130.0], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]])
+        self.assertTrue(np.allclose(max_drawdown(equity), [0.5, 0.0]))
+
+    # Test one account rebalances through the account rules and tracks its equity
+    def test_simulate_account(self):
+        prices = np.array([[10.0, 20.0], [11.0, 20.0], [12.0, 18.0], [12.0, 18.0]])
+        equity, trades = simulate_account(prices, np.array(['A', 'B']), np.array([0.5, 0.5]), 1000.0, 2)
+        # 50 A and 25 B at step 0; at step 2 worth 600 + 450 = 1050, rebalanced to 43 A and 29 B
+        self.assertTrue(np.allclose(equity, [1000.0, 1050.0, 1050.0, 1050.0]))
+        self.assertEqual(trades, 4)
+
+    # Test results do not depend on the number of worker processes
+    def test_workers_agree(self):
+        options = dict(simulations=12, steps=40, rebalance_every=10, chunk_size=5, seed=7)
+        local = run_simulation(['A', 'B'], [100.0, 20.0], [0.4, 0.4], workers=1, **options)
+        pooled = run_simulation(['A', 'B'], [100.0, 20.0], [0.4, 0.4], workers=2, **options)
+        self.assertTrue((local['pnl'] == pooled['pnl']).all())
+        self.assertTrue((local['max_drawdown'] == pooled['max_drawdown']).all())
+        self.assertEqual(local['summary'], pooled['summary'])
+        self.assertEqual(sum(worker['simulations'] for worker in pooled['workers']), 12)
+        self.assertEqual(len(local['pnl']), 12)
+
+    # Test an all-cash strategy never gains or loses, and bad inputs are refused
+    def test_cash_and_validation(self):
+        result = run_simulation(['A'], [100.0], [0.0], simulations=3, steps=5, workers=1, seed=1)
+        self.assertTrue((result['pnl'] == 0).all())
+        self.assertEqual(result['summary']['worst_max_drawdown'], 0.0)
+        self.assertEqual(result['trades'], 0)
+        with self.assertRaises(ValueError):
+            run_simulation(['A', 'B'], [100.0, 20.0], [0.7, 0.7], workers=1)
+        with self.assertRaises(ValueError):
+            run_simulation(['A'], [100.0, 20.0], [0.5], workers=1)
+
+if __name__ == '__main__':
+    unittest.main()
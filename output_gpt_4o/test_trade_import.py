@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from accounts import Account
+from trade_import import import_trades, read_chunks
+
+CSV = '''symbol,type,quantity,price,timestamp
+AAPL,buy,10,100,1
+AAPL,sell,20,100,2
+TSLA,buy,x,1,3
+TSLA,buy,1
+GOOGL,buy,1,,1970-01-01T00:00:05+00:00
+AAPL,hold,1,1,6
+AAPL,sell,4,120,7
+'''
+
+class TestTradeImport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # Test a CSV import applies good rows and names the problem with each bad one, by data row number
+    def test_csv(self):
+        account = Account('user123', 10000.0)
+        result = import_trades(account, io.StringIO(CSV), format='csv', chunk_size=3)
+        self.assertEqual(result['rows'], 7)
+        self.assertEqual(result['accepted'], 3)
+        self.assertEqual(result['rejected'], [(2, 'insufficient shares'), (3, 'quantity is not an integer'),
+                                              (4, 'missing fields'), (6, "unknown type 'hold'")])
+        self.assertEqual(account.get_holdings(), {'AAPL': 6, 'GOOGL': 1})
+        self.assertEqual(account.balance, 10000.0 - 1000.0 - 2800.0 + 480.0)
+        self.assertEqual([row['timestamp'] for row in account.get_transactions()], [1.0, 5.0, 7.0])
+
+    # Test chunk size does not change the outcome
+    def test_chunk_size(self):
+        path = os.path.join(self.directory, 'trades.csv')
+        with open(path, 'w') as f:
+            f.write('type,symbol,quantity,price\n')
+            for i in range(1000):
+                f.write(f"{'sell' if i % 3 == 0 else 'buy'},AAPL,{i % 5 + 1},{100 + i % 7}\n")
+        results = []
+        for chunk_size in (1, 64, 5000):
+            account = Account('user123', 50000.0, clock=lambda: 1.0)
+            result = import_trades(account, path, chunk_size=chunk_size)
+            results.append((result, account.balance, account.get_holdings(), list(account.get_transactions())))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
+    # Test JSON Lines input, including unparseable lines and missing prices
+    def test_jsonl(self):
+        path = os.path.join(self.directory, 'trades.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'type': 'buy', 'symbol': 'AAPL', 'quantity': 5, 'price': 10.0}) + '\n')
+            f.write('\nnot json\n[1]\n')
+            f.write(json.dumps({'type': 'sell', 'symbol': 'AAPL', 'quantity': 2}) + '\n')
+        account = Account('user123', 1000.0)
+        result = import_trades(account, path)
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual(result['rejected'], [(3, 'invalid JSON'), (4, 'expected a JSON object')])
+        self.assertEqual(account.balance, 1000.0 - 50.0 + 300.0)
+
+    # Test a structured .npy file is read memory-mapped, chunk by chunk
+    def test_npy(self):
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest('numpy not installed')
+        trades = np.zeros(2000, dtype=[('type', 'S4'), ('symbol', 'U5'), ('quantity', 'i8'), ('price', 'f8')])
+        trades['type'] = b'buy'
+        trades['type'][1::2] = b'sell'
+        trades['symbol'] = 'AAPL'
+        trades['quantity'] = 1
+        trades['price'] = 10.0
+        trades['quantity'][-1] = 5
+        path = os.path.join(self.directory, 'trades.npy')
+        np.save(path, trades)
+        account = Account('user123', 100.0)
+        result = import_trades(account, path, chunk_size=700)
+        self.assertEqual(result['accepted'], 1999)
+        self.assertEqual(result['rejected'], [(2000, 'insufficient shares')])
+        self.assertEqual(account.get_holdings(), {'AAPL': 1})
+        self.assertEqual(account.balance, 90.0)
+
+    # Test files are read a chunk at a time
+    def test_read_chunks(self):
+        chunks = list(read_chunks(io.StringIO(CSV), format='csv', chunk_size=3))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(list(chunks[0][0]), [1, 2])
+        with self.assertRaises(ValueError):
+            list(read_chunks(io.StringIO('symbol,price\n'), format='csv'))
+        with self.assertRaises(ValueError):
+            list(read_chunks('trades.txt'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+# Trade Import Module
+#
+# Streams historical trades from CSV, JSON Lines or NumPy (.npy) files into Account.apply_columns
+# a chunk at a time, so a file of any size is imported in bounded memory and checked against the
+# same funds/shares rules as buy_shares/sell_shares. Every trade needs a type ('buy' or 'sell'),
+# a symbol and a quantity; price and timestamp are optional (a missing price is looked up through
+# the account's price provider, a missing timestamp means now). Timestamps are epoch seconds or
+# ISO 8601 strings. Rows that cannot be parsed or break the rules are skipped and reported by
+# row number (data rows count from 1; a CSV header is not counted).
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from accounts import Account
+
+FORMATS = ('csv', 'jsonl', 'npy')
+FIELDS = ('type', 'symbol', 'quantity', 'price', 'timestamp')
+REQUIRED_FIELDS = ('type', 'symbol', 'quantity')
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def detect_format(path: str) -> str:
+    # Guess the format from the file extension
+    extension = os.path.splitext(str(path))[1].lower()
+    formats = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.npy': 'npy'}
+    if extension not in formats:
+        raise ValueError(f'Cannot tell the format of {path}; pass one of {FORMATS}')
+    return formats[extension]
+
+
+def parse_timestamp(value):
+    # Epoch seconds, numeric strings and ISO 8601 strings to epoch seconds; '' and None to None
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+    raise ValueError(f'unsupported timestamp {value!r}')
+
+
+def parse_row(values: tuple):
+    # Convert one row of raw (type, symbol, quantity, price, timestamp) values; raises ValueError with
+    # the reason the row is unusable
+    kind, symbol, quantity, price, timestamp = values
+    if isinstance(quantity, str):
+        try:
+            quantity = int(quantity)
+        except ValueError:
+            raise ValueError('quantity is not an integer') from None
+    if isinstance(price, str):
+        try:
+            price = float(price) if price else None
+        except ValueError:
+            raise ValueError('price is not a number') from None
+    try:
+        timestamp = parse_timestamp(timestamp)
+    except ValueError:
+        raise ValueError('timestamp is not a number or ISO 8601 date') from None
+    return kind, symbol, quantity, price, timestamp
+
+
+def convert_numbers(values, convert=float):
+    # Column of numbers, numeric strings and '' (missing) to numbers and None; raises ValueError
+    if '' in values:
+        return [None if value == '' else convert(value) for value in values]
+    if str in set(map(type, values)):
+        return list(map(convert, values))
+    return values
+
+
+def convert_columns(numbers, columns):
+    # Convert a chunk of raw (type, symbol, quantity, price, timestamp) columns. Whole columns are
+    # converted with map(); a chunk where that fails is converted row by row to find the bad rows.
+    # Returns (row numbers, columns, errors)
+    kinds, symbols, quantities, prices, timestamps = columns
+    try:
+        quantities = convert_numbers(quantities, int)
+        prices = convert_numbers(prices)
+        try:
+            timestamps = convert_numbers(timestamps)
+        except ValueError:
+            timestamps = list(map(parse_timestamp, timestamps))
+        return numbers, (kinds, symbols, quantities, prices, timestamps), []
+    except (TypeError, ValueError):
+        pass
+    kept, converted, errors = [], ([], [], [], [], []), []
+    for number, row in zip(numbers, zip(*columns)):
+        try:
+            values = parse_row(row)
+        except ValueError as e:
+            errors.append((number, str(e)))
+            continue
+        kept.append(number)
+        for column, value in zip(converted, values):
+            column.append(value)
+    return kept, converted, errors
+
+
+def read_csv(file, chunk_size: int):
+    # CSV with a header row naming at least type, symbol and quantity
+    reader = csv.reader(file)
+    header = [name.strip().lower() for name in next(reader, [])]
+    missing = [field for field in REQUIRED_FIELDS if field not in header]
+    if missing:
+        raise ValueError(f"CSV header lacks {', '.join(missing)}")
+    positions = [header.index(field) if field in header else None for field in FIELDS]
+    width = len(header)
+    first_row = 1
+    while True:
+        raw = list(islice(reader, chunk_size))
+        if not raw:
+            return
+        numbers = range(first_row, first_row + len(raw))
+        first_row += len(raw)
+        short = []
+        if min(map(len, raw)) < width:
+            short = [(number, 'missing fields') for number, row in zip(numbers, raw) if len(row) < width]
+            numbers = [number for number, row in zip(numbers, raw) if len(row) >= width]
+            raw = [row for row in raw if len(row) >= width]
+        # Transpose the chunk into columns in C
+        fields = list(zip(*raw)) if raw else [()] * width
+        columns = tuple([''] * len(raw) if position is None else fields[position] for position in positions)
+        numbers, columns, errors = convert_columns(numbers, columns)
+        yield numbers, columns, sorted(short + errors)
+
+
+def read_jsonl(file, chunk_size: int):
+    # One JSON object per line; blank lines are skipped but still counted
+    first_row = 1
+    while True:
+        lines = list(islice(file, chunk_size))
+        if not lines:
+            return
+        records, numbers, errors = [], [], []
+        for number, line in enumerate(lines, first_row):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                errors.append((number, 'invalid JSON'))
+                continue
+            if not isinstance(record, dict):
+                errors.append((number, 'expected a JSON object'))
+                continue
+            records.append(record)
+            numbers.append(number)
+        columns = tuple([record.get(field) for record in records] for field in FIELDS)
+        numbers, columns, row_errors = convert_columns(numbers, columns)
+        yield numbers, columns, sorted(errors + row_errors)
+        first_row += len(lines)
+
+
+def read_npy(path: str, chunk_size: int):
+    # Structured .npy array with fields named like FIELDS, memory-mapped and sliced per chunk
+    if np is None:
+        raise ImportError('Reading .npy trade files requires numpy')
+    data = np.load(path, mmap_mode='r')
+    names = data.dtype.names or ()
+    missing = [field for field in REQUIRED_FIELDS if field not in names]
+    if missing:
+        raise ValueError(f"{path} lacks the fields {', '.join(missing)}")
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        columns = []
+        for field in FIELDS:
+            if field not in names:
+                columns.append(None)
+                continue
+            column = np.asarray(chunk[field])
+            if column.dtype.kind == 'S':
+                column = column.astype('U')
+            columns.append(column)
+        yield range(start + 1, start + 1 + len(chunk)), tuple(columns), []
+
+
+def read_chunks(source, format: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # Yield (row numbers, (types, symbols, quantities, prices, timestamps), errors) chunks from a path,
+    # or from an open text file for CSV/JSON Lines
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1')
+    is_path = isinstance(source, (str, os.PathLike))
+    format = format or (detect_format(source) if is_path else None)
+    if format not in FORMATS:
+        raise ValueError(f'Unknown format {format!r}; expected one of {FORMATS}')
+    if format == 'npy':
+        yield from read_npy(source, chunk_size)
+        return
+    reader = read_csv if format == 'csv' else read_jsonl
+    if not is_path:
+        yield from reader(source, chunk_size)
+        return
+    with open(source, newline='' if format == 'csv' else None, encoding='utf-8') as file:
+        yield from reader(file, chunk_size)
+
+
+def import_trades(account: Account, source, format: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    # Stream a trade file into the account; returns
+    # {'rows': rows read, 'accepted': count, 'rejected': [(row number, reason), ...]}
+    rows, accepted, rejected = 0, 0, []
+    for numbers, columns, errors in read_chunks(source, format, chunk_size):
+        rows += len(numbers) + len(errors)
+        rejected += errors
+        if not len(numbers):
+            continue
+        result = account.apply_columns(*columns)
+        accepted += result['accepted']
+        rejected += [(numbers[index], reason) for index, reason in result['rejected']]
+    rejected.sort()
+    return {'rows': rows, 'accepted': accepted, 'rejected': rejected}
+
+
+# Import a file into a demo account: python trade_import.py trades.csv [initial deposit]
+if __name__ == '__main__':
+    account = Account(user_id='importer', initial_deposit=float(sys.argv[2]) if len(sys.argv) > 2 else 1000000.0)
+    result = import_trades(account, sys.argv[1])
+    print(f"{result['accepted']} of {result['rows']} trades imported")
+    for number, reason in result['rejected'][:20]:
+        print(f'  row {number}: {reason}')
+    print(account.get_account_summary())
@@ -1,5 +1,20 @@
 # accounts.py module for account management in a trading simulation platform
+import sys
+import threading
 import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from operator import mul
+
+# numpy is optional; without it valuation falls back to a plain Python sum
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# below this many holdings a plain Python sum beats the cost of building NumPy arrays
+VECTORIZE_MIN_HOLDINGS = 64
 
 # function to get current fixed share prices for testing purposes
 def get_share_price(symbol: str) -> float:
@@ -10,28 +25,340 @@ def get_share_price(symbol: str) -> float:
     }
     return prices.get(symbol, 0.0)
 
+# append-only columnar transaction store: one typed array per field instead of a dict per trade
+class TransactionLedger:
+    ACTIONS = ("BUY", "SELL")
+
+    # typed columns; symbols are interned to small integer ids, timestamps kept as epoch seconds;
+    # with a money scale prices are stored as integer minor units and converted back when read
+    def __init__(self, money_scale: int = None) -> None:
+        self.money_scale = money_scale
+        self._actions = array("b")
+        self._symbol_ids = array("i")
+        self._quantities = array("q")
+        self._prices = array("q" if money_scale else "d")
+        self._timestamps = array("d")
+        self._symbols = []
+        self._symbol_index = {}
+
+    # add one transaction in amortized O(1); arrays over-allocate like lists
+    def append(self, action: str, symbol: str, quantity: int, price: float, timestamp: float) -> None:
+        symbol_id = self._symbol_index.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_index[symbol] = len(self._symbols)
+            self._symbols.append(sys.intern(symbol))
+        self._actions.append(self.ACTIONS.index(action))
+        self._symbol_ids.append(symbol_id)
+        self._quantities.append(quantity)
+        self._prices.append(price)
+        self._timestamps.append(timestamp)
+
+    # materialize one transaction as the dict the rest of the module and the UI expect
+    def row(self, index: int) -> dict:
+        return {
+            "timestamp": time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(self._timestamps[index])),
+            "action": self.ACTIONS[self._actions[index]],
+            "symbol": self._symbols[self._symbol_ids[index]],
+            "quantity": self._quantities[index],
+            "price": self._prices[index] / self.money_scale if self.money_scale else self._prices[index]
+        }
+
+    # zero-copy, read-only window over the rows that exist now
+    def view(self, start: int = 0, stop=None) -> "LedgerView":
+        return LedgerView(self, *slice(start, stop).indices(len(self))[:2])
+
+    # copy of one typed column: "action", "symbol_id", "quantity", "price" (minor units with a money scale) or "timestamp"
+    def column(self, name: str, start: int = 0, stop=None) -> array:
+        columns = {"action": self._actions, "symbol_id": self._symbol_ids, "quantity": self._quantities,
+                   "price": self._prices, "timestamp": self._timestamps}
+        return columns[name][start:stop]
+
+    # export the columns as NumPy arrays; copies, since a live buffer export would block appends
+    def to_numpy(self, start: int = 0, stop=None) -> dict:
+        import numpy as np
+        symbols = np.array(self._symbols if self._symbols else [""])
+        symbol_ids = np.array(self._symbol_ids[start:stop], dtype=np.int32)
+        return {
+            "action": np.array(self._actions[start:stop], dtype=np.int8),
+            "symbol_id": symbol_ids,
+            "symbol": symbols[symbol_ids],
+            "quantity": np.array(self._quantities[start:stop], dtype=np.int64),
+            "price": np.array(self._prices[start:stop], dtype=np.int64 if self.money_scale else np.float64),
+            "timestamp": np.array(self._timestamps[start:stop], dtype=np.float64)
+        }
+
+    # memory held by the columns, excluding over-allocation
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in
+                   (self._actions, self._symbol_ids, self._quantities, self._prices, self._timestamps))
+
+    def __len__(self) -> int:
+        return len(self._actions)
+
+    # integer index gives a row dict, a slice gives a LedgerView
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.view()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return self.row(index)
+
+    def __iter__(self):
+        return iter(self.view())
+
+    # compares equal to a list of the same transaction dicts, so it can stand in for one
+    def __eq__(self, other) -> bool:
+        return self.view() == other
+
+    def __repr__(self) -> str:
+        return repr(self.view())
+
+# read-only range of a TransactionLedger; rows are materialized only when accessed
+class LedgerView:
+    def __init__(self, ledger: TransactionLedger, start: int, stop: int) -> None:
+        self._ledger = ledger
+        self._start = start
+        self._stop = max(start, stop)
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    # slicing returns another view; stepped slices are materialized as a list
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self._ledger.row(self._start + i) for i in range(start, stop, step)]
+            return LedgerView(self._ledger, self._start + start, self._start + stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return self._ledger.row(self._start + index)
+
+    # walk the column slices together rather than indexing every column per row
+    def __iter__(self):
+        ledger, start, stop = self._ledger, self._start, self._stop
+        actions, symbols, scale = ledger.ACTIONS, ledger._symbols, ledger.money_scale
+        for action, symbol_id, quantity, price, timestamp in zip(
+                ledger._actions[start:stop], ledger._symbol_ids[start:stop], ledger._quantities[start:stop],
+                ledger._prices[start:stop], ledger._timestamps[start:stop]):
+            yield {"timestamp": time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp)), "action": actions[action],
+                   "symbol": symbols[symbol_id], "quantity": quantity, "price": price / scale if scale else price}
+
+    # copy of one typed column for this range
+    def column(self, name: str) -> array:
+        return self._ledger.column(name, self._start, self._stop)
+
+    def to_numpy(self) -> dict:
+        return self._ledger.to_numpy(self._start, self._stop)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (TransactionLedger, LedgerView)):
+            other = list(other)
+        if not isinstance(other, list):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+# point-in-time index over a ledger: holdings/cash checkpoints every `interval` trades plus a
+# prefix-summed log of deposits and withdrawals; cash is in minor units when the ledger has a money scale
+class HoldingsHistory:
+    def __init__(self, ledger: TransactionLedger, interval: int = 1000) -> None:
+        if interval < 1:
+            raise ValueError("Checkpoint interval must be at least 1")
+        self.ledger = ledger
+        self.interval = interval
+        zero = 0 if ledger.money_scale else 0.0
+        self._checkpoints = [({}, zero)]  # (holdings, cash from trades) after k * interval trades
+        self._holdings = {}
+        self._trade_cash = zero
+        self._flow_times = array("d")
+        self._flow_totals = array("q" if ledger.money_scale else "d")
+
+    # advance the running state after a trade was appended to the ledger; checkpoint on the boundary
+    def record_trade(self, action: str, symbol: str, quantity: int, price: float) -> None:
+        signed = quantity if action == "BUY" else -quantity
+        remaining = self._holdings.get(symbol, 0) + signed
+        if remaining:
+            self._holdings[symbol] = remaining
+        else:
+            self._holdings.pop(symbol, None)
+        self._trade_cash -= signed * price
+        if len(self.ledger) % self.interval == 0:
+            self._checkpoints.append((dict(self._holdings), self._trade_cash))
+
+    # log a deposit (positive) or withdrawal (negative) with a running total
+    def record_cash_flow(self, amount: float, timestamp: float) -> None:
+        total = self._flow_totals[-1] if self._flow_totals else 0
+        self._flow_times.append(timestamp)
+        self._flow_totals.append(total + amount)
+
+    # holdings and net cash change up to and including `timestamp`, in O(log n + interval)
+    def state_at(self, timestamp: float):
+        ledger = self.ledger
+        count = bisect_right(ledger._timestamps, timestamp)
+        checkpoint = count // self.interval
+        holdings, cash = self._checkpoints[checkpoint]
+        holdings = dict(holdings)
+        for index in range(checkpoint * self.interval, count):
+            symbol = ledger._symbols[ledger._symbol_ids[index]]
+            signed = ledger._quantities[index] if ledger._actions[index] == 0 else -ledger._quantities[index]
+            remaining = holdings.get(symbol, 0) + signed
+            if remaining:
+                holdings[symbol] = remaining
+            else:
+                holdings.pop(symbol, None)
+            cash -= signed * ledger._prices[index]
+        flows = bisect_right(self._flow_times, timestamp)
+        if flows:
+            cash += self._flow_totals[flows - 1]
+        return holdings, cash
+
+# source of share prices; implementations answer many symbols in one get_prices call
+class PriceProvider:
+    def get_prices(self, symbols) -> dict:
+        raise NotImplementedError
+
+    def get_price(self, symbol: str) -> float:
+        prices = self.get_prices([symbol])
+        if symbol not in prices:
+            raise ValueError(f"No price for {symbol}")
+        return prices[symbol]
+
+# adapts a single-symbol price function such as get_share_price to the bulk interface
+class StaticPriceProvider(PriceProvider):
+    def __init__(self, price_function=get_share_price) -> None:
+        self.price_function = price_function
+
+    def get_prices(self, symbols) -> dict:
+        return {symbol: self.price_function(symbol) for symbol in symbols}
+
+# TTL + LRU cache in front of another provider; misses are fetched in one bulk call and concurrent
+# requests for a symbol that is already being fetched wait for that fetch instead of repeating it
+class CachedPriceProvider(PriceProvider):
+    def __init__(self, source: PriceProvider, ttl: float = 1.0, max_size: int = 1024, clock=time.monotonic) -> None:
+        self.source = source
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.fetches = 0
+        self._cache = OrderedDict()  # symbol -> (price, expires_at)
+        self._inflight = {}  # symbol -> threading.Event set when its fetch finishes
+        self._lock = threading.Lock()
+
+    # serve fresh entries from the cache, fetch the rest in one call, wait for fetches already running
+    def get_prices(self, symbols) -> dict:
+        prices, missing, pending = {}, [], {}
+        with self._lock:
+            now = self.clock()
+            for symbol in dict.fromkeys(symbols):
+                entry = self._cache.get(symbol)
+                if entry is not None and entry[1] > now:
+                    self._cache.move_to_end(symbol)
+                    prices[symbol] = entry[0]
+                elif symbol in self._inflight:
+                    pending[symbol] = self._inflight[symbol]
+                else:
+                    self._inflight[symbol] = threading.Event()
+                    missing.append(symbol)
+
+        if missing:
+            fetched = {}
+            try:
+                fetched = self.source.get_prices(missing)
+            finally:
+                with self._lock:
+                    self.fetches += 1
+                    expires_at = self.clock() + self.ttl
+                    for symbol in missing:
+                        if symbol in fetched:
+                            self._cache[symbol] = (fetched[symbol], expires_at)
+                            self._cache.move_to_end(symbol)
+                        self._inflight.pop(symbol).set()
+                    while len(self._cache) > self.max_size:
+                        self._cache.popitem(last=False)
+            # the source must answer every symbol: name the ones it left out rather than fail later on a KeyError
+            absent = [symbol for symbol in missing if symbol not in fetched]
+            if absent:
+                raise ValueError(f"No price for {', '.join(absent)}")
+            prices.update(fetched)
+
+        for symbol, done in pending.items():
+            done.wait()
+            with self._lock:
+                entry = self._cache.get(symbol)
+            # the fetch we waited on failed: ask the source directly
+            prices[symbol] = entry[0] if entry is not None else self.source.get_price(symbol)
+        return prices
+
+# sum of quantity x price over the holdings as one vectorized dot product
+def holdings_value(holdings: dict, prices: dict) -> float:
+    quantities = list(holdings.values())
+    symbol_prices = [prices[symbol] for symbol in holdings]
+    if np is not None and len(quantities) >= VECTORIZE_MIN_HOLDINGS:
+        return float(np.dot(np.asarray(quantities, dtype=np.float64), np.asarray(symbol_prices, dtype=np.float64)))
+    return float(sum(map(mul, quantities, symbol_prices)))
+
 # Account class managing deposits, withdrawals, share transactions, and reporting
 class Account:
-    # initialize account with id, initial deposit, empty holdings, and transactions list
-    def __init__(self, account_id: str, initial_deposit: float) -> None:
+    # initialize account with id, initial deposit, empty holdings, transactions ledger and point-in-time index;
+    # `clock` timestamps transactions and can be replaced in tests, `price_provider` defaults to get_share_price;
+    # with `money_scale` (e.g. 100 for cents) money is kept as exact integer minor units while the methods
+    # still take and return currency amounts
+    def __init__(self, account_id: str, initial_deposit: float, clock=time.time, checkpoint_interval: int = 1000,
+                 price_provider: PriceProvider = None, money_scale: int = None) -> None:
+        if money_scale is not None and (type(money_scale) is not int or money_scale < 1):
+            raise ValueError("Money scale must be a positive integer")
         self.account_id = account_id
-        self.balance = initial_deposit
+        self.money_scale = money_scale
+        self._balance = self.to_units(initial_deposit)
         self.initial_deposit = initial_deposit
+        self._initial_units = self.to_units(initial_deposit)
         self.holdings = {}
-        self.transactions = []
+        self.transactions = TransactionLedger(money_scale)
+        self.clock = clock
+        self.history = HoldingsHistory(self.transactions, checkpoint_interval)
+        self._last_timestamp = float("-inf")
+        self.price_provider = price_provider or StaticPriceProvider()
+    
+    # cash balance in currency units
+    @property
+    def balance(self) -> float:
+        return self._balance / self.money_scale if self.money_scale else self._balance
+    
+    @balance.setter
+    def balance(self, amount: float) -> None:
+        self._balance = self.to_units(amount)
+    
+    # currency amount in internal units: integer minor units (rounded half to even) with a money scale
+    def to_units(self, amount):
+        return round(amount * self.money_scale) if self.money_scale else amount
+    
+    # internal units back to currency units
+    def from_units(self, units):
+        return units / self.money_scale if self.money_scale else units
     
     # add funds to the account balance ensuring positive amount
     def deposit_funds(self, amount: float) -> None:
         if amount <= 0:
             raise ValueError("Deposit amount must be positive")
-        self.balance += amount
+        units = self.to_units(amount)
+        self._balance += units
+        self.history.record_cash_flow(units, self._now())
     
     # withdraw funds if sufficient balance and positive amount, return success status
     def withdraw_funds(self, amount: float) -> bool:
         if amount <= 0:
             return False
-        if self.balance >= amount:
-            self.balance -= amount
+        units = self.to_units(amount)
+        if self._balance >= units:
+            self._balance -= units
+            self.history.record_cash_flow(-units, self._now())
             return True
         return False
     
@@ -39,11 +366,11 @@ class Account:
     def buy_shares(self, symbol: str, quantity: int) -> bool:
         if quantity <= 0:
             return False
-        price_per_share = get_share_price(symbol)
-        total_cost = price_per_share * quantity
-        if total_cost > self.balance:
+        price_per_share = self.price_provider.get_price(symbol)
+        total_cost = self.to_units(price_per_share) * quantity
+        if total_cost > self._balance:
             return False
-        self.balance -= total_cost
+        self._balance -= total_cost
         self.holdings[symbol] = self.holdings.get(symbol, 0) + quantity
         self._record_transaction("BUY", symbol, quantity, price_per_share)
         return True
@@ -55,38 +382,83 @@ class Account:
         owned = self.holdings.get(symbol, 0)
         if owned < quantity:
             return False
-        price_per_share = get_share_price(symbol)
-        total_revenue = price_per_share * quantity
-        self.balance += total_revenue
+        price_per_share = self.price_provider.get_price(symbol)
+        total_revenue = self.to_units(price_per_share) * quantity
+        self._balance += total_revenue
         self.holdings[symbol] = owned - quantity
         if self.holdings[symbol] == 0:
             del self.holdings[symbol]
         self._record_transaction("SELL", symbol, quantity, price_per_share)
         return True
     
-    # calculate total portfolio value as cash balance plus market value of all holdings
-    def get_portfolio_value(self) -> float:
-        holdings_value = sum(get_share_price(sym) * qty for sym, qty in self.holdings.items())
-        return self.balance + holdings_value
+    # calculate total portfolio value as cash balance plus market value of all holdings, from one bulk price
+    # lookup or the given symbol -> price mapping
+    def get_portfolio_value(self, prices: dict = None) -> float:
+        return self.from_units(self._value_units(prices))
     
     # calculate profit or loss compared to initial deposit
-    def get_profit_or_loss(self) -> float:
-        return self.get_portfolio_value() - self.initial_deposit
+    def get_profit_or_loss(self, prices: dict = None) -> float:
+        return self.from_units(self._value_units(prices) - self._initial_units)
+    
+    # portfolio value in internal units
+    def _value_units(self, prices: dict = None):
+        if prices is None:
+            prices = self.price_provider.get_prices(self.holdings)
+        return self._balance + self._holdings_units(self.holdings, prices)
+    
+    # value of holdings at currency prices, in internal units (exact integer sum with a money scale)
+    def _holdings_units(self, holdings: dict, prices: dict):
+        if self.money_scale:
+            return sum(quantity * self.to_units(prices[symbol]) for symbol, quantity in holdings.items())
+        return holdings_value(holdings, prices)
+    
+    # balance, holdings, portfolio value and profit/loss from a single price lookup per symbol
+    def get_account_summary(self) -> dict:
+        prices = self.price_provider.get_prices(self.holdings)
+        return {
+            "account_id": self.account_id,
+            "balance": self.balance,
+            "holdings": self.report_holdings(),
+            "portfolio_value": self.get_portfolio_value(prices),
+            "profit_or_loss": self.get_profit_or_loss(prices)
+        }
     
     # return a copy of current holdings dictionary
     def report_holdings(self) -> dict:
         return dict(self.holdings)
     
+    # holdings as they were at `timestamp`, from the nearest checkpoint instead of a full replay
+    def holdings_at(self, timestamp: float) -> dict:
+        return self.history.state_at(timestamp)[0]
+    
+    # cash balance as it was at `timestamp`
+    def cash_at(self, timestamp: float) -> float:
+        return self.from_units(self._initial_units + self.history.state_at(timestamp)[1])
+    
+    # profit or loss at `timestamp`, valuing the holdings then at `prices` (symbol -> price; others use current prices)
+    def profit_or_loss_at(self, timestamp: float, prices=None) -> float:
+        holdings, cash = self.history.state_at(timestamp)
+        prices = dict(prices or {})
+        missing = [sym for sym in holdings if sym not in prices]
+        if missing:
+            prices.update(self.price_provider.get_prices(missing))
+        return self.from_units(cash + self._holdings_units(holdings, prices))
+    
     # return a copy of the list of all transactions
     def report_transactions(self) -> list:
         return list(self.transactions)
     
+    # return a zero-copy, read-only view of the transactions (optionally a start/stop range)
+    def transactions_view(self, start: int = 0, stop=None) -> LedgerView:
+        return self.transactions.view(start, stop)
+    
     # internal method to record a transaction with timestamp, action, symbol, qty, and price
     def _record_transaction(self, action: str, symbol: str, quantity: int, price: float) -> None:
-        self.transactions.append({
-            "timestamp": time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-            "action": action,
-            "symbol": symbol,
-            "quantity": quantity,
-            "price": price
-        })
\ No newline at end of file
+        units = self.to_units(price)
+        self.transactions.append(action, symbol, quantity, units, self._now())
+        self.history.record_trade(action, symbol, quantity, units)
+    
+    # current clock time, never earlier than the previous one so the ledger stays sorted for binary search
+    def _now(self) -> float:
+        self._last_timestamp = max(self.clock(), self._last_timestamp)
+        return self._last_timestamp
\ No newline at end of file
@@ -1,43 +1,80 @@
 # import necessary modules and backend Account class and get_share_price function
+import csv
+import os
+import shutil
+import tempfile
+import threading
 import gradio as gr
 from accounts import Account, get_share_price
 
-# initialize a global variable for a single Account instance, initially None
-account = None
+# serving limits: handlers of one event running at once, requests waiting before new ones are turned
+# away, and transaction exports running at once; handlers are plain functions, so gradio runs them in
+# its worker threads, off the event loop
+CONCURRENCY_LIMIT = int(os.getenv("APP_CONCURRENCY_LIMIT", "32"))
+MAX_QUEUE_SIZE = int(os.getenv("APP_MAX_QUEUE_SIZE", "1000"))
+EXPORT_CONCURRENCY_LIMIT = int(os.getenv("APP_EXPORT_CONCURRENCY_LIMIT", "4"))
+EXPORT_DIR = tempfile.mkdtemp(prefix="account_exports_")
+
+# one Account per browser session, keyed by the gradio session hash, and a lock per session so two
+# worker threads never change an account at the same time; both are dropped when the session closes
+accounts = {}
+session_locks = {}
+_sessions_lock = threading.Lock()
+
+# function to look up the account of the session making a request, or None before one is created
+def session_account(request: gr.Request):
+    return accounts.get(request.session_hash)
+
+# function to get the lock that serializes the requests of one session
+def session_lock(request: gr.Request):
+    with _sessions_lock:
+        return session_locks.setdefault(request.session_hash, threading.Lock())
+
+# function to release the account, lock and export files of a session whose browser tab has gone
+def close_session(request: gr.Request):
+    with _sessions_lock:
+        accounts.pop(request.session_hash, None)
+        session_locks.pop(request.session_hash, None)
+    shutil.rmtree(os.path.join(EXPORT_DIR, request.session_hash), ignore_errors=True)
 
 # function to create a new account with a given initial deposit
-def create_account(initial_deposit):
-    global account
+def create_account(initial_deposit, request: gr.Request):
     if initial_deposit <= 0:
         return "Initial deposit must be greater than zero.", "", "", "", "", ""
-    account = Account("user1", initial_deposit)
+    with session_lock(request):
+        accounts[request.session_hash] = Account(f"user-{request.session_hash}", initial_deposit)
     return (f"Account created with initial deposit ${initial_deposit:.2f}.",
             "", "", "", "", "")
 
 # function to deposit funds into the account
-def deposit(amount):
+def deposit(amount, request: gr.Request):
+    account = session_account(request)
     if account is None:
         return "Please create an account first.", ""
     try:
-        account.deposit_funds(amount)
+        with session_lock(request):
+            account.deposit_funds(amount)
         return f"Deposited ${amount:.2f}. New balance: ${account.balance:.2f}.", ""
     except Exception as e:
         return str(e), ""
 
 # function to withdraw funds from the account
-def withdraw(amount):
+def withdraw(amount, request: gr.Request):
+    account = session_account(request)
     if account is None:
         return "Please create an account first.", ""
     if amount <= 0:
         return "Withdrawal amount must be positive.", ""
-    success = account.withdraw_funds(amount)
+    with session_lock(request):
+        success = account.withdraw_funds(amount)
     if success:
         return f"Withdrew ${amount:.2f}. New balance: ${account.balance:.2f}.", ""
     else:
         return "Insufficient funds for withdrawal.", ""
 
 # function to buy shares of a symbol with given quantity
-def buy(symbol, quantity):
+def buy(symbol, quantity, request: gr.Request):
+    account = session_account(request)
     if account is None:
         return "Please create an account first.", ""
     symbol = symbol.upper()
@@ -45,7 +82,8 @@ def buy(symbol, quantity):
         return "Invalid symbol. Choose AAPL, TSLA, or GOOGL.", ""
     if quantity <= 0:
         return "Quantity must be greater than zero.", ""
-    success = account.buy_shares(symbol, quantity)
+    with session_lock(request):
+        success = account.buy_shares(symbol, quantity)
     if success:
         return (f"Bought {quantity} shares of {symbol} "
                 f"at ${get_share_price(symbol):.2f} each. "
@@ -54,7 +92,8 @@ def buy(symbol, quantity):
         return "Insufficient funds to buy shares.", ""
 
 # function to sell shares of a symbol with given quantity
-def sell(symbol, quantity):
+def sell(symbol, quantity, request: gr.Request):
+    account = session_account(request)
     if account is None:
         return "Please create an account first.", ""
     symbol = symbol.upper()
@@ -62,7 +101,8 @@ def sell(symbol, quantity):
         return "Invalid symbol. Choose AAPL, TSLA, or GOOGL.", ""
     if quantity <= 0:
         return "Quantity must be greater than zero.", ""
-    success = account.sell_shares(symbol, quantity)
+    with session_lock(request):
+        success = account.sell_shares(symbol, quantity)
     if success:
         return (f"Sold {quantity} shares of {symbol} "
                 f"at ${get_share_price(symbol):.2f} each. "
@@ -70,30 +110,56 @@ def sell(symbol, quantity):
     else:
         return "Not enough shares to sell.", ""
 
+# function to format transactions as text from a snapshot of the ledger
+def format_transactions(transactions):
+    if not transactions:
+        return "No transactions yet."
+    lines = ["Timestamp | Action | Symbol | Quantity | Price"]
+    for tx in transactions:
+        line = (f"{tx['timestamp']} | {tx['action']} | {tx['symbol']} | "
+                f"{tx['quantity']} | ${tx['price']:.2f}")
+        lines.append(line)
+    return "\n".join(lines)
+
 # function to get current account summary: holdings, portfolio value, profit/loss, and transactions
-def get_summary():
+def get_summary(request: gr.Request):
+    account = session_account(request)
     if account is None:
         return "", "", "", ""
-    holdings = account.report_holdings()
+    # one price lookup per held symbol for value and profit/loss together
+    with session_lock(request):
+        account_summary = account.get_account_summary()
+        transactions = account.transactions_view()
+    holdings = account_summary["holdings"]
     holdings_str = "Holdings:\n" + "\n".join(
         [f"{sym}: {qty}" for sym, qty in holdings.items()]) if holdings else "Holdings: None"
-    portfolio_value = account.get_portfolio_value()
-    profit_loss = account.get_profit_or_loss()
+    portfolio_value = account_summary["portfolio_value"]
+    profit_loss = account_summary["profit_or_loss"]
     profit_loss_str = f"Profit/Loss: ${profit_loss:.2f}"
-    transactions = account.report_transactions()
-    if not transactions:
-        transactions_str = "No transactions yet."
-    else:
-        lines = ["Timestamp | Action | Symbol | Quantity | Price"]
-        for tx in transactions:
-            line = (f"{tx['timestamp']} | {tx['action']} | {tx['symbol']} | "
-                    f"{tx['quantity']} | ${tx['price']:.2f}")
-            lines.append(line)
-        transactions_str = "\n".join(lines)
+    # the view is a stable snapshot, so it is formatted outside the lock while other requests trade
+    transactions_str = format_transactions(transactions)
     summary = (f"Current Balance: ${account.balance:.2f}\n"
                f"Total Portfolio Value: ${portfolio_value:.2f}\n{profit_loss_str}")
     return holdings_str, summary, transactions_str, ""
 
+# function to write the transactions to a new CSV file in the given directory for download; every
+# export gets its own file, so concurrent exports never overwrite each other
+def write_transactions(transactions, directory):
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", newline="", dir=directory, prefix="transactions-", suffix=".csv",
+                                     delete=False) as f:
+        writer = csv.DictWriter(f, fieldnames=["timestamp", "action", "symbol", "quantity", "price"])
+        writer.writeheader()
+        writer.writerows(transactions)
+    return f.name
+
+# function to export the session's transactions as CSV into the session's export directory
+def export_transactions(request: gr.Request):
+    account = session_account(request)
+    if account is None:
+        return None
+    return write_transactions(account.transactions_view(), os.path.join(EXPORT_DIR, request.session_hash))
+
 # create Gradio interface components and layout
 with gr.Blocks() as demo:
     gr.Markdown("# Trading Simulation Account Management Demo")
@@ -129,13 +195,26 @@ with gr.Blocks() as demo:
     summary_display = gr.Textbox(label="Account Summary", interactive=False, lines=4)
     transactions_display = gr.Textbox(label="Transactions", interactive=False, lines=10)
     
+    with gr.Row():
+        export_btn = gr.Button("Export Transactions (CSV)")
+        export_file = gr.File(label="Transactions CSV")
+    
     # bind buttons to respective functions with outputs connected to UI elements
     create_btn.click(create_account, inputs=initial_deposit_input,
-                     outputs=[create_output, holdings_display, summary_display, transactions_display, deposit_output, withdraw_output])
-    deposit_btn.click(deposit, inputs=deposit_input, outputs=[deposit_output, summary_display]).then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output])
-    withdraw_btn.click(withdraw, inputs=withdraw_input, outputs=[withdraw_output, summary_display]).then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output])
-    buy_btn.click(buy, inputs=[buy_symbol, buy_quantity], outputs=[buy_output, summary_display]).then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output])
-    sell_btn.click(sell, inputs=[sell_symbol, sell_quantity], outputs=[sell_output, summary_display]).then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output])
+                     outputs=[create_output, holdings_display, summary_display, transactions_display, deposit_output, withdraw_output],
+                     api_name="create_account")
+    deposit_btn.click(deposit, inputs=deposit_input, outputs=[deposit_output, summary_display], api_name="deposit").then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output], api_name="summary")
+    withdraw_btn.click(withdraw, inputs=withdraw_input, outputs=[withdraw_output, summary_display], api_name="withdraw").then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output])
+    buy_btn.click(buy, inputs=[buy_symbol, buy_quantity], outputs=[buy_output, summary_display], api_name="buy").then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output])
+    sell_btn.click(sell, inputs=[sell_symbol, sell_quantity], outputs=[sell_output, summary_display], api_name="sell").then(get_summary, inputs=None, outputs=[holdings_display, summary_display, transactions_display, sell_output])
+    export_btn.click(export_transactions, inputs=None, outputs=export_file, api_name="export",
+                     concurrency_limit=EXPORT_CONCURRENCY_LIMIT, concurrency_id="export")
+    # drop the session's account and exports when its browser tab closes
+    demo.unload(close_session)
+
+# queue every event with explicit limits: at most CONCURRENCY_LIMIT handlers per event at once and MAX_QUEUE_SIZE waiting
+demo.queue(default_concurrency_limit=CONCURRENCY_LIMIT, max_size=MAX_QUEUE_SIZE)
 
 # run the demo app
-demo.launch()
\ No newline at end of file
+if __name__ == "__main__":
+    demo.launch()
@@ -1,6 +1,6 @@
 # import unittest and the Account class from accounts module for testing
 import unittest
-from accounts import Account, get_share_price
+from accounts import Account, CachedPriceProvider, PriceProvider, StaticPriceProvider, get_share_price
 
 # test case class for the Account class functionalities
 class TestAccount(unittest.TestCase):
@@ -96,6 +96,107 @@ class TestAccount(unittest.TestCase):
         self.assertEqual(transactions_report, self.account.transactions)
         transactions_report.append({})
         self.assertNotEqual(len(transactions_report), len(self.account.transactions))  # original unchanged
+    
+    # test transactions_view is a read-only window that does not grow with later trades
+    def test_transactions_view(self):
+        self.account.buy_shares("AAPL", 2)
+        view = self.account.transactions_view()
+        self.account.sell_shares("AAPL", 1)
+        self.assertEqual(len(view), 1)
+        self.assertEqual(view[0]["action"], "BUY")
+        self.assertEqual(self.account.transactions_view(1)[0]["action"], "SELL")
+        self.assertEqual(list(self.account.transactions.column("quantity")), [2, 1])
+    
+    # test holdings_at, cash_at and profit_or_loss_at with a clock that ticks 1, 2, 3, ...
+    def test_point_in_time_queries(self):
+        ticks = iter(range(1, 1000))
+        account = Account("test123", 1000.0, clock=lambda: float(next(ticks)), checkpoint_interval=2)
+        account.buy_shares("AAPL", 2)    # t=1
+        account.deposit_funds(500.0)     # t=2
+        account.buy_shares("TSLA", 1)    # t=3
+        account.sell_shares("AAPL", 2)   # t=4
+        account.withdraw_funds(100.0)    # t=5
+        self.assertEqual(account.holdings_at(0), {})
+        self.assertEqual(account.holdings_at(3), {"AAPL": 2, "TSLA": 1})
+        self.assertEqual(account.holdings_at(4), {"TSLA": 1})
+        self.assertAlmostEqual(account.cash_at(2), 1200.0)
+        self.assertAlmostEqual(account.cash_at(5), account.balance)
+        self.assertAlmostEqual(account.profit_or_loss_at(1), 0.0)
+        self.assertAlmostEqual(account.profit_or_loss_at(1, prices={"AAPL": 160.0}), 20.0)
+        self.assertAlmostEqual(account.profit_or_loss_at(99), account.get_profit_or_loss())
+    
+    # test an account summary makes one bulk price lookup and matches the individual calls
+    def test_get_account_summary(self):
+        calls = []
+        class RecordingProvider(StaticPriceProvider):
+            def get_prices(self, symbols):
+                calls.append(list(symbols))
+                return super().get_prices(symbols)
+        account = Account("test123", 5000.0, price_provider=RecordingProvider())
+        account.buy_shares("AAPL", 2)
+        account.buy_shares("TSLA", 1)
+        calls.clear()
+        summary = account.get_account_summary()
+        self.assertEqual(calls, [["AAPL", "TSLA"]])
+        self.assertAlmostEqual(summary["portfolio_value"], account.get_portfolio_value())
+        self.assertAlmostEqual(summary["profit_or_loss"], account.get_profit_or_loss())
+    
+    # test a money scale keeps cash exact where floats drift: ten 0.1 deposits cover a 1.0 withdrawal
+    def test_fixed_point_money(self):
+        drifting = Account("float", 0.0)
+        exact = Account("cents", 0.0, money_scale=100)
+        for account in (drifting, exact):
+            for _ in range(10):
+                account.deposit_funds(0.1)
+        self.assertFalse(drifting.withdraw_funds(1.0))
+        self.assertTrue(exact.withdraw_funds(1.0))
+        self.assertEqual(exact.balance, 0.0)
+        with self.assertRaises(ValueError):
+            Account("bad", 0.0, money_scale=0)
+    
+    # test trades, valuation and history are computed in integer minor units with a money scale
+    def test_fixed_point_trades(self):
+        ticks = iter(range(1, 100))
+        account = Account("cents", 0.3, clock=lambda: float(next(ticks)), money_scale=100,
+                          price_provider=StaticPriceProvider(lambda symbol: 0.1))
+        self.assertTrue(account.buy_shares("PENNY", 3))  # 3 x 0.1 is 0.30000000000000004 as floats
+        self.assertEqual(account.balance, 0.0)
+        self.assertEqual(account.transactions._prices.tolist(), [10])
+        self.assertEqual(account.report_transactions()[0]["price"], 0.1)
+        self.assertTrue(account.sell_shares("PENNY", 1))
+        self.assertEqual(account.balance, 0.1)
+        self.assertEqual(account.get_portfolio_value(), 0.3)
+        self.assertEqual(account.get_profit_or_loss({"PENNY": 0.25}), 0.3)
+        self.assertEqual(account.cash_at(1), 0.0)
+        self.assertEqual(account.profit_or_loss_at(1, {"PENNY": 0.2}), 0.3)
+
+    # test the cached provider only asks its source again once the TTL has passed
+    def test_cached_price_provider(self):
+        now = [0.0]
+        calls = []
+        class Source(PriceProvider):
+            def get_prices(self, symbols):
+                calls.append(list(symbols))
+                return {sym: get_share_price(sym) for sym in symbols}
+        cached = CachedPriceProvider(Source(), ttl=2.0, clock=lambda: now[0])
+        self.assertEqual(cached.get_prices(["AAPL", "TSLA"]), {"AAPL": 150.0, "TSLA": 700.0})
+        self.assertEqual(cached.get_price("AAPL"), 150.0)
+        self.assertEqual(calls, [["AAPL", "TSLA"]])
+        now[0] = 3.0
+        cached.get_price("AAPL")
+        self.assertEqual(calls[-1], ["AAPL"])
+
+    # test a source that omits a symbol raises a ValueError naming it instead of a KeyError
+    def test_price_source_omits_symbol(self):
+        class Source(PriceProvider):
+            def get_prices(self, symbols):
+                return {sym: get_share_price(sym) for sym in symbols if sym != "XYZ"}
+        cached = CachedPriceProvider(Source(), ttl=2.0)
+        with self.assertRaisesRegex(ValueError, "No price for XYZ"):
+            cached.get_prices(["AAPL", "XYZ"])
+        with self.assertRaisesRegex(ValueError, "No price for XYZ"):
+            Source().get_price("XYZ")
+        self.assertEqual(cached.get_price("AAPL"), 150.0)
 
 # run the tests if this script is executed
 if __name__ == "__main__":
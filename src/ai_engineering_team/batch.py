@@ -0,0 +1,162 @@
+"""Run many requirement specs through the crew with a bounded worker pool.
+
+A spec is a JSON object with ``requirements`` and optionally ``name``,
+``module_name`` and ``class_name``. Specs come from either a JSONL file (one
+spec per line) or a directory of ``.json``/``.yaml``/``.yml`` files (one spec
+per file). Every spec gets its own crew, its own output directory under the
+output root, and its own run manifest; all crews share one LLM response
+cache. A ``summary.json`` with the status, wall time and token usage of every
+spec is written to the output root at the end.
+"""
+import argparse
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from ai_engineering_team.cache import ResponseCache
+from ai_engineering_team.crew import AiEngineeringTeam
+from ai_engineering_team.manifest import RunManifest
+from ai_engineering_team.scheduler import DagScheduler
+
+SPEC_SUFFIXES = (".json", ".yaml", ".yml")
+
+
+@dataclass
+class Spec:
+    name: str
+    requirements: str
+    module_name: str = "accounts.py"
+    class_name: str = "Account"
+
+
+@dataclass
+class SpecResult:
+    name: str
+    output_dir: str
+    status: str = "pending"
+    error: Optional[str] = None
+    wall_time: float = 0.0
+    tokens: Dict[str, int] = field(default_factory=dict)
+    tasks: Dict[str, str] = field(default_factory=dict)
+
+
+def _spec_from_dict(data: Dict[str, Any], default_name: str) -> Spec:
+    if not data.get("requirements"):
+        raise ValueError(f"Spec '{default_name}' has no requirements")
+    # The name and module name become a directory under the output root and a file in it, so
+    # neither may climb out: "." and ".." survive the character filter and are rejected
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(data.get("name") or default_name))
+    if not name.strip("."):
+        raise ValueError(f"Spec '{default_name}' has an invalid name {name!r}")
+    module_name = data.get("module_name") or "accounts.py"
+    if Path(module_name).name != module_name or not module_name.strip("."):
+        raise ValueError(f"Spec '{name}' has an invalid module_name {module_name!r} (expected a file name)")
+    return Spec(
+        name=name,
+        requirements=data["requirements"],
+        module_name=module_name,
+        class_name=data.get("class_name") or "Account",
+    )
+
+
+def load_specs(source: Path) -> List[Spec]:
+    """Load specs from a JSONL file or a directory of spec files."""
+    source = Path(source)
+    specs: List[Spec] = []
+    if source.is_dir():
+        for path in sorted(p for p in source.iterdir() if p.suffix in SPEC_SUFFIXES):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f) if path.suffix == ".json" else yaml.safe_load(f)
+            specs.append(_spec_from_dict(data, path.stem))
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if line.strip():
+                    specs.append(_spec_from_dict(json.loads(line), f"spec_{number}"))
+
+    names = [spec.name for spec in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate spec names: {', '.join(duplicates)}")
+    return specs
+
+
+def run_spec(spec: Spec, output_root: Path, cache: Optional[ResponseCache], force: bool = False) -> SpecResult:
+    output_dir = output_root / spec.name
+    result = SpecResult(name=spec.name, output_dir=str(output_dir))
+    inputs = {
+        "requirements": spec.requirements,
+        "module_name": spec.module_name,
+        "class_name": spec.class_name,
+        "output_dir": str(output_dir),
+    }
+    start = time.perf_counter()
+    try:
+        team = AiEngineeringTeam(response_cache=cache)
+        manifest = RunManifest.for_output_dir(str(output_dir), force=force)
+        scheduled = DagScheduler(manifest=manifest).run(team.crew(), inputs=inputs)
+        usage = scheduled.output.token_usage
+        result.tokens = {
+            "prompt": usage.prompt_tokens,
+            "completion": usage.completion_tokens,
+            "total": usage.total_tokens,
+        }
+        result.tasks = {name: timing.status for name, timing in scheduled.timings.items()}
+        result.status = "ok"
+    except Exception as e:
+        result.status = "failed"
+        result.error = f"{type(e).__name__}: {e}"
+    result.wall_time = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_specs(specs: List[Spec], output_root: Path, workers: int = 4, force: bool = False) -> Dict[str, Any]:
+    """Run every spec and write ``summary.json`` to ``output_root``."""
+    output_root = Path(output_root)
+    output_root.mkdir(parents=True, exist_ok=True)
+    cache = ResponseCache.from_env()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew-batch") as pool:
+        results = list(pool.map(lambda spec: run_spec(spec, output_root, cache, force), specs))
+    wall_time = time.perf_counter() - start
+
+    summary = {
+        "workers": workers,
+        "wall_time": round(wall_time, 3),
+        "succeeded": sum(r.status == "ok" for r in results),
+        "failed": sum(r.status != "ok" for r in results),
+        "total_tokens": sum(r.tokens.get("total", 0) for r in results),
+        "cache": cache.stats() if cache is not None else None,
+        "specs": [asdict(r) for r in results],
+    }
+    with open(output_root / "summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="run_batch", description=__doc__.splitlines()[0])
+    parser.add_argument("specs", type=Path, help="JSONL file or directory of spec files")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="concurrent crews (default: 4)")
+    parser.add_argument("-o", "--output-root", type=Path, default=Path("batch_output"))
+    parser.add_argument("--force", action="store_true", help="ignore run manifests and rerun every task")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    summary = run_specs(load_specs(args.specs), args.output_root, workers=args.workers, force=args.force)
+    for spec in summary["specs"]:
+        line = f"{spec['name']:<24} {spec['status']:<7} {spec['wall_time']:>8.1f}s {spec['tokens'].get('total', 0):>8} tokens"
+        print(line + (f"  {spec['error']}" if spec["error"] else ""))
+    print(
+        f"{summary['succeeded']} succeeded, {summary['failed']} failed in {summary['wall_time']:.1f}s "
+        f"with {args.workers} workers; summary written to {args.output_root / 'summary.json'}"
+    )
+    return 1 if summary["failed"] else 0
@@ -0,0 +1,237 @@
+"""Persistent, content-addressed cache of LLM responses.
+
+Every agent call is keyed by the agent's rendered config, the model, the
+rendered prompt and a hash of the task context it was given. Re-running the
+crew with unchanged ``requirements``/``module_name``/``class_name`` therefore
+replays the previous responses from disk instead of calling the model.
+
+The cache is controlled from the environment:
+
+- ``CREW_CACHE``: ``on`` (default), ``off``, or ``replay``. Replay mode never
+  writes and raises ``CacheMissError`` on a miss, which is what CI wants.
+- ``CREW_CACHE_DIR``: where entries live (default ``.crew_cache``).
+- ``CREW_CACHE_MAX_MB`` / ``CREW_CACHE_MAX_AGE_DAYS``: eviction limits.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from crewai import BaseLLM
+
+MODES = ("on", "off", "replay")
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+
+class ResponseCache:
+    """On-disk store of responses with size- and age-based eviction.
+
+    Entries are JSON files named after the SHA-256 of their key. Reads touch
+    the file's mtime so that size eviction drops the least recently used
+    entries first.
+    """
+
+    # Re-check the limits after this many writes, in addition to on startup
+    EVICT_EVERY = 64
+
+    def __init__(
+        self,
+        directory: str = ".crew_cache",
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age: float = 30 * 24 * 3600,
+        read_only: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if not read_only:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.evict()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        mode = os.getenv("CREW_CACHE", "on").lower()
+        if mode not in MODES:
+            raise ValueError(f"CREW_CACHE must be one of {', '.join(MODES)}, got '{mode}'")
+        if mode == "off":
+            return None
+        return cls(
+            directory=os.getenv("CREW_CACHE_DIR", ".crew_cache"),
+            max_bytes=int(float(os.getenv("CREW_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            max_age=float(os.getenv("CREW_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+            read_only=mode == "replay",
+        )
+
+    @staticmethod
+    def key(agent_config: Dict[str, Any], model: str, prompt: Any, context: Optional[str]) -> str:
+        context_hash = hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+        payload = json.dumps(
+            {"agent": agent_config, "model": model, "prompt": prompt, "context": context_hash},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if entry is not None and time.time() - entry["created"] > self.max_age:
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        if not self.read_only:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return entry["response"]
+
+    def put(self, key: str, response: str, **metadata: Any) -> None:
+        if self.read_only:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"created": time.time(), "response": response, **metadata}
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self.writes += 1
+            due = self.writes % self.EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used until under ``max_bytes``."""
+        now = time.time()
+        entries: List[tuple] = []
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+# Providers whose prefix CrewAI's native LLM classes drop from the configured name: LLM("openai/gpt-4o")
+# reports its model as "gpt-4o". Models routed through LiteLLM keep the full name.
+NATIVE_PROVIDERS = ("openai", "anthropic", "claude", "azure", "azure_openai", "google", "gemini", "bedrock", "aws")
+
+
+def model_name(model: str) -> str:
+    """Model name calls are keyed under, the same whether given as configured or as ``LLM(model).model``."""
+    provider, _, name = model.partition("/")
+    return name if name and provider.lower() in NATIVE_PROVIDERS else model
+
+
+def call_key(model: str, messages: Any, from_task=None, from_agent=None, temperature: Optional[float] = None) -> str:
+    """Cache key of one LLM call as made by an agent executor."""
+    agent_config = {
+        "role": getattr(from_agent, "role", None),
+        "goal": getattr(from_agent, "goal", None),
+        "backstory": getattr(from_agent, "backstory", None),
+        "temperature": temperature,
+    }
+    return ResponseCache.key(agent_config, model_name(model), messages, getattr(from_task, "prompt_context", None))
+
+
+class CachedLLM(BaseLLM):
+    """Wraps an LLM so that identical calls are answered from a ``ResponseCache``."""
+
+    def __init__(self, llm: BaseLLM, cache: ResponseCache):
+        super().__init__(model=llm.model, temperature=llm.temperature)
+        self.llm = llm
+        self.cache = cache
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        key = call_key(self.model, messages, from_task, from_agent, self.temperature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if self.cache.read_only:
+            raise CacheMissError(f"No recorded response for {self.model} call from '{getattr(from_agent, 'role', None)}'")
+
+        self.llm.stop = self.stop
+        response = self.llm.call(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            from_task=from_task,
+            from_agent=from_agent,
+            response_model=response_model,
+        )
+        if isinstance(response, str):
+            self.cache.put(key, response, model=self.model)
+        return response
+
+    def supports_stop_words(self) -> bool:
+        return self.llm.supports_stop_words()
+
+    def supports_function_calling(self) -> bool:
+        return self.llm.supports_function_calling()
+
+    def get_context_window_size(self) -> int:
+        return self.llm.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.llm.get_token_usage_summary()
@@ -0,0 +1,201 @@
+"""Shrink upstream task output before it is passed on as context.
+
+``frontend_task`` and ``testing_task`` only need to know how to *call* the
+module written by ``coding_task``, not how each method is implemented.
+``public_api`` parses the generated module with ``ast`` and keeps the public
+surface: module docstring and imports, public constants, classes and
+functions with their signatures, docstrings, the comment line above each
+definition and the exceptions each function raises. Bodies are replaced with
+``...``, except for short module-level functions and static methods such as
+``get_share_price``, which are kept whole because callers and tests depend on
+what they return. A stubbed ``__init__`` keeps its ``self.<attribute> = ...``
+assignments, because the app and the tests read those attributes directly.
+
+A task opts in with ``context_compaction: signatures`` in tasks.yaml.
+Output that is not valid Python, or has no public definitions (e.g. the
+markdown design), is passed on unchanged.
+"""
+import ast
+from typing import List, Optional, Set
+
+MODES = ("signatures",)
+# Module-level functions and static methods up to this many lines keep their body
+SHORT_FUNCTION_LINES = 12
+
+
+def _is_public(name: str) -> bool:
+    return not name.startswith("_") or (name.startswith("__") and name.endswith("__"))
+
+
+def _raised(node: ast.AST) -> List[str]:
+    """Names of the exceptions raised directly in a function body."""
+    found: List[str] = []
+    seen: Set[str] = set()
+    for child in ast.walk(node):
+        if not isinstance(child, ast.Raise) or child.exc is None:
+            continue
+        exc = child.exc.func if isinstance(child.exc, ast.Call) else child.exc
+        name = ast.unparse(exc)
+        if name not in seen:
+            seen.add(name)
+            found.append(name)
+    return found
+
+
+def _comment_above(node, source_lines: List[str], indent: str) -> List[str]:
+    first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+    above = source_lines[first - 2].strip() if first >= 2 else ""
+    return [f"{indent}{above}"] if above.startswith("#") else []
+
+
+def _keeps_body(node, in_class: bool) -> bool:
+    if in_class and not any(isinstance(d, ast.Name) and d.id == "staticmethod" for d in node.decorator_list):
+        return False
+    return node.end_lineno - node.lineno < SHORT_FUNCTION_LINES
+
+
+def _docstring(docstring: str, indent: str) -> str:
+    """A docstring literal whose continuation lines are indented to sit under ``indent``."""
+    lines = docstring.replace('"""', r'\"\"\"').splitlines()
+    body = "\n".join([lines[0]] + [f"{indent}{line}" if line else "" for line in lines[1:]])
+    return f'{indent}"""{body}"""'
+
+
+def _instance_attributes(node) -> List[str]:
+    """The ``self.<public name> = ...`` assignments of a method, first one per attribute.
+
+    These are how callers see an instance's data model, so a stubbed ``__init__`` keeps them.
+    """
+    found: List[str] = []
+    seen: Set[str] = set()
+    pending = list(node.body)
+    while pending:
+        child = pending.pop(0)
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(child, (ast.Assign, ast.AnnAssign)):
+            targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+            targets = [e for t in targets for e in (t.elts if isinstance(t, (ast.Tuple, ast.List)) else [t])]
+            names = [
+                t.attr for t in targets
+                if isinstance(t, ast.Attribute) and isinstance(t.value, ast.Name) and t.value.id == "self"
+                and _is_public(t.attr)
+            ]
+            if names and not seen.intersection(names) and len(names) == len(targets):
+                seen.update(names)
+                found.append(ast.unparse(child))
+        pending.extend(ast.iter_child_nodes(child))
+    return found
+
+
+def _whole_function(node, indent: str, source: str, source_lines: List[str]) -> List[str]:
+    lines = _comment_above(node, source_lines, indent)
+    lines += [f"{indent}@{ast.unparse(d)}" for d in node.decorator_list]
+    lines.append(ast.get_source_segment(source, node, padded=True) or ast.unparse(node))
+    return lines
+
+
+def _stub_function(node, indent: str, source_lines: List[str]) -> List[str]:
+    lines = _comment_above(node, source_lines, indent)
+    lines += [f"{indent}@{ast.unparse(d)}" for d in node.decorator_list]
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    lines.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}:")
+    docstring = ast.get_docstring(node)
+    if docstring:
+        lines.append(_docstring(docstring, indent + "    "))
+    raised = _raised(node)
+    if raised:
+        lines.append(f"{indent}    # raises {', '.join(raised)}")
+    if node.name == "__init__":
+        lines.extend(f"{indent}    {assignment}" for assignment in _instance_attributes(node))
+    lines.append(f"{indent}    ...")
+    return lines
+
+
+def _stub_class(node: ast.ClassDef, indent: str, source: str, source_lines: List[str]) -> List[str]:
+    lines = _comment_above(node, source_lines, indent)
+    lines += [f"{indent}@{ast.unparse(d)}" for d in node.decorator_list]
+    bases = ", ".join(ast.unparse(b) for b in node.bases + node.keywords)
+    lines.append(f"{indent}class {node.name}({bases}):" if bases else f"{indent}class {node.name}:")
+    docstring = ast.get_docstring(node)
+    body: List[str] = [_docstring(docstring, indent + "    ")] if docstring else []
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_public(item.name):
+            if _keeps_body(item, in_class=True):
+                body.extend(_whole_function(item, indent + "    ", source, source_lines))
+            else:
+                body.extend(_stub_function(item, indent + "    ", source_lines))
+        elif isinstance(item, ast.ClassDef) and _is_public(item.name):
+            body.extend(_stub_class(item, indent + "    ", source, source_lines))
+        elif isinstance(item, (ast.Assign, ast.AnnAssign)) and _public_constant(item):
+            body.append(indent + "    " + ast.unparse(item))
+    return lines + (body or [f"{indent}    ..."])
+
+
+def _public_constant(node) -> bool:
+    """Whether an assignment defines public constants: UPPER_CASE names or a literal value.
+
+    Other assignments such as ``account = Account(...)`` are module state, not API.
+    A bare annotation (e.g. a dataclass field) counts as a declaration and is kept.
+    """
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    if not all(isinstance(t, ast.Name) and _is_public(t.id) for t in targets):
+        return False
+    if node.value is None or all(t.id.isupper() for t in targets):
+        return True
+    try:
+        ast.literal_eval(node.value)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return False
+    return True
+
+
+def public_api(source: str) -> Optional[str]:
+    """Return the public API of a Python module.
+
+    Returns None if the source does not parse or defines no public class or
+    function.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    source_lines = source.splitlines()
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    if not any(isinstance(node, definitions) and _is_public(node.name) for node in tree.body):
+        return None
+
+    lines: List[str] = []
+    docstring = ast.get_docstring(tree)
+    if docstring:
+        lines.append(_docstring(docstring, ""))
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(ast.unparse(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_public(node.name):
+            lines.append("")
+            if _keeps_body(node, in_class=False):
+                lines.extend(_whole_function(node, "", source, source_lines))
+            else:
+                lines.extend(_stub_function(node, "", source_lines))
+        elif isinstance(node, ast.ClassDef) and _is_public(node.name):
+            lines.append("")
+            lines.extend(_stub_class(node, "", source, source_lines))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and _public_constant(node):
+            lines.append(ast.unparse(node))
+    return "\n".join(lines).strip() + "\n"
+
+
+def compact(text: str, mode: str) -> str:
+    """Apply a ``context_compaction`` mode to one upstream output."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown context_compaction '{mode}' (expected one of: {', '.join(MODES)})")
+    summary = public_api(text)
+    if summary is None:
+        return text
+    return (
+        "Public API of the generated module (method bodies omitted):\n"
+        + summary
+    )
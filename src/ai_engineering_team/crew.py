@@ -1,7 +1,15 @@
-from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai import LLM, Agent, Crew, Process, Task
+from crewai.project import CrewBase, after_kickoff, agent, before_kickoff, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+import os
+from typing import Any, Dict, List, Optional
+
+from ai_engineering_team.cache import CachedLLM, ResponseCache
+from ai_engineering_team.knowledge import KnowledgeIndex
+from ai_engineering_team.offline_llm import OfflineLLM, is_offline
+from ai_engineering_team.telemetry import TraceRecorder
+from ai_engineering_team.tools.knowledge_tool import KnowledgeSearchTool
+from ai_engineering_team.tools.sandbox_tool import PooledCodeInterpreterTool
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
 # https://docs.crewai.com/concepts/crews#example-crew-class-with-decorators
@@ -13,11 +21,43 @@ class AiEngineeringTeam():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    def __init__(self, response_cache: Optional[ResponseCache] = None):
+        # Shared by every agent so hit/miss counters cover the whole run
+        self.response_cache = response_cache if response_cache is not None else ResponseCache.from_env()
+        self.trace: Optional[TraceRecorder] = None
+        # BM25 index over knowledge/, refreshed incrementally; None when the directory is empty
+        self.knowledge = KnowledgeIndex.from_env()
+
+    def _llm(self, name: str):
+        # Offline stand-in when selected, else the configured model wrapped in the response cache;
+        # None keeps the `llm:` from agents.yaml
+        model = self.agents_config[name]['llm'] # type: ignore[index]
+        if is_offline(model):
+            return OfflineLLM.from_env(model)
+        if self.response_cache is None:
+            return None
+        return CachedLLM(LLM(model=model), self.response_cache)
+
+    def _tools(self) -> List[Any]:
+        # Agents look up the top-k knowledge chunks they need instead of getting whole files
+        if self.knowledge is None:
+            return []
+        return [KnowledgeSearchTool(index=self.knowledge, top_k=int(os.getenv("CREW_KNOWLEDGE_TOP_K", "4")))]
+
+    def _code_execution(self) -> Dict[str, Any]:
+        # CREW_CODE_EXECUTION=pooled runs snippets in the warm local sandbox pool instead of
+        # CrewAI's Docker-backed interpreter; "safe" (default) and "unsafe" are CrewAI's modes
+        mode = os.getenv("CREW_CODE_EXECUTION", "safe").lower()
+        if mode == "pooled":
+            return {"tools": self._tools() + [PooledCodeInterpreterTool()]}
+        return {"tools": self._tools(), "allow_code_execution": True, "code_execution_mode": mode}
 
     @agent
     def engineering_lead(self) -> Agent:
         return Agent(
             config=self.agents_config['engineering_lead'], # type: ignore[index]
+            llm=self._llm('engineering_lead'),
+            tools=self._tools(),
             verbose=True
         )
 
@@ -25,9 +65,9 @@ class AiEngineeringTeam():
     def backend_engineer(self) -> Agent:
         return Agent(
             config=self.agents_config['backend_engineer'], # type: ignore[index]
+            llm=self._llm('backend_engineer'),
             verbose=True,
-            allow_code_execution=True,
-            code_execution_mode="safe",
+            **self._code_execution(),
             max_execution_time=240,
             max_retries=5
         )
@@ -36,6 +76,8 @@ class AiEngineeringTeam():
     def frontend_engineer(self) -> Agent:
         return Agent(
             config=self.agents_config['frontend_engineer'], # type: ignore[index]
+            llm=self._llm('frontend_engineer'),
+            tools=self._tools(),
             verbose=True
         )
     
@@ -43,13 +85,28 @@ class AiEngineeringTeam():
     def test_engineer(self) -> Agent:
         return Agent(
             config=self.agents_config['test_engineer'], # type: ignore[index]
+            llm=self._llm('test_engineer'),
             verbose=True,
-            allow_code_execution=True,
-            code_execution_mode="safe",
+            **self._code_execution(),
             max_execution_time=240,
             max_retries=5
         )
 
+    @before_kickoff
+    def start_trace(self, inputs):
+        # Record every LLM call of this run to a JSONL trace (CREW_TRACE=off to disable)
+        self.trace = TraceRecorder.from_env(self.crew())
+        if self.trace is not None:
+            self.trace.start()
+        return inputs
+
+    @after_kickoff
+    def finish_trace(self, result):
+        # Append one record per task and close the trace file
+        if self.trace is not None:
+            self.trace.finish()
+        return result
+
     # To learn more about structured task outputs,
     # task dependencies, and task callbacks, check out the documentation:
     # https://docs.crewai.com/concepts/tasks#overview-of-a-task
@@ -0,0 +1,199 @@
+"""Local BM25 index over the ``knowledge/`` directory.
+
+Files under ``knowledge/`` (``.txt``, ``.md``, ``.rst``, ``.py``, ...) are split
+into chunks of a few paragraphs and indexed with BM25, so agents get only the
+few chunks relevant to what they are working on instead of every document in
+every prompt. The index is persisted as JSON (``.knowledge_index.json`` by
+default) and refreshed incrementally: a file is re-chunked only when its
+mtime or size changed *and* its content hash differs; removed files are
+dropped. Refreshing an unchanged tree of hundreds of files costs one ``stat``
+per file.
+
+The agents query the index through ``tools/knowledge_tool.py``.
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+INDEX_VERSION = 1
+TEXT_SUFFIXES = {".txt", ".md", ".markdown", ".rst", ".py", ".json", ".yaml", ".yml", ".csv"}
+TOKEN = re.compile(r"[a-z0-9_]+")
+
+# Standard BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def chunk_text(text: str, max_words: int = 200) -> List[str]:
+    """Split on blank lines and merge paragraphs up to ``max_words`` words."""
+    chunks: List[str] = []
+    current: List[str] = []
+    words = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        size = len(paragraph.split())
+        if current and words + size > max_words:
+            chunks.append("\n\n".join(current))
+            current, words = [], 0
+        current.append(paragraph)
+        words += size
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+@dataclass
+class Hit:
+    source: str
+    text: str
+    score: float
+
+
+class KnowledgeIndex:
+    """BM25 index over a directory, persisted to ``index_path``."""
+
+    def __init__(
+        self,
+        directory: str = "knowledge",
+        index_path: str = ".knowledge_index.json",
+        max_words: int = 200,
+    ):
+        self.directory = Path(directory)
+        self.index_path = Path(index_path)
+        self.max_words = max_words
+        self._lock = threading.Lock()
+        # relative path -> {"mtime", "size", "sha256", "chunks": [{"text", "tf", "length"}]}
+        self.files: Dict[str, Dict] = {}
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._chunks: List[Tuple[str, str, int]] = []  # (source, text, length)
+        self._avg_length = 0.0
+        self.reindexed: List[str] = []
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional["KnowledgeIndex"]:
+        """Index configured by ``CREW_KNOWLEDGE*`` variables, refreshed; None if disabled or empty."""
+        if os.getenv("CREW_KNOWLEDGE", "on").lower() == "off":
+            return None
+        index = cls(
+            os.getenv("CREW_KNOWLEDGE_DIR", "knowledge"),
+            os.getenv("CREW_KNOWLEDGE_INDEX", ".knowledge_index.json"),
+        )
+        if not index.directory.is_dir():
+            return None
+        index.refresh()
+        return index if index._chunks else None
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("max_words") == self.max_words:
+            self.files = data.get("files", {})
+            self._build()
+
+    def _save(self) -> None:
+        data = {"version": INDEX_VERSION, "max_words": self.max_words, "files": self.files}
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.index_path.parent, prefix=".knowledge-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.index_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _index_file(self, path: Path, stat: os.stat_result, digest: str, text: str) -> Dict:
+        chunks = []
+        for chunk in chunk_text(text, self.max_words):
+            tokens = tokenize(chunk)
+            if tokens:
+                chunks.append({"text": chunk, "tf": dict(Counter(tokens)), "length": len(tokens)})
+        return {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest, "chunks": chunks}
+
+    def refresh(self) -> List[str]:
+        """Bring the index up to date with the directory; returns the re-indexed files."""
+        with self._lock:
+            seen = set()
+            changed: List[str] = []
+            touched = False
+            for path in sorted(self.directory.rglob("*")):
+                if not path.is_file() or path.suffix.lower() not in TEXT_SUFFIXES:
+                    continue
+                name = path.relative_to(self.directory).as_posix()
+                seen.add(name)
+                stat = path.stat()
+                entry = self.files.get(name)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    continue
+                raw = path.read_bytes()
+                digest = hashlib.sha256(raw).hexdigest()
+                if entry and entry["sha256"] == digest:
+                    # Touched but not edited: keep the chunks, remember the new mtime
+                    entry["mtime"] = stat.st_mtime
+                    touched = True
+                    continue
+                self.files[name] = self._index_file(path, stat, digest, raw.decode("utf-8", errors="replace"))
+                changed.append(name)
+
+            removed = set(self.files) - seen
+            for name in removed:
+                del self.files[name]
+            if changed or removed:
+                self._build()
+            if changed or removed or touched:
+                self._save()
+            self.reindexed = changed
+            return changed
+
+    def _build(self) -> None:
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        chunks: List[Tuple[str, str, int]] = []
+        for name in sorted(self.files):
+            for chunk in self.files[name]["chunks"]:
+                chunk_id = len(chunks)
+                chunks.append((name, chunk["text"], chunk["length"]))
+                for term, count in chunk["tf"].items():
+                    postings.setdefault(term, []).append((chunk_id, count))
+        self._postings = postings
+        self._chunks = chunks
+        self._avg_length = sum(length for _, _, length in chunks) / len(chunks) if chunks else 0.0
+
+    def search(self, query: str, k: int = 4) -> List[Hit]:
+        """Top-``k`` chunks for ``query`` by BM25 score."""
+        total = len(self._chunks)
+        if not total:
+            return []
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                length = self._chunks[chunk_id][2]
+                norm = tf + K1 * (1 - B + B * length / self._avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (K1 + 1) / norm
+        best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [Hit(self._chunks[i][0], self._chunks[i][1], score) for i, score in best]
+
+    def stats(self) -> Dict[str, int]:
+        return {"files": len(self.files), "chunks": len(self._chunks), "terms": len(self._postings)}
@@ -4,7 +4,8 @@ import warnings
 
 from datetime import datetime
 
-from ai_engineering_team.crew import AiEngineeringTeam
+# The crew (and with it crewai, litellm and pydantic) is imported inside the
+# entry points that actually run it, so --dry-run and validate start instantly.
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -26,21 +27,90 @@ The system should prevent the user from withdrawing funds that would leave them
  """
 module_name = "accounts.py"
 class_name = "Account"
+output_dir = "output"
+
+def _inputs():
+    return {
+        'requirements': requirements,
+        'module_name': module_name or "accounts.py",
+        'class_name': class_name or "Account",
+        'output_dir': output_dir or "output"
+    }
+
+
+def validate():
+    """
+    Check agents.yaml/tasks.yaml against crew.py and the inputs without running the crew.
+    """
+    from ai_engineering_team.validate import report
+
+    sys.exit(report(_inputs()))
+
 
 def run():
     """
     Run the crew.
     """
-    inputs = {
-        'requirements': requirements,
-        'module_name': module_name or "accounts.py",
-        'class_name': class_name or "Account"
-    }
+    if "--dry-run" in sys.argv[1:]:
+        validate()
+
+    from ai_engineering_team.crew import AiEngineeringTeam
+    from ai_engineering_team.manifest import RunManifest
+    from ai_engineering_team.scheduler import DagScheduler
 
+    inputs = _inputs()
+    team = AiEngineeringTeam()
+    # Tasks whose prompt, agent and upstream outputs are unchanged reuse their file in output/
+    manifest = RunManifest.for_output_dir(inputs['output_dir'], force="--force" in sys.argv[1:])
     try:
-        AiEngineeringTeam().crew().kickoff(inputs=inputs)
+        # Tasks run as soon as the tasks in their `context:` have finished
+        result = DagScheduler(manifest=manifest).run(team.crew(), inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
+    print(result.report())
+    if team.response_cache is not None:
+        print(f"LLM response cache: {team.response_cache.stats()}")
+    from ai_engineering_team.sandbox import shared_pool
+
+    pool = shared_pool(create=False)
+    if pool is not None:
+        print(f"Code sandbox: {pool.stats()}")
+
+    from ai_engineering_team.verification import ResultCache, enabled, verify_output
+
+    if enabled(sys.argv[1:]):
+        # Optional last stage: syntax-check the generated files and run the generated tests
+        verification = verify_output(inputs['output_dir'], inputs['module_name'], cache=ResultCache.from_env())
+        print(verification.render())
+        if not verification.ok:
+            sys.exit(1)
+
+
+def verify():
+    """
+    Syntax-check an output directory and run its generated tests, with cached results.
+    """
+    from ai_engineering_team.verification import main
+
+    sys.exit(main())
+
+
+def run_batch():
+    """
+    Run every spec in a JSONL file or directory through its own crew.
+    """
+    from ai_engineering_team.batch import main
+
+    sys.exit(main())
+
+
+def trace_summary():
+    """
+    Summarize run traces into p50/p95 latency, tokens and cost per task.
+    """
+    from ai_engineering_team.telemetry import main
+
+    sys.exit(main())
 
 
 # def train():
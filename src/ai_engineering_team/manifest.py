@@ -0,0 +1,96 @@
+"""Run manifest for incremental regeneration.
+
+For every task the manifest records a hash of its rendered description and
+expected output, of its agent's config, and of the upstream outputs it was
+given as context. On the next run a task whose three hashes are unchanged,
+and whose ``output_file`` is still on disk, is skipped and the file is reused
+as its output. Tasks that do run get the reason recorded next to their entry.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+MANIFEST_NAME = ".run_manifest.json"
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def task_fingerprint(task, context: str) -> Dict[str, str]:
+    """Hash the inputs that determine a task's output."""
+    agent = task.agent
+    llm = getattr(agent, "llm", None)
+    return {
+        "description": _digest([task.description, task.expected_output]),
+        "agent": _digest(
+            {
+                "role": agent.role,
+                "goal": agent.goal,
+                "backstory": agent.backstory,
+                "model": getattr(llm, "model", llm),
+            }
+        ),
+        "upstream": _digest(context),
+    }
+
+
+class RunManifest:
+    """JSON manifest kept in the crew's output directory."""
+
+    def __init__(self, path: Path, force: bool = False):
+        self.path = Path(path)
+        self.force = force
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries: Dict[str, Dict[str, Any]] = json.load(f).get("tasks", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @classmethod
+    def for_output_dir(cls, output_dir: str, force: bool = False) -> "RunManifest":
+        return cls(Path(output_dir) / MANIFEST_NAME, force=force)
+
+    def check(self, name: str, fingerprint: Dict[str, str], output_file: Optional[str]) -> Tuple[bool, str]:
+        """Return ``(reusable, reason)`` for a task about to run."""
+        if self.force:
+            return False, "forced rerun"
+        previous = self.entries.get(name)
+        if previous is None:
+            return False, "no previous run"
+        changed = [part for part, digest in fingerprint.items() if previous["fingerprint"].get(part) != digest]
+        if changed:
+            labels = {
+                "description": "description changed",
+                "agent": "agent config changed",
+                "upstream": "upstream output changed",
+            }
+            return False, ", ".join(labels[part] for part in changed)
+        if not output_file or not os.path.exists(output_file):
+            return False, "output file missing"
+        return True, "unchanged"
+
+    def record(self, name: str, fingerprint: Dict[str, str], output_file: Optional[str], status: str, reason: str) -> None:
+        with self._lock:
+            self.entries[name] = {
+                "fingerprint": fingerprint,
+                "output_file": output_file,
+                "status": status,
+                "reason": reason,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"tasks": self.entries}, f, indent=2)
+        os.replace(tmp, self.path)
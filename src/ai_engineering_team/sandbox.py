@@ -0,0 +1,365 @@
+"""Pool of pre-warmed subprocess interpreters for agent code execution.
+
+CrewAI's ``code_execution_mode="safe"`` starts a Docker container for every
+snippet, which is slow and needs a container runtime. ``SandboxPool`` keeps a
+few isolated (``python -I``) worker processes running instead and hands each
+snippet to an idle one. Every worker runs under CPU-time and address-space
+limits, and the parent enforces a wall-clock timeout by killing and replacing
+the worker. Each snippet gets fresh globals and a fresh temporary working
+directory. On POSIX it runs in a child forked from the warm worker, which is
+thrown away afterwards, so changes to the environment, modules or builtins
+never reach the next snippet. Without ``fork`` the worker undoes those changes
+itself. Workers are recycled after ``max_tasks`` snippets.
+
+This is process isolation with resource limits, not a security boundary of
+the same strength as a container; it is meant for checking generated code.
+"""
+import atexit
+import json
+import os
+import queue
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: run without rlimits
+    resource = None
+
+_HEADER = struct.Struct(">I")
+# Keys every reply from a worker carries
+REPLY_KEYS = {"stdout", "stderr", "error", "exec_time"}
+
+WORKER_SOURCE = r'''
+import builtins, contextlib, io, json, os, shutil, struct, sys, tempfile, time, traceback
+try:
+    import resource
+except ImportError:
+    resource = None
+
+HEADER = struct.Struct(">I")
+proto_in = os.fdopen(os.dup(0), "rb")
+proto_out = os.fdopen(os.dup(1), "wb")
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+os.dup2(devnull, 1)
+cpu_seconds = float(sys.argv[1])
+home = os.getcwd()
+base_path = list(sys.path)
+
+def read():
+    header = proto_in.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    return json.loads(proto_in.read(HEADER.unpack(header)[0]))
+
+def write(message):
+    data = json.dumps(message).encode()
+    proto_out.write(HEADER.pack(len(data)) + data)
+    proto_out.flush()
+
+def limit_cpu(used):
+    # CPU-time limit of cpu_seconds beyond the `used` seconds this process has already spent
+    if resource is None or cpu_seconds <= 0:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(used + cpu_seconds) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+
+def execute(code, workdir):
+    # Run one snippet in `workdir`; returns the reply
+    os.chdir(workdir)
+    sys.path[:] = [workdir] + base_path
+    stdout, stderr = io.StringIO(), io.StringIO()
+    error = None
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exec(compile(code, "<snippet>", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"SystemExit: {e.code}"
+    except BaseException:
+        error = traceback.format_exc(limit=-5)
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "error": error,
+            "exec_time": time.perf_counter() - start}
+
+def run_forked(code, workdir):
+    # Run the snippet in a child forked from this warm process and discard the child, so nothing the
+    # snippet changes (environment, modules, builtins, ...) reaches the next one
+    read_end, write_end = os.pipe()
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_end)
+            limit_cpu(0)
+            data = json.dumps(execute(code, workdir)).encode()
+            with os.fdopen(write_end, "wb") as out:
+                out.write(data)
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    try:
+        reply = json.loads(data)
+    except ValueError:
+        reply = None
+    if not isinstance(reply, dict):
+        reply = {"stdout": "", "stderr": "", "error": "Snippet process died (CPU or memory limit exceeded?)",
+                 "exec_time": time.perf_counter() - start}
+    return reply
+
+def run_in_place(code, workdir):
+    # Without fork: run the snippet here, then undo what it changed in the environment, builtins and
+    # the modules this process started with. Modules the snippet imported stay loaded, except its own
+    # from the workdir, since extension modules such as NumPy cannot be loaded twice
+    environ, builtin_names = dict(os.environ), dict(builtins.__dict__)
+    modules = dict(sys.modules)
+    usage = resource.getrusage(resource.RUSAGE_SELF) if resource is not None else None
+    limit_cpu(usage.ru_utime + usage.ru_stime if usage is not None else 0)
+    reply = execute(code, workdir)
+    if dict(os.environ) != environ:
+        os.environ.clear()
+        os.environ.update(environ)
+    builtins.__dict__.clear()
+    builtins.__dict__.update(builtin_names)
+    for name, module in modules.items():
+        if sys.modules.get(name) is not module:
+            sys.modules[name] = module
+    for name in set(sys.modules) - set(modules):
+        module_file = getattr(sys.modules[name], "__file__", None) or ""
+        if module_file.startswith(workdir):
+            del sys.modules[name]
+    return reply
+
+write({"ready": True})
+while True:
+    request = read()
+    if request is None:
+        break
+    workdir = tempfile.mkdtemp(prefix="sandbox-")
+    reply = (run_forked if hasattr(os, "fork") else run_in_place)(request["code"], workdir)
+    os.chdir(home)
+    sys.path[:] = base_path
+    shutil.rmtree(workdir, ignore_errors=True)
+    write(reply)
+'''
+
+
+@dataclass
+class SandboxResult:
+    stdout: str
+    stderr: str
+    error: Optional[str]
+    queue_time: float
+    exec_time: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def render(self) -> str:
+        parts = [self.stdout.rstrip()]
+        if self.stderr.strip():
+            parts.append(self.stderr.rstrip())
+        if self.error:
+            parts.append(self.error.rstrip())
+        return "\n".join(part for part in parts if part) or "(no output)"
+
+
+class _Worker:
+    def __init__(self, cpu_seconds: float, memory_mb: int):
+        def limit() -> None:
+            if resource is None:
+                return
+            if memory_mb > 0:
+                limit_bytes = memory_mb * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+            os.setsid()
+
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", "-c", WORKER_SOURCE, str(cpu_seconds)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            preexec_fn=limit if os.name == "posix" else None,
+        )
+        self.tasks = 0
+        self._buffer = b""
+        self.receive(timeout=30)
+
+    def send(self, message: Dict) -> None:
+        data = json.dumps(message).encode()
+        self.process.stdin.write(_HEADER.pack(len(data)) + data)
+        self.process.stdin.flush()
+
+    def receive(self, timeout: float) -> Dict:
+        deadline = time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        while True:
+            if len(self._buffer) >= _HEADER.size:
+                size = _HEADER.unpack(self._buffer[:_HEADER.size])[0]
+                if len(self._buffer) >= _HEADER.size + size:
+                    payload = self._buffer[_HEADER.size:_HEADER.size + size]
+                    self._buffer = self._buffer[_HEADER.size + size:]
+                    return json.loads(payload)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if readable:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise EOFError
+                self._buffer += chunk
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def kill(self) -> None:
+        # The worker leads its own process group on POSIX; kill the whole group so a snippet
+        # process forked from it goes too
+        if self.alive():
+            try:
+                if os.name == "posix" and resource is not None:
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                else:
+                    self.process.kill()
+            except ProcessLookupError:
+                pass
+        self.process.wait()
+
+
+class SandboxPool:
+    """Fixed-size pool of warm sandbox workers.
+
+    ``run`` blocks until a worker is free; the time spent waiting is reported
+    as ``queue_time`` and the time inside the worker as ``exec_time``.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout: float = 60.0,
+        cpu_seconds: float = 30.0,
+        memory_mb: int = 512,
+        max_tasks: int = 50,
+    ):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_tasks = max_tasks
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._queue_times: List[float] = []
+        self._exec_times: List[float] = []
+        self.restarts = 0
+        self.closed = False
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    @classmethod
+    def from_env(cls) -> "SandboxPool":
+        return cls(
+            workers=int(os.getenv("CREW_SANDBOX_WORKERS", "2")),
+            timeout=float(os.getenv("CREW_SANDBOX_TIMEOUT", "60")),
+            cpu_seconds=float(os.getenv("CREW_SANDBOX_CPU_SECONDS", "30")),
+            memory_mb=int(os.getenv("CREW_SANDBOX_MEMORY_MB", "512")),
+        )
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.cpu_seconds, self.memory_mb)
+
+    def run(self, code: str, timeout: Optional[float] = None) -> SandboxResult:
+        if self.closed:
+            raise RuntimeError("SandboxPool is closed")
+        requested = time.perf_counter()
+        worker = self._idle.get()
+        queue_time = time.perf_counter() - requested
+        try:
+            worker.send({"code": code})
+            reply = worker.receive(timeout or self.timeout)
+            if not isinstance(reply, dict) or not REPLY_KEYS <= reply.keys():
+                raise ValueError(f"malformed reply {reply!r:.80}")
+        except TimeoutError:
+            reply = {"stdout": "", "stderr": "", "error": f"Timed out after {timeout or self.timeout:.0f}s", "exec_time": timeout or self.timeout}
+            worker = self._replace(worker)
+        except (EOFError, BrokenPipeError, OSError):
+            reply = {"stdout": "", "stderr": "", "error": "Sandbox worker died (CPU or memory limit exceeded?)", "exec_time": time.perf_counter() - requested - queue_time}
+            worker = self._replace(worker)
+        except (ValueError, struct.error) as e:
+            # The snippet broke the worker's reply framing (e.g. by patching builtins the worker
+            # uses); nothing more can be read from it, so it is replaced like a dead one
+            reply = {"stdout": "", "stderr": "", "error": f"Sandbox worker sent a corrupt reply ({e})", "exec_time": time.perf_counter() - requested - queue_time}
+            worker = self._replace(worker)
+        else:
+            worker.tasks += 1
+            if worker.tasks >= self.max_tasks:
+                worker = self._replace(worker, restart=False)
+        finally:
+            self._idle.put(worker)
+
+        with self._lock:
+            self._queue_times.append(queue_time)
+            self._exec_times.append(reply["exec_time"])
+        return SandboxResult(reply["stdout"], reply["stderr"], reply["error"], queue_time, reply["exec_time"])
+
+    def _replace(self, worker: _Worker, restart: bool = True) -> _Worker:
+        worker.kill()
+        if restart:
+            with self._lock:
+                self.restarts += 1
+        return self._spawn()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            queue_times = sorted(self._queue_times)
+            exec_times = sorted(self._exec_times)
+        count = len(exec_times)
+
+        def p95(values: List[float]) -> float:
+            return values[min(len(values) - 1, int(len(values) * 0.95))] if values else 0.0
+
+        return {
+            "runs": count,
+            "restarts": self.restarts,
+            "queue_time_mean": sum(queue_times) / count if count else 0.0,
+            "queue_time_p95": p95(queue_times),
+            "exec_time_mean": sum(exec_times) / count if count else 0.0,
+            "exec_time_p95": p95(exec_times),
+        }
+
+    def close(self) -> None:
+        self.closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_shared_pool: Optional[SandboxPool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool(create: bool = True) -> Optional[SandboxPool]:
+    """Process-wide pool, created on first use and closed at exit.
+
+    With ``create=False`` returns None when no pool has been started yet.
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None and create:
+            _shared_pool = SandboxPool.from_env()
+            atexit.register(_shared_pool.close)
+        return _shared_pool
@@ -0,0 +1,386 @@
+"""Dependency-aware scheduling for the crew's tasks.
+
+``Process.sequential`` runs the tasks one after another in the order they are
+declared, even when a task does not consume the previous one's output. The
+``context:`` lists in ``config/tasks.yaml`` already describe the real data
+flow, so ``DagScheduler`` builds a graph from them and starts every task as
+soon as the tasks it depends on have finished. With the default config
+``frontend_task`` and ``testing_task`` both only need ``coding_task`` and run
+side by side.
+
+Tasks with ``context_compaction:`` in tasks.yaml receive a compacted version
+of their context (see ``compaction.py``).
+"""
+import contextvars
+import importlib.metadata
+import re
+import threading
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from ai_engineering_team.compaction import MODES, compact
+from ai_engineering_team.manifest import RunManifest, task_fingerprint
+
+TASKS_CONFIG = Path(__file__).parent / "config" / "tasks.yaml"
+# CrewAI versions (from inclusive, to exclusive) whose Crew internals DagScheduler was checked against
+CREWAI_VERSIONS = ((1, 6), (2, 0))
+# The Crew internals DagScheduler.run calls
+CREW_INTERNALS = (
+    "_interpolate_inputs",
+    "_set_tasks_callbacks",
+    "_set_allow_crewai_trigger_context_for_first_task",
+    "_task_output_handler",
+    "_handle_crew_planning",
+    "_prepare_tools",
+    "_process_task_result",
+    "_store_execution_log",
+    "_create_crew_output",
+)
+
+
+def crewai_version() -> Optional[Tuple[int, int]]:
+    """(major, minor) of the installed CrewAI, or None if it is not installed."""
+    try:
+        version = importlib.metadata.version("crewai")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+    numbers = re.findall(r"\d+", version)
+    return (int(numbers[0]), int(numbers[1])) if len(numbers) >= 2 else None
+
+
+def load_task_graph(path: Path = TASKS_CONFIG) -> Dict[str, Tuple[str, ...]]:
+    """Read the ``context:`` edges from tasks.yaml.
+
+    Returns a mapping of task name to the names of the tasks it depends on,
+    in declaration order. Raises ``ValueError`` for unknown dependencies or
+    cycles.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    graph = {name: tuple(spec.get("context") or ()) for name, spec in config.items()}
+    for name, deps in graph.items():
+        unknown = [dep for dep in deps if dep not in graph]
+        if unknown:
+            raise ValueError(f"Task '{name}' depends on unknown task(s): {', '.join(unknown)}")
+    topological_order(graph)
+    return graph
+
+
+def load_compaction(path: Path = TASKS_CONFIG) -> Dict[str, str]:
+    """Read the ``context_compaction:`` mode of each task that sets one."""
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    modes = {name: spec["context_compaction"] for name, spec in config.items() if spec.get("context_compaction")}
+    for name, mode in modes.items():
+        if mode not in MODES:
+            raise ValueError(f"Task '{name}' has unknown context_compaction '{mode}'")
+    return modes
+
+
+def topological_order(graph: Dict[str, Tuple[str, ...]]) -> List[str]:
+    """Order tasks so that every task comes after its dependencies.
+
+    Ties keep the declaration order, so a purely linear config comes back
+    unchanged.
+    """
+    order: List[str] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            cycle = " -> ".join(path[path.index(name):] + (name,))
+            raise ValueError(f"Task dependency cycle: {cycle}")
+        state[name] = 1
+        for dep in graph[name]:
+            visit(dep, path + (name,))
+        state[name] = 2
+        order.append(name)
+
+    for name in graph:
+        visit(name, ())
+    return order
+
+
+@dataclass
+class TaskTiming:
+    """Wall-clock timeline of one task, in seconds since the run started."""
+
+    name: str
+    ready_at: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    status: str = "ran"
+    reason: str = ""
+
+    @property
+    def waited(self) -> float:
+        """Time spent before the task could start (dependencies + worker queue)."""
+        return self.started_at
+
+    @property
+    def queued(self) -> float:
+        """Time spent ready but waiting for a free worker."""
+        return self.started_at - self.ready_at
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class ScheduleResult:
+    """Output of a scheduled run plus the per-task timeline."""
+
+    output: Any
+    timings: Dict[str, TaskTiming] = field(default_factory=dict)
+    wall_time: float = 0.0
+
+    def report(self) -> str:
+        lines = [f"{'task':<16} {'waited':>8} {'queued':>8} {'ran':>8}  status"]
+        for timing in sorted(self.timings.values(), key=lambda t: t.started_at):
+            status = f"{timing.status} ({timing.reason})" if timing.reason else timing.status
+            lines.append(
+                f"{timing.name:<16} {timing.waited:>7.1f}s {timing.queued:>7.1f}s {timing.duration:>7.1f}s  {status}"
+            )
+        serial = sum(t.duration for t in self.timings.values())
+        lines.append(f"wall time {self.wall_time:.1f}s (sum of task times {serial:.1f}s)")
+        return "\n".join(lines)
+
+
+class DagScheduler:
+    """Run a crew's tasks as a DAG instead of a fixed sequence.
+
+    The crew is prepared the same way ``Crew.kickoff`` prepares it (kickoff
+    callbacks and events, input interpolation, agent executors, planning) and
+    every finished task is logged the way kickoff logs it, so the result is a
+    normal ``CrewOutput``. This relies on crew internals, so crews ``supports``
+    rejects are run with a plain ``crew.kickoff()`` instead. Tasks that share
+    an agent are still run one at a time, because an agent only holds one
+    executor.
+
+    With a ``RunManifest`` tasks whose inputs are unchanged since the last run
+    are not executed; their existing ``output_file`` becomes their output.
+    ``compaction`` maps task names to a ``context_compaction`` mode; by
+    default it is read from tasks.yaml.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        graph: Optional[Dict[str, Tuple[str, ...]]] = None,
+        manifest: Optional[RunManifest] = None,
+        compaction: Optional[Dict[str, str]] = None,
+    ):
+        self.max_workers = max_workers
+        self.graph = graph if graph is not None else load_task_graph()
+        self.manifest = manifest
+        self.compaction = compaction if compaction is not None else load_compaction()
+
+    def supports(self, crew) -> bool:
+        """Whether ``run`` can drive this crew itself rather than through ``crew.kickoff()``.
+
+        The scheduler repeats what ``Crew.kickoff`` does around its task loop
+        using crew internals, which were checked against the CrewAI versions in
+        ``CREWAI_VERSIONS``. Other versions, non-sequential processes and
+        streaming crews fall back to a plain kickoff.
+        """
+        version = crewai_version()
+        if version is None or not CREWAI_VERSIONS[0] <= version < CREWAI_VERSIONS[1]:
+            return False
+        if crew.process != "sequential" or crew.stream:
+            return False
+        return all(hasattr(crew, name) for name in CREW_INTERNALS)
+
+    def run(self, crew, inputs: Optional[Dict[str, Any]] = None) -> ScheduleResult:
+        tasks = {task.name: task for task in crew.tasks}
+        missing = [name for name in self.graph if name not in tasks]
+        if missing:
+            raise ValueError(f"Crew has no task(s) named: {', '.join(missing)}")
+        if not self.supports(crew):
+            return self._kickoff(crew, inputs)
+
+        with self._kickoff_scope(crew):
+            self._prepare(crew, inputs)
+            return self._run_graph(crew, tasks)
+
+    def _run_graph(self, crew, tasks: Dict[str, Any]) -> ScheduleResult:
+        timings = {name: TaskTiming(name) for name in self.graph}
+        agent_locks: Dict[int, threading.Lock] = {}
+        for task in tasks.values():
+            agent_locks.setdefault(id(task.agent), threading.Lock())
+        task_index = {task.name: index for index, task in enumerate(crew.tasks)}
+
+        start = time.perf_counter()
+
+        def execute(name: str):
+            task = tasks[name]
+            with agent_locks[id(task.agent)]:
+                timings[name].started_at = time.perf_counter() - start
+                try:
+                    return self.execute_task(crew, task, timings[name])
+                finally:
+                    timings[name].finished_at = time.perf_counter() - start
+
+        remaining = {name: set(deps) for name, deps in self.graph.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in self.graph}
+        for name, deps in self.graph.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        outputs: Dict[str, Any] = {}
+        running: Dict[Future, str] = {}
+        workers = self.max_workers or len(self.graph)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew-task") as pool:
+            def submit_ready() -> None:
+                for name in [n for n, deps in remaining.items() if not deps]:
+                    del remaining[name]
+                    timings[name].ready_at = time.perf_counter() - start
+                    # Each task sees the run's context variables (e.g. the crew_context baggage)
+                    running[pool.submit(contextvars.copy_context().run, execute, name)] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        outputs[name] = future.result()
+                    except Exception:
+                        for pending in running:
+                            pending.cancel()
+                        raise
+                    # Log each finished task the way Crew.kickoff does, one at a time on this thread
+                    crew._process_task_result(tasks[name], outputs[name])
+                    crew._store_execution_log(tasks[name], outputs[name], task_index[name])
+                    for dependent in dependents[name]:
+                        remaining[dependent].discard(name)
+                submit_ready()
+
+        wall_time = time.perf_counter() - start
+        ordered = [outputs[name] for name in self.graph]
+        result = crew._create_crew_output(ordered)
+        for after_callback in crew.after_kickoff_callbacks:
+            result = after_callback(result)
+        crew.usage_metrics = crew.calculate_usage_metrics()
+        return ScheduleResult(output=result, timings=timings, wall_time=wall_time)
+
+    def _kickoff(self, crew, inputs: Optional[Dict[str, Any]]) -> ScheduleResult:
+        """Fallback: run the crew with ``crew.kickoff()``, without the graph, manifest or compaction."""
+        version = crewai_version()
+        warnings.warn(
+            f"DagScheduler does not drive this crew (CrewAI {'.'.join(map(str, version)) if version else 'unknown'}, "
+            f"supported {CREWAI_VERSIONS[0][0]}.x); running crew.kickoff() instead",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        start = time.perf_counter()
+        output = crew.kickoff(inputs=inputs)
+        wall_time = time.perf_counter() - start
+        # Per-task times are not known here, only that every task ran
+        timings = {name: TaskTiming(name, reason="crew.kickoff") for name in self.graph}
+        return ScheduleResult(output=output, timings=timings, wall_time=wall_time)
+
+    def execute_task(self, crew, task, timing: TaskTiming):
+        """Run a single task once all of its context tasks have an output."""
+        agent = task.agent
+        context = self.build_context(task)
+
+        fingerprint = None
+        if self.manifest is not None:
+            fingerprint = task_fingerprint(task, context)
+            reusable, timing.reason = self.manifest.check(task.name, fingerprint, task.output_file)
+            if reusable:
+                timing.status = "reused"
+                output = self._reuse_output(task)
+                self.manifest.record(task.name, fingerprint, task.output_file, timing.status, timing.reason)
+                return output
+
+        tools = crew._prepare_tools(agent, task, task.tools or agent.tools or [])
+        output = task.execute_sync(agent=agent, context=context, tools=tools)
+        if fingerprint is not None:
+            self.manifest.record(task.name, fingerprint, task.output_file, timing.status, timing.reason)
+        return output
+
+    def build_context(self, task) -> str:
+        """Join the outputs of the task's context tasks, compacted if the task opted in."""
+        from crewai.utilities.formatter import DIVIDERS, aggregate_raw_outputs_from_tasks
+
+        if not task.context:
+            return ""
+        mode = self.compaction.get(task.name)
+        if mode is None:
+            return aggregate_raw_outputs_from_tasks(task.context)
+        return DIVIDERS.join(compact(t.output.raw, mode) for t in task.context if t.output is not None)
+
+    @staticmethod
+    def _reuse_output(task):
+        from crewai.tasks.task_output import TaskOutput
+
+        with open(task.output_file, "r", encoding="utf-8") as f:
+            raw = f.read()
+        task.output = TaskOutput(
+            name=task.name,
+            description=task.description,
+            expected_output=task.expected_output,
+            raw=raw,
+            agent=task.agent.role,
+        )
+        return task.output
+
+    @staticmethod
+    @contextmanager
+    def _kickoff_scope(crew):
+        """The crew_context baggage and failure event that ``Crew.kickoff`` wraps a run in."""
+        from crewai.events.event_bus import crewai_event_bus
+        from crewai.events.types.crew_events import CrewKickoffFailedEvent
+        from crewai.utilities.crew.models import CrewContext
+        from opentelemetry import baggage
+        from opentelemetry.context import attach, detach
+
+        token = attach(baggage.set_baggage("crew_context", CrewContext(id=str(crew.id), key=crew.key)))
+        try:
+            yield
+        except Exception as e:
+            crewai_event_bus.emit(crew, CrewKickoffFailedEvent(error=str(e), crew_name=crew.name))
+            raise
+        finally:
+            detach(token)
+
+    @staticmethod
+    def _prepare(crew, inputs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Everything ``Crew.kickoff`` does before its task loop, including the started event and planning."""
+        from crewai.events.event_bus import crewai_event_bus
+        from crewai.events.types.crew_events import CrewKickoffStartedEvent
+
+        for before_callback in crew.before_kickoff_callbacks:
+            inputs = before_callback(inputs or {})
+        crewai_event_bus.emit(crew, CrewKickoffStartedEvent(crew_name=crew.name, inputs=inputs))
+        crew._task_output_handler.reset()
+        inputs = inputs or {}
+
+        crew._inputs = inputs
+        crew._interpolate_inputs(inputs)
+        crew._set_tasks_callbacks()
+        crew._set_allow_crewai_trigger_context_for_first_task()
+        for agent in crew.agents:
+            agent.crew = crew
+            agent.set_knowledge(crew_embedder=crew.embedder)
+            if not agent.function_calling_llm:
+                agent.function_calling_llm = crew.function_calling_llm
+            if not agent.step_callback:
+                agent.step_callback = crew.step_callback
+            agent.create_agent_executor()
+        if crew.planning:
+            crew._handle_crew_planning()
+        return inputs
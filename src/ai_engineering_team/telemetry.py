@@ -0,0 +1,263 @@
+"""Structured per-task and per-LLM-call traces of a crew run.
+
+``TraceRecorder`` is started from the crew's ``@before_kickoff`` hook and
+finished from its ``@after_kickoff`` hook. While it is active it listens to
+CrewAI's LLM and tool call hooks and appends one JSON record per LLM call to a
+JSONL file; when the run finishes it appends one record per task. The
+``trace_summary`` command turns one or more trace files into p50/p95
+latency, token and cost numbers per task.
+
+Traces are written to ``CREW_TRACE_DIR`` (default ``traces``); set
+``CREW_TRACE=off`` to disable them.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# USD per million tokens as (prompt, completion); unknown models are costed at zero
+PRICES_PER_MILLION = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+
+CODE_EXECUTION_TOOLS = {"Code Interpreter"}
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    name = (model or "").split("/")[-1]
+    prompt_price, completion_price = PRICES_PER_MILLION.get(name, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _usage(llm) -> Dict[str, int]:
+    try:
+        usage = llm.get_token_usage_summary()
+    except Exception:
+        return {"prompt_tokens": 0, "completion_tokens": 0}
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+
+
+class TraceRecorder:
+    """Collects LLM call, tool call and task timings for one crew run."""
+
+    def __init__(self, crew, path: Path):
+        self.crew = crew
+        self.path = Path(path)
+        self.run_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._open_calls: Dict[int, Dict[str, Any]] = {}
+        self._open_tools: Dict[int, float] = {}  # thread id -> start of the running tool call
+        self._tasks: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"llm_calls": 0, "failed_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                     "cost": 0.0, "code_execution_time": 0.0, "model": None}
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def from_env(cls, crew) -> Optional["TraceRecorder"]:
+        if os.getenv("CREW_TRACE", "on").lower() == "off":
+            return None
+        directory = Path(os.getenv("CREW_TRACE_DIR", "traces"))
+        stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        return cls(crew, directory / f"trace_{stamp}_{uuid.uuid4().hex[:6]}.jsonl")
+
+    def start(self) -> "TraceRecorder":
+        from crewai.hooks import (
+            register_after_llm_call_hook,
+            register_after_tool_call_hook,
+            register_before_llm_call_hook,
+            register_before_tool_call_hook,
+        )
+
+        register_before_llm_call_hook(self._before_llm_call)
+        register_after_llm_call_hook(self._after_llm_call)
+        register_before_tool_call_hook(self._before_tool_call)
+        register_after_tool_call_hook(self._after_tool_call)
+        return self
+
+    def finish(self) -> None:
+        from crewai.hooks import (
+            unregister_after_llm_call_hook,
+            unregister_after_tool_call_hook,
+            unregister_before_llm_call_hook,
+            unregister_before_tool_call_hook,
+        )
+
+        unregister_before_llm_call_hook(self._before_llm_call)
+        unregister_after_llm_call_hook(self._after_llm_call)
+        unregister_before_tool_call_hook(self._before_tool_call)
+        unregister_after_tool_call_hook(self._after_tool_call)
+
+        # A call that started but never completed raised inside the LLM
+        with self._lock:
+            for call in self._open_calls.values():
+                self._tasks[call["task"]]["failed_calls"] += 1
+            self._open_calls.clear()
+
+        for task in self.crew.tasks:
+            stats = self._tasks[task.name]
+            start = task.start_time.timestamp() if task.start_time else None
+            end = task.end_time.timestamp() if task.end_time else None
+            self._write(
+                {
+                    "type": "task",
+                    "task": task.name,
+                    "agent": task.agent.role.strip() if task.agent else None,
+                    "start": start,
+                    "end": end,
+                    "duration": end - start if start and end else None,
+                    "retries": task.retry_count + task.tools_errors + stats["failed_calls"],
+                    **stats,
+                }
+            )
+        self._file.close()
+
+    def _ours(self, context) -> bool:
+        return context.crew is self.crew
+
+    def _before_llm_call(self, context) -> None:
+        if not self._ours(context):
+            return None
+        with self._lock:
+            # The executor only calls again without completing when the last call raised
+            unfinished = self._open_calls.get(id(context.executor))
+            if unfinished is not None:
+                self._tasks[unfinished["task"]]["failed_calls"] += 1
+            self._open_calls[id(context.executor)] = {
+                "task": context.task.name if context.task else None,
+                "start": time.time(),
+                "usage": _usage(context.llm),
+            }
+        return None
+
+    def _after_llm_call(self, context) -> None:
+        if not self._ours(context):
+            return None
+        end = time.time()
+        with self._lock:
+            call = self._open_calls.pop(id(context.executor), None)
+        if call is None:
+            return None
+
+        usage = _usage(context.llm)
+        prompt_tokens = usage["prompt_tokens"] - call["usage"]["prompt_tokens"]
+        completion_tokens = usage["completion_tokens"] - call["usage"]["completion_tokens"]
+        model = getattr(context.llm, "model", None)
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        self._write(
+            {
+                "type": "llm_call",
+                "task": call["task"],
+                "agent": context.agent.role.strip() if context.agent else None,
+                "model": model,
+                "iteration": context.iterations,
+                "start": call["start"],
+                "end": end,
+                "duration": end - call["start"],
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost": cost,
+            }
+        )
+        with self._lock:
+            stats = self._tasks[call["task"]]
+            stats["llm_calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["cost"] += cost
+            stats["model"] = model
+        return None
+
+    def _before_tool_call(self, context) -> None:
+        if context.crew is self.crew and context.tool_name in CODE_EXECUTION_TOOLS:
+            with self._lock:
+                self._open_tools[threading.get_ident()] = time.time()
+        return None
+
+    def _after_tool_call(self, context) -> None:
+        if context.crew is not self.crew or context.tool_name not in CODE_EXECUTION_TOOLS:
+            return None
+        with self._lock:
+            start = self._open_tools.pop(threading.get_ident(), None)
+            if start is not None and context.task is not None:
+                self._tasks[context.task.name]["code_execution_time"] += time.time() - start
+        return None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps({"run_id": self.run_id, **record})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+def read_traces(paths: Iterable[Path]) -> List[Dict[str, Any]]:
+    records = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.glob("*.jsonl")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Group task records by task name into p50/p95 figures."""
+    by_task: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        if record.get("type") == "task" and record.get("duration") is not None:
+            by_task[record["task"]].append(record)
+
+    summary = {}
+    for task, runs in by_task.items():
+        row: Dict[str, Any] = {"runs": len(runs)}
+        for run in runs:
+            run["total_tokens"] = (run.get("prompt_tokens") or 0) + (run.get("completion_tokens") or 0)
+        for metric in ("duration", "total_tokens", "cost", "code_execution_time", "retries"):
+            values = [float(run.get(metric) or 0) for run in runs]
+            row[f"{metric}_p50"] = percentile(values, 50)
+            row[f"{metric}_p95"] = percentile(values, 95)
+        summary[task] = row
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="trace_summary", description="Summarize crew run traces per task.")
+    parser.add_argument("paths", nargs="*", type=Path, default=[Path("traces")], help="trace files or directories")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary = summarize(read_traces(args.paths))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    if not summary:
+        print("No task records found.")
+        return 1
+
+    print(f"{'task':<16} {'runs':>4} {'p50 s':>8} {'p95 s':>8} {'p50 tok':>9} {'p95 tok':>9} {'p50 $':>8} {'p95 $':>8} {'p95 exec s':>10}")
+    for task, row in summary.items():
+        print(
+            f"{task:<16} {row['runs']:>4} {row['duration_p50']:>8.1f} {row['duration_p95']:>8.1f} "
+            f"{row['total_tokens_p50']:>9.0f} {row['total_tokens_p95']:>9.0f} {row['cost_p50']:>8.4f} {row['cost_p95']:>8.4f} "
+            f"{row['code_execution_time_p95']:>10.1f}"
+        )
+    return 0
@@ -0,0 +1,29 @@
+from crewai.tools import BaseTool
+from typing import Type
+from pydantic import BaseModel, Field
+
+from ai_engineering_team.knowledge import KnowledgeIndex
+
+
+class KnowledgeSearchInput(BaseModel):
+    """Input schema for KnowledgeSearchTool."""
+    query: str = Field(..., description="What to look up, e.g. 'gradio layout conventions' or 'naming style'.")
+
+
+class KnowledgeSearchTool(BaseTool):
+    name: str = "Search project knowledge"
+    description: str = (
+        "Searches the project's knowledge base (style guides, API docs, user preferences) "
+        "and returns the few most relevant passages with their source file."
+    )
+    args_schema: Type[BaseModel] = KnowledgeSearchInput
+    index: KnowledgeIndex
+    top_k: int = 4
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, query: str) -> str:
+        hits = self.index.search(query, k=self.top_k)
+        if not hits:
+            return "No relevant knowledge found."
+        return "\n\n".join(f"[{hit.source}]\n{hit.text}" for hit in hits)
@@ -0,0 +1,31 @@
+from crewai.tools import BaseTool
+from typing import Optional, Type
+from pydantic import BaseModel, Field
+
+from ai_engineering_team.sandbox import SandboxPool, shared_pool
+
+
+class PooledCodeInterpreterInput(BaseModel):
+    """Input schema for PooledCodeInterpreterTool."""
+    code: str = Field(
+        ...,
+        description="Python 3 code to run. Use print() to show results; only the standard library is guaranteed.",
+    )
+
+
+class PooledCodeInterpreterTool(BaseTool):
+    # Same name as CrewAI's interpreter so traces count it as code execution
+    name: str = "Code Interpreter"
+    description: str = (
+        "Runs Python 3 code in a fresh, isolated interpreter with CPU, memory and time limits "
+        "and returns its printed output or the error traceback. Nothing persists between calls, "
+        "so include every definition the code needs."
+    )
+    args_schema: Type[BaseModel] = PooledCodeInterpreterInput
+    pool: Optional[SandboxPool] = None
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, code: str) -> str:
+        pool = self.pool or shared_pool()
+        return pool.run(code).render()
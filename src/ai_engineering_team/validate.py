@@ -0,0 +1,140 @@
+"""Config-only validation of the crew, without importing CrewAI.
+
+Checks that ``agents.yaml`` and ``tasks.yaml`` parse, that every task names
+an existing agent and valid ``context:`` tasks, that the ``@agent``/``@task``
+methods in ``crew.py`` have a config entry, and that every ``{placeholder}``
+used in the configs is provided by the run inputs. This is what
+``run_crew --dry-run`` and ``validate`` run; it finishes in milliseconds
+because only PyYAML and the standard library are loaded.
+"""
+import ast
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import yaml
+
+from ai_engineering_team.compaction import MODES as COMPACTION_MODES
+
+CONFIG_DIR = Path(__file__).parent / "config"
+CREW_MODULE = Path(__file__).parent / "crew.py"
+
+# Same shape CrewAI interpolates: {identifier}
+PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+REQUIRED_TASK_KEYS = ("description", "expected_output", "agent")
+REQUIRED_AGENT_KEYS = ("role", "goal", "backstory")
+
+
+def _strings(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def placeholders(config: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Map each placeholder name to the config entries that use it."""
+    used: Dict[str, Set[str]] = {}
+    for name, spec in config.items():
+        for text in _strings(spec):
+            for placeholder in PLACEHOLDER.findall(text):
+                used.setdefault(placeholder, set()).add(name)
+    return used
+
+
+def decorated_methods(path: Path = CREW_MODULE) -> Dict[str, List[str]]:
+    """Names of the ``@agent`` and ``@task`` methods in crew.py, read with ``ast``."""
+    found: Dict[str, List[str]] = {"agent": [], "task": []}
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef):
+            for decorator in node.decorator_list:
+                if isinstance(decorator, ast.Name) and decorator.id in found:
+                    found[decorator.id].append(node.name)
+    return found
+
+
+def _load(path: Path, errors: List[str]) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        errors.append(f"{path.name}: {e}")
+        return {}
+    if not isinstance(data, dict):
+        errors.append(f"{path.name}: expected a mapping at the top level")
+        return {}
+    return data
+
+
+def validate_config(
+    inputs: Dict[str, Any],
+    config_dir: Path = CONFIG_DIR,
+    crew_module: Path = CREW_MODULE,
+) -> Tuple[List[str], List[str]]:
+    """Return ``(errors, warnings)`` for the configs and the given inputs."""
+    errors: List[str] = []
+    warnings: List[str] = []
+    agents = _load(config_dir / "agents.yaml", errors)
+    tasks = _load(config_dir / "tasks.yaml", errors)
+
+    for name, spec in agents.items():
+        missing = [key for key in REQUIRED_AGENT_KEYS if not (spec or {}).get(key)]
+        if missing:
+            errors.append(f"agent '{name}' is missing {', '.join(missing)}")
+
+    for name, spec in tasks.items():
+        spec = spec or {}
+        missing = [key for key in REQUIRED_TASK_KEYS if not spec.get(key)]
+        if missing:
+            errors.append(f"task '{name}' is missing {', '.join(missing)}")
+        if spec.get("agent") and spec["agent"] not in agents:
+            errors.append(f"task '{name}' uses unknown agent '{spec['agent']}'")
+        for dep in spec.get("context") or ():
+            if dep not in tasks:
+                errors.append(f"task '{name}' has unknown context task '{dep}'")
+        compaction = spec.get("context_compaction")
+        if compaction and compaction not in COMPACTION_MODES:
+            errors.append(f"task '{name}' has unknown context_compaction '{compaction}'")
+
+    if not errors:
+        from ai_engineering_team.scheduler import topological_order
+
+        try:
+            topological_order({name: tuple((spec or {}).get("context") or ()) for name, spec in tasks.items()})
+        except ValueError as e:
+            errors.append(str(e))
+
+    methods = decorated_methods(crew_module)
+    for kind, config in (("agent", agents), ("task", tasks)):
+        for method in methods[kind]:
+            if method not in config:
+                errors.append(f"@{kind} method '{method}' in crew.py has no entry in {kind}s.yaml")
+
+    used = placeholders(agents)
+    for placeholder, names in placeholders(tasks).items():
+        used.setdefault(placeholder, set()).update(names)
+    for placeholder, names in sorted(used.items()):
+        if placeholder not in inputs:
+            errors.append(f"placeholder {{{placeholder}}} used by {', '.join(sorted(names))} is not in the inputs")
+    for key in sorted(set(inputs) - set(used)):
+        warnings.append(f"input '{key}' is not used by any agent or task")
+
+    return errors, warnings
+
+
+def report(inputs: Dict[str, Any]) -> int:
+    """Print the validation result; returns a process exit code."""
+    errors, warnings = validate_config(inputs)
+    for warning in warnings:
+        print(f"warning: {warning}")
+    for error in errors:
+        print(f"error: {error}")
+    if errors:
+        return 1
+    print("Config OK: agents.yaml and tasks.yaml match crew.py and the inputs.")
+    return 0
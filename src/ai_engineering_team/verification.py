@@ -0,0 +1,310 @@
+"""Post-generation verification of a crew's output directory.
+
+An optional last pipeline stage. It first parses every generated ``.py`` file
+with ``ast.parse``, so a truncated or markdown-wrapped file fails in
+milliseconds. It then runs the generated ``test_<module>`` with unittest: the
+test ids are listed in a subprocess, grouped by test class and spread over
+parallel worker processes. A generated module is never imported into the
+crew's own process.
+
+Test results are cached by the SHA-256 of the module and test sources (and
+the Python version). Re-verifying an unchanged module+test pair reuses the
+recorded result without running anything. Every run writes
+``verification.json`` to the output directory; the report is ignored by git.
+
+Run it on its own with the ``verify`` script or
+``python -m ai_engineering_team.verification [output_dir]``.
+
+The stage is controlled from the environment:
+
+- ``CREW_VERIFY``: ``off`` (default) or ``on`` (same as ``run_crew --verify``).
+- ``CREW_VERIFY_WORKERS``: parallel test processes (default: CPU count).
+- ``CREW_VERIFY_TIMEOUT``: wall-clock seconds per test process (default 300).
+- ``CREW_VERIFY_CACHE_DIR``: where results are cached (default
+  ``.crew_verify_cache``); ``off`` disables the cache.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPORT_NAME = "verification.json"
+
+# Runs inside the worker process with the output directory as its working
+# directory: `--list <module>` writes the module's test ids, `<id> ...` runs
+# those tests. Results go to the JSON file named by argv[1], so whatever the
+# generated code prints cannot corrupt them.
+RUNNER_SOURCE = r'''
+import importlib, io, json, sys, time, traceback, unittest
+
+out, args = sys.argv[1], sys.argv[2:]
+sys.path.insert(0, ".")
+loader = unittest.TestLoader()
+if args[0] == "--list":
+    try:
+        suite = loader.loadTestsFromModule(importlib.import_module(args[1]))
+    except BaseException:
+        result = {"error": traceback.format_exc(limit=-5)}
+    else:
+        def ids(suite):
+            for test in suite:
+                if isinstance(test, unittest.TestSuite):
+                    yield from ids(test)
+                else:
+                    yield test.id()
+        result = {"ids": list(ids(suite))}
+else:
+    start = time.perf_counter()
+    outcome = unittest.TextTestRunner(stream=io.StringIO(), verbosity=0).run(loader.loadTestsFromNames(args))
+    result = {
+        "run": outcome.testsRun,
+        "failures": [[test.id(), text] for test, text in outcome.failures],
+        "errors": [[test.id(), text] for test, text in outcome.errors],
+        "skipped": len(outcome.skipped),
+        "seconds": time.perf_counter() - start,
+    }
+with open(out, "w", encoding="utf-8") as f:
+    json.dump(result, f)
+'''
+
+
+@dataclass
+class TestRun:
+    """Outcome of running one generated test module."""
+
+    test_module: str
+    key: str
+    status: str = "passed"  # passed, failed, no tests, or error (a test process timed out or died)
+    cached: bool = False
+    run: int = 0
+    skipped: int = 0
+    failures: List[List[str]] = field(default_factory=list)
+    errors: List[List[str]] = field(default_factory=list)
+    processes: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class VerificationReport:
+    """Syntax check of every generated file plus the test run, as written to ``verification.json``."""
+
+    output_dir: str
+    syntax: Dict[str, Optional[str]] = field(default_factory=dict)
+    tests: Optional[TestRun] = None
+    status: str = "passed"
+    wall_time: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "passed"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def render(self) -> str:
+        lines = [f"Verification of {self.output_dir}: {self.status} in {self.wall_time:.2f}s"]
+        for name, error in sorted(self.syntax.items()):
+            lines.append(f"  {name:<28} {'ok' if error is None else error}")
+        if self.tests is not None:
+            tests = self.tests
+            processes = f"{tests.processes} process{'es' if tests.processes != 1 else ''}"
+            source = "cached" if tests.cached else f"{processes}, {tests.seconds:.2f}s"
+            lines.append(
+                f"  {tests.test_module:<28} {tests.status}: {tests.run} run, {len(tests.failures)} failed, "
+                f"{len(tests.errors)} errors, {tests.skipped} skipped ({source})"
+            )
+            for test_id, text in (tests.failures + tests.errors)[:5]:
+                lines.append(f"    {test_id}: {text.strip().splitlines()[-1]}")
+        return "\n".join(lines)
+
+
+class ResultCache:
+    """Test results stored as JSON files named after their content key."""
+
+    def __init__(self, directory: str = ".crew_verify_cache"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultCache"]:
+        directory = os.getenv("CREW_VERIFY_CACHE_DIR", ".crew_verify_cache")
+        return None if directory.lower() == "off" else cls(directory)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.directory / f"{key}.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp, self.directory / f"{key}.json")
+
+
+def check_syntax(output_dir: Path) -> Dict[str, Optional[str]]:
+    """Parse every ``.py`` file in the output directory; maps file name to None or the syntax error."""
+    results: Dict[str, Optional[str]] = {}
+    for path in sorted(Path(output_dir).glob("*.py")):
+        try:
+            ast.parse(path.read_text(encoding="utf-8"), filename=path.name)
+            results[path.name] = None
+        except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+            line = getattr(e, "lineno", None)
+            results[path.name] = f"{type(e).__name__}: {getattr(e, 'msg', e)}" + (f" (line {line})" if line else "")
+    return results
+
+
+def content_key(module_path: Path, test_path: Path) -> str:
+    """Hash of the module+test pair (and the interpreter) that a cached result is valid for."""
+    digest = hashlib.sha256()
+    for path in (module_path, test_path):
+        digest.update(path.name.encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    digest.update(sys.version.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _run_worker(output_dir: Path, args: List[str], timeout: float) -> Dict[str, Any]:
+    # One worker process; returns the runner's JSON or {"error": ...}
+    fd, out = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [sys.executable, "-c", RUNNER_SOURCE, out, *args],
+            cwd=output_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+        with open(out, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except subprocess.TimeoutExpired:
+        return {"error": f"Timed out after {timeout:.0f}s"}
+    except (OSError, ValueError):
+        return {"error": "Test process exited without a result"}
+    finally:
+        os.unlink(out)
+
+
+def shard(test_ids: List[str], workers: int) -> List[List[str]]:
+    """Split test ids into at most ``workers`` groups, keeping each test class in one group."""
+    classes: Dict[str, List[str]] = {}
+    for test_id in test_ids:
+        classes.setdefault(test_id.rsplit(".", 1)[0], []).append(test_id)
+    groups: List[List[str]] = [[] for _ in range(min(workers, len(classes)))]
+    for ids in sorted(classes.values(), key=len, reverse=True):
+        min(groups, key=len).extend(ids)
+    return groups
+
+
+def run_tests(output_dir: Path, test_module: str, key: str, workers: int, timeout: float) -> TestRun:
+    """List the test module's tests in one process, then run them on up to ``workers`` processes."""
+    result = TestRun(test_module=test_module, key=key)
+    start = time.perf_counter()
+    listing = _run_worker(output_dir, ["--list", test_module], timeout)
+    groups = shard(listing.get("ids", []), workers)
+    if "error" in listing:
+        result.errors.append([test_module, listing["error"]])
+    with ThreadPoolExecutor(max_workers=max(1, len(groups)), thread_name_prefix="crew-verify") as pool:
+        outcomes = list(pool.map(lambda ids: _run_worker(output_dir, ids, timeout), groups))
+    crashed = False
+    for ids, outcome in zip(groups, outcomes):
+        if "error" in outcome:
+            # The process timed out or died: its tests have no individual results
+            crashed = True
+            result.errors.append([ids[0] if len(ids) == 1 else f"{ids[0]} and {len(ids) - 1} more", outcome["error"]])
+            continue
+        result.run += outcome["run"]
+        result.skipped += outcome["skipped"]
+        result.failures += outcome["failures"]
+        result.errors += outcome["errors"]
+    result.processes = 1 + len(groups)
+    result.seconds = round(time.perf_counter() - start, 3)
+    if crashed:
+        result.status = "error"
+    elif result.failures or result.errors:
+        result.status = "failed"
+    elif not result.run:
+        result.status = "no tests"
+    return result
+
+
+def verify_output(
+    output_dir: str,
+    module_name: str,
+    workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    cache: Optional[ResultCache] = None,
+) -> VerificationReport:
+    """Check syntax, run ``test_<module_name>`` (unless cached) and write ``verification.json``."""
+    output_dir_path = Path(output_dir)
+    workers = workers or int(os.getenv("CREW_VERIFY_WORKERS", "0")) or os.cpu_count() or 1
+    timeout = timeout or float(os.getenv("CREW_VERIFY_TIMEOUT", "300"))
+    start = time.perf_counter()
+    report = VerificationReport(output_dir=str(output_dir_path), syntax=check_syntax(output_dir_path))
+
+    module_path = output_dir_path / module_name
+    test_path = output_dir_path / f"test_{module_name}"
+    missing = [path.name for path in (module_path, test_path) if not path.exists()]
+    if missing:
+        report.syntax.update({name: "missing" for name in missing})
+    elif report.syntax.get(module_path.name) is None and report.syntax.get(test_path.name) is None:
+        key = content_key(module_path, test_path)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            report.tests = TestRun(**dict(cached, cached=True))
+        else:
+            report.tests = run_tests(output_dir_path, test_path.stem, key, workers, timeout)
+            # A timeout or crash may be transient; only completed runs are replayed
+            if cache is not None and report.tests.status != "error":
+                cache.put(key, asdict(report.tests))
+
+    if any(error is not None for error in report.syntax.values()) or report.tests is None:
+        report.status = "failed"
+    elif report.tests.status != "passed":
+        report.status = report.tests.status
+    report.wall_time = round(time.perf_counter() - start, 3)
+    with open(output_dir_path / REPORT_NAME, "w", encoding="utf-8") as f:
+        json.dump(report.to_dict(), f, indent=2)
+    return report
+
+
+def enabled(argv: List[str]) -> bool:
+    """Whether the verification stage is switched on by ``--verify`` or ``CREW_VERIFY``."""
+    mode = os.getenv("CREW_VERIFY", "off").lower()
+    if mode not in ("on", "off"):
+        raise ValueError(f"CREW_VERIFY must be on or off, got '{mode}'")
+    return "--verify" in argv or mode == "on"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="verify", description=__doc__.splitlines()[0])
+    parser.add_argument("output_dir", nargs="?", default="output", help="generated files (default: output)")
+    parser.add_argument("-m", "--module", default="accounts.py", help="backend module name (default: accounts.py)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="parallel test processes")
+    parser.add_argument("--no-cache", action="store_true", help="run the tests even if the result is cached")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    cache = None if args.no_cache else ResultCache.from_env()
+    report = verify_output(args.output_dir, args.module, workers=args.workers, cache=cache)
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.render())
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Test the source tree without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,44 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+try:
+    import crewai
+except ImportError:
+    crewai = None
+
+
+@unittest.skipIf(crewai is None, "crewai not installed")
+class TestLoadSpecs(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, *specs):
+        from ai_engineering_team.batch import load_specs
+
+        path = self.directory / "specs.jsonl"
+        path.write_text("".join(json.dumps(spec) + "\n" for spec in specs), encoding="utf-8")
+        return load_specs(path)
+
+    # Test names are made safe for a directory and missing ones are numbered by line
+    def test_names(self):
+        specs = self.load({"name": "my spec/v1", "requirements": "x"}, {"requirements": "y"})
+        self.assertEqual([spec.name for spec in specs], ["my_spec_v1", "spec_2"])
+        self.assertEqual(specs[1].module_name, "accounts.py")
+
+    # Test names and module names that would leave the output directory are rejected
+    def test_rejects_paths_outside_output_root(self):
+        for spec in ({"name": "..", "requirements": "x"}, {"name": ".", "requirements": "x"},
+                     {"name": "ok", "module_name": "../../escape.py", "requirements": "x"},
+                     {"name": "ok", "module_name": "..", "requirements": "x"}):
+            with self.assertRaises(ValueError):
+                self.load(spec)
+
+
+if __name__ == "__main__":
+    unittest.main()
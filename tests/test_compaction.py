@@ -0,0 +1,119 @@
+import ast
+import unittest
+
+from ai_engineering_team.compaction import compact, public_api
+
+MODULE = '''"""Accounts."""
+import random
+
+MAX_SHARES = 1000
+SYMBOLS = ("AAPL", "TSLA")
+labels = {"buy": "Buy"}
+account = Account("demo", 1000.0)
+_cache = {}
+
+
+# Fixed test prices
+def get_share_price(symbol: str) -> float:
+    return {"AAPL": 150.0}.get(symbol, 0.0)
+
+
+class Account:
+    """A trading account."""
+    TYPES = ("buy", "sell")
+    lock = make_lock()
+    owner: str
+
+    def __init__(self, user_id: str, initial_deposit: float) -> None:
+        self.user_id = user_id
+        self.balance = initial_deposit
+        self.holdings = {}
+        self._log = []
+
+    # Take money out of the account
+    def withdraw(self, amount: float) -> bool:
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        if amount > self.balance:
+            return False
+        self.balance -= amount
+        return True
+
+    def _audit(self) -> None:
+        pass
+'''
+
+
+class TestPublicApi(unittest.TestCase):
+    def setUp(self):
+        self.api = public_api(MODULE)
+
+    # Test the summary is valid Python that keeps the docstring, imports and signatures
+    def test_signatures(self):
+        ast.parse(self.api)
+        self.assertTrue(self.api.startswith('"""Accounts."""\nimport random\n'))
+        self.assertIn("def __init__(self, user_id: str, initial_deposit: float) -> None:", self.api)
+        self.assertIn("    # Take money out of the account\n    def withdraw(self, amount: float) -> bool:", self.api)
+        self.assertIn("# raises ValueError", self.api)
+        self.assertNotIn("self.balance -= amount", self.api)
+        self.assertNotIn("_audit", self.api)
+
+    # Test a stubbed __init__ keeps the public instance attributes callers and tests read
+    def test_instance_attributes(self):
+        self.assertIn("    def __init__(self, user_id: str, initial_deposit: float) -> None:\n"
+                      "        self.user_id = user_id\n"
+                      "        self.balance = initial_deposit\n"
+                      "        self.holdings = {}\n"
+                      "        ...", self.api)
+        self.assertNotIn("_log", self.api)
+
+    # Test multi-line docstrings stay indented under their class or method
+    def test_docstring_indentation(self):
+        api = public_api('''class Ledger:
+    """Trades in order.
+
+    Rows are dicts.
+    """
+    def add(self, row: dict) -> None:
+        """Append a row.
+
+        Raises ValueError for unknown types.
+        """
+        if row["type"] not in ("buy", "sell"):
+            raise ValueError(row["type"])
+''')
+        ast.parse(api)
+        self.assertIn('    """Trades in order.\n\n    Rows are dicts."""', api)
+        self.assertIn('        """Append a row.\n\n        Raises ValueError for unknown types."""', api)
+
+    # Test short module-level functions keep their body, with the comment above them
+    def test_short_function_kept_whole(self):
+        self.assertIn('# Fixed test prices\ndef get_share_price(symbol: str) -> float:\n'
+                      '    return {"AAPL": 150.0}.get(symbol, 0.0)', self.api)
+
+    # Test only constants are kept: UPPER_CASE names or literal values, not module or class state
+    def test_constants_only(self):
+        for kept in ("MAX_SHARES = 1000", "SYMBOLS = ('AAPL', 'TSLA')", "labels = {'buy': 'Buy'}",
+                     "    TYPES = ('buy', 'sell')", "    owner: str"):
+            self.assertIn(kept, self.api)
+        for dropped in ("account = ", "_cache", "lock = "):
+            self.assertNotIn(dropped, self.api)
+
+    # Test output without public definitions, or that is not Python, is not summarized
+    def test_not_a_module(self):
+        self.assertIsNone(public_api("# Design\n\nThe Account class ..."))
+        self.assertIsNone(public_api("VERSION = 1\n"))
+        self.assertIsNone(public_api("def broken(:\n"))
+
+
+class TestCompact(unittest.TestCase):
+    # Test compaction prefixes the summary and passes other output through unchanged
+    def test_compact(self):
+        self.assertTrue(compact(MODULE, "signatures").startswith("Public API of the generated module"))
+        self.assertEqual(compact("# Design", "signatures"), "# Design")
+        with self.assertRaises(ValueError):
+            compact(MODULE, "summary")
+
+
+if __name__ == "__main__":
+    unittest.main()
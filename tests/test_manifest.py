@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from ai_engineering_team.manifest import MANIFEST_NAME, RunManifest, task_fingerprint
+
+
+def make_task(description="Write the module", model="gpt-4o"):
+    agent = SimpleNamespace(role="Engineer", goal="Write code", backstory="", llm=SimpleNamespace(model=model))
+    return SimpleNamespace(description=description, expected_output="A Python module", agent=agent)
+
+
+class TestTaskFingerprint(unittest.TestCase):
+    # Test each input only changes its own part of the fingerprint
+    def test_parts(self):
+        base = task_fingerprint(make_task(), "design")
+        self.assertEqual(base, task_fingerprint(make_task(), "design"))
+        changed = {
+            "description": task_fingerprint(make_task(description="Write two modules"), "design"),
+            "agent": task_fingerprint(make_task(model="gpt-4o-mini"), "design"),
+            "upstream": task_fingerprint(make_task(), "new design"),
+        }
+        for part, fingerprint in changed.items():
+            self.assertEqual([p for p in base if base[p] != fingerprint[p]], [part])
+
+
+class TestRunManifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.output_file = self.directory / "accounts.py"
+        self.output_file.write_text("class Account: ...\n", encoding="utf-8")
+        self.fingerprint = task_fingerprint(make_task(), "design")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def manifest(self, force=False):
+        return RunManifest.for_output_dir(str(self.directory), force=force)
+
+    # Test a recorded task is reusable in the next run, read back from disk
+    def test_reuse_unchanged(self):
+        self.assertEqual(self.manifest().check("coding_task", self.fingerprint, str(self.output_file)),
+                         (False, "no previous run"))
+        self.manifest().record("coding_task", self.fingerprint, str(self.output_file), "ran", "no previous run")
+        self.assertTrue((self.directory / MANIFEST_NAME).exists())
+        self.assertEqual(self.manifest().check("coding_task", self.fingerprint, str(self.output_file)),
+                         (True, "unchanged"))
+
+    # Test the reason a task has to run again
+    def test_rerun_reasons(self):
+        manifest = self.manifest()
+        manifest.record("coding_task", self.fingerprint, str(self.output_file), "ran", "no previous run")
+        changed = task_fingerprint(make_task(description="Write two modules"), "new design")
+        self.assertEqual(manifest.check("coding_task", changed, str(self.output_file)),
+                         (False, "description changed, upstream output changed"))
+        self.output_file.unlink()
+        self.assertEqual(manifest.check("coding_task", self.fingerprint, str(self.output_file)),
+                         (False, "output file missing"))
+        self.assertEqual(self.manifest(force=True).check("coding_task", self.fingerprint, str(self.output_file)),
+                         (False, "forced rerun"))
+
+    # Test an unreadable manifest counts as no previous run
+    def test_corrupt_manifest(self):
+        (self.directory / MANIFEST_NAME).write_text("{not json", encoding="utf-8")
+        self.assertEqual(self.manifest().entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
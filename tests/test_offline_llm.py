@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+try:
+    from crewai import BaseLLM
+except ImportError:
+    BaseLLM = None
+
+
+@unittest.skipIf(BaseLLM is None, "crewai not installed")
+class TestModelName(unittest.TestCase):
+    # Test native provider prefixes are dropped and LiteLLM-routed names are kept whole
+    def test_model_name(self):
+        from ai_engineering_team.cache import model_name
+
+        self.assertEqual(model_name("openai/gpt-4o"), "gpt-4o")
+        self.assertEqual(model_name("gpt-4o"), "gpt-4o")
+        self.assertEqual(model_name("anthropic/claude-3-5-sonnet"), "claude-3-5-sonnet")
+        self.assertEqual(model_name("ollama/llama3"), "ollama/llama3")
+        self.assertEqual(model_name("openrouter/meta-llama/llama-3"), "openrouter/meta-llama/llama-3")
+
+
+@unittest.skipIf(BaseLLM is None, "crewai not installed")
+class TestRecordAndReplay(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    # Test a response recorded through CachedLLM is replayed by OfflineLLM for the configured model
+    def test_offline_replays_recording(self):
+        from ai_engineering_team.cache import CachedLLM, ResponseCache
+        from ai_engineering_team.offline_llm import OfflineLLM
+
+        class NativeLLM(BaseLLM):
+            # What LLM("openai/gpt-4o") reports: the model without its provider prefix
+            def call(self, messages, *args, **kwargs):
+                return "Final Answer: recorded"
+
+        agent = SimpleNamespace(role="Engineer", goal="Write code", backstory="Experienced")
+        task = SimpleNamespace(prompt_context="design", output_file="output/accounts.py", name="coding_task")
+        messages = [{"role": "user", "content": "Write the module"}]
+
+        CachedLLM(NativeLLM(model="gpt-4o"), ResponseCache(self.directory)).call(
+            messages, from_task=task, from_agent=agent)
+        offline = OfflineLLM("offline/openai/gpt-4o", recordings=ResponseCache(self.directory, read_only=True))
+        self.assertEqual(offline.call(messages, from_task=task, from_agent=agent), "Final Answer: recorded")
+        self.assertEqual(offline.recordings.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
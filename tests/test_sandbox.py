@@ -0,0 +1,51 @@
+import unittest
+
+from ai_engineering_team.sandbox import SandboxPool
+
+
+class TestSandboxPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SandboxPool(workers=1, timeout=30)
+        self.addCleanup(self.pool.close)
+
+    # Test a snippet runs and its output comes back
+    def test_run(self):
+        result = self.pool.run("print(6 * 7)")
+        self.assertTrue(result.ok)
+        self.assertEqual(result.stdout, "42\n")
+        self.assertIn("ZeroDivisionError", self.pool.run("1 / 0").error)
+
+    # Test a worker whose reply framing a snippet corrupted is replaced, not reused
+    def test_corrupt_reply_replaces_worker(self):
+        result = self.pool.run("import sys\nworker = sys.modules['__main__']\n"
+                               "worker.proto_out.write(worker.HEADER.pack(3) + b'xyz')\nworker.proto_out.flush()")
+        self.assertFalse(result.ok)
+        self.assertEqual(self.pool.restarts, 1)
+        self.assertEqual(self.pool.run("print('next')").stdout, "next\n")
+
+    # Test environment, module and builtins changes do not reach the next snippet
+    def test_snippets_are_isolated(self):
+        first = self.pool.run("import builtins, os, sys\nos.environ['SANDBOX_LEAK'] = '1'\n"
+                              "sys.modules['math'] = None\nbuiltins.len = lambda value: 0\nx = 1")
+        self.assertTrue(first.ok, first.error)
+        second = self.pool.run("import math, os\nprint(os.environ.get('SANDBOX_LEAK'), math.floor(2.5), len('abc'))\n"
+                               "print('x' in globals())")
+        self.assertTrue(second.ok, second.error)
+        self.assertEqual(second.stdout, "None 2 3\nFalse\n")
+        self.assertEqual(self.pool.restarts, 0)
+
+    # Test a module with a C extension can be imported by one snippet after another
+    def test_reimport_extension_module(self):
+        for _ in range(2):
+            result = self.pool.run("try:\n    import numpy\nexcept ImportError:\n    pass")
+            self.assertTrue(result.ok, result.error)
+
+    # Test a snippet that exceeds its time is stopped and the pool keeps working
+    def test_timeout(self):
+        result = self.pool.run("while True: pass", timeout=1)
+        self.assertIn("Timed out", result.error)
+        self.assertEqual(self.pool.run("print('after')").stdout, "after\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
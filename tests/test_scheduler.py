@@ -0,0 +1,238 @@
+import contextlib
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from ai_engineering_team.manifest import RunManifest
+from ai_engineering_team.scheduler import DagScheduler, load_compaction, load_task_graph, topological_order
+
+try:
+    import crewai
+except ImportError:
+    crewai = None
+
+MODULE = '''import math
+
+
+class Account:
+    def withdraw(self, amount: float) -> bool:
+        if amount > self.balance:
+            return False
+        self.balance -= amount
+        return True
+'''
+
+
+class FakeCrew:
+    # Just the parts of a Crew that DagScheduler.run touches besides executing tasks
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.agents = []
+        self.before_kickoff_callbacks = []
+        self.after_kickoff_callbacks = []
+        self.process = "sequential"
+        self.stream = False
+        self.execution_log = []
+        self.kickoffs = []
+
+    def kickoff(self, inputs=None):
+        self.kickoffs.append(inputs)
+        return "kickoff output"
+
+    def _process_task_result(self, task, output):
+        pass
+
+    def _store_execution_log(self, task, output, task_index):
+        self.execution_log.append((task_index, output))
+
+    def _create_crew_output(self, outputs):
+        return outputs
+
+    def calculate_usage_metrics(self):
+        return None
+
+
+class RecordingScheduler(DagScheduler):
+    # Executes a task by logging when it starts and ends, after an optional per-task hook
+    def __init__(self, graph, hooks=None, **kwargs):
+        super().__init__(graph=graph, compaction={}, **kwargs)
+        self.hooks = hooks or {}
+        self.events = []
+        self.prepared = None
+        self._events_lock = threading.Lock()
+
+    def supports(self, crew):
+        return crew.process == "sequential"
+
+    def _kickoff_scope(self, crew):
+        return contextlib.nullcontext()
+
+    def _prepare(self, crew, inputs):
+        self.prepared = inputs
+
+    def execute_task(self, crew, task, timing):
+        with self._events_lock:
+            self.events.append(("start", task.name))
+        if task.name in self.hooks:
+            self.hooks[task.name]()
+        with self._events_lock:
+            self.events.append(("end", task.name))
+        return f"output of {task.name}"
+
+
+def tasks_for(graph, shared_agent=False):
+    agent = object()
+    return [SimpleNamespace(name=name, agent=agent if shared_agent else object()) for name in graph]
+
+
+class TestTaskGraph(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_config(self, text):
+        path = self.directory / "tasks.yaml"
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    # Test the shipped tasks.yaml: frontend and testing only need the code, which needs the design
+    def test_default_config(self):
+        graph = load_task_graph()
+        self.assertEqual(graph["coding_task"], ("design_task",))
+        self.assertEqual(graph["frontend_task"], ("coding_task",))
+        self.assertEqual(graph["testing_task"], ("coding_task",))
+        self.assertEqual(topological_order(graph), list(graph))
+
+    # Test every task comes after its dependencies, and ties keep declaration order
+    def test_topological_order(self):
+        graph = {"report": ("tests", "code"), "tests": ("code",), "code": ("design",), "design": (), "notes": ()}
+        self.assertEqual(topological_order(graph), ["design", "code", "tests", "report", "notes"])
+        linear = {"a": (), "b": ("a",), "c": ("b",)}
+        self.assertEqual(topological_order(linear), ["a", "b", "c"])
+
+    # Test cycles and unknown dependencies are rejected when the config is loaded
+    def test_invalid_graphs(self):
+        with self.assertRaisesRegex(ValueError, "cycle: a -> b -> a"):
+            load_task_graph(self.write_config("a:\n  context: [b]\nb:\n  context: [a]\n"))
+        with self.assertRaisesRegex(ValueError, "unknown task"):
+            load_task_graph(self.write_config("a:\n  context: [missing]\n"))
+
+    # Test compaction modes are read per task and unknown modes are rejected
+    def test_load_compaction(self):
+        path = self.write_config("a:\n  description: x\nb:\n  context: [a]\n  context_compaction: signatures\n")
+        self.assertEqual(load_compaction(path), {"b": "signatures"})
+        with self.assertRaisesRegex(ValueError, "unknown context_compaction"):
+            load_compaction(self.write_config("a:\n  context_compaction: everything\n"))
+
+
+class TestDagScheduler(unittest.TestCase):
+    GRAPH = {"design": (), "code": ("design",), "frontend": ("code",), "tests": ("code",)}
+
+    # Test each task starts only after its dependencies ended, and outputs come back in graph order
+    def test_dependency_order(self):
+        scheduler = RecordingScheduler(self.GRAPH)
+        result = scheduler.run(FakeCrew(tasks_for(self.GRAPH)))
+        self.assertEqual(result.output, [f"output of {name}" for name in self.GRAPH])
+        for name, deps in self.GRAPH.items():
+            for dep in deps:
+                self.assertLess(scheduler.events.index(("end", dep)), scheduler.events.index(("start", name)))
+        self.assertEqual({timing.status for timing in result.timings.values()}, {"ran"})
+
+    # Test the crew is prepared first and every finished task lands in the crew's execution log
+    def test_kickoff_steps(self):
+        scheduler = RecordingScheduler(self.GRAPH)
+        crew = FakeCrew(tasks_for(self.GRAPH))
+        scheduler.run(crew, inputs={"module_name": "accounts.py"})
+        self.assertEqual(scheduler.prepared, {"module_name": "accounts.py"})
+        self.assertEqual(sorted(crew.execution_log), [(i, f"output of {name}") for i, name in enumerate(self.GRAPH)])
+
+    # Test a crew the scheduler cannot drive itself is run with crew.kickoff()
+    def test_kickoff_fallback(self):
+        scheduler = RecordingScheduler(self.GRAPH)
+        crew = FakeCrew(tasks_for(self.GRAPH))
+        crew.process = "hierarchical"
+        with self.assertWarnsRegex(RuntimeWarning, "crew.kickoff"):
+            result = scheduler.run(crew, inputs={"module_name": "accounts.py"})
+        self.assertEqual(result.output, "kickoff output")
+        self.assertEqual(crew.kickoffs, [{"module_name": "accounts.py"}])
+        self.assertEqual((scheduler.prepared, scheduler.events), (None, []))
+
+    # Test independent tasks run side by side: each waits for the other to have started
+    def test_independent_tasks_overlap(self):
+        both_started = threading.Barrier(2, timeout=5)
+        scheduler = RecordingScheduler(self.GRAPH, hooks={"frontend": both_started.wait, "tests": both_started.wait})
+        scheduler.run(FakeCrew(tasks_for(self.GRAPH)))
+        self.assertFalse(both_started.broken)
+
+    # Test tasks that share an agent never overlap, even when the graph allows it
+    def test_shared_agent_runs_one_task_at_a_time(self):
+        graph = {"a": (), "b": (), "c": ()}
+        scheduler = RecordingScheduler(graph)
+        scheduler.run(FakeCrew(tasks_for(graph, shared_agent=True)))
+        self.assertEqual([kind for kind, _ in scheduler.events], ["start", "end"] * 3)
+
+    # Test a failing task stops the run before its dependents start
+    def test_failure_stops_dependents(self):
+        def fail():
+            raise RuntimeError("model unavailable")
+        scheduler = RecordingScheduler(self.GRAPH, hooks={"code": fail})
+        with self.assertRaisesRegex(RuntimeError, "model unavailable"):
+            scheduler.run(FakeCrew(tasks_for(self.GRAPH)))
+        started = {name for kind, name in scheduler.events if kind == "start"}
+        self.assertEqual(started, {"design", "code"})
+
+    # Test a graph naming a task the crew does not have is rejected
+    def test_missing_task(self):
+        with self.assertRaisesRegex(ValueError, "no task"):
+            RecordingScheduler(self.GRAPH).run(FakeCrew(tasks_for({"design": ()})))
+
+
+@unittest.skipIf(crewai is None, "crewai not installed")
+class TestContextAndReuse(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def upstream(self, raw):
+        return SimpleNamespace(name="coding_task", output=SimpleNamespace(raw=raw))
+
+    # Test context is the upstream output as is, or its public API when the task opted in
+    def test_build_context(self):
+        plain = DagScheduler(graph={}, compaction={})
+        compacting = DagScheduler(graph={}, compaction={"testing_task": "signatures"})
+        task = SimpleNamespace(name="testing_task", context=[self.upstream(MODULE)])
+        self.assertIn("self.balance -= amount", plain.build_context(task))
+        context = compacting.build_context(task)
+        self.assertIn("def withdraw(self, amount: float) -> bool:", context)
+        self.assertNotIn("self.balance -= amount", context)
+        self.assertEqual(plain.build_context(SimpleNamespace(name="design_task", context=[])), "")
+
+    # Test a task whose inputs are unchanged reuses its output file instead of running
+    def test_manifest_reuse(self):
+        output_file = self.directory / "accounts.py"
+        output_file.write_text(MODULE, encoding="utf-8")
+        agent = SimpleNamespace(role="Engineer", goal="code", backstory="", llm=None)
+        task = SimpleNamespace(name="coding_task", description="Write it", expected_output="A module",
+                               agent=agent, context=[], output_file=str(output_file))
+        manifest = RunManifest.for_output_dir(str(self.directory))
+        scheduler = DagScheduler(graph={}, compaction={}, manifest=manifest)
+        context = scheduler.build_context(task)
+        from ai_engineering_team.manifest import task_fingerprint
+        manifest.record(task.name, task_fingerprint(task, context), task.output_file, "ran", "no previous run")
+
+        timing = SimpleNamespace(status="ran", reason="")
+        output = scheduler.execute_task(crew=None, task=task, timing=timing)
+        self.assertEqual((timing.status, timing.reason), ("reused", "unchanged"))
+        self.assertEqual(output.raw, MODULE)
+        self.assertEqual(RunManifest.for_output_dir(str(self.directory)).entries["coding_task"]["status"], "reused")
+
+
+if __name__ == "__main__":
+    unittest.main()